@@ -1,14 +1,20 @@
-from sklearn.ensemble import IsolationForest
-import numpy as np
+# Simple model, built on first use: importing sklearn takes over a second
+_model = None
 
-# Simple model initialization
-model = IsolationForest(contamination=0.05, random_state=42)
+
+def get_model():
+    """The shared IsolationForest, created on first call."""
+    global _model
+    if _model is None:
+        from sklearn.ensemble import IsolationForest
+        _model = IsolationForest(contamination=0.05, random_state=42)
+    return _model
 
 
 def train_anomaly_model(data):
     """Train the Isolation Forest model on supply data."""
     if len(data) > 0:
-        model.fit(data)
+        get_model().fit(data)
 
 
 def detect_anomaly(sample):
@@ -20,5 +26,5 @@ def detect_anomaly(sample):
     Returns:
         "ANOMALY" if anomaly detected, "NORMAL" otherwise
     """
-    prediction = model.predict([sample])
+    prediction = get_model().predict([sample])
     return "ANOMALY" if prediction[0] == -1 else "NORMAL"
@@ -207,9 +207,9 @@ async def get_ai_insights():
         })
     
     # 5. Get priority usage recommendations
-    priority_result = await calculate_priority()
+    priority_result = await calculate_priority(limit=15)  # Top 15
     priority_usage = []
-    for item in priority_result[:15]:  # Top 15
+    for item in priority_result:
         if item.get("recommendation") in ["USE_IMMEDIATELY", "USE_SOON"]:
             try:
                 medicine_doc = await db.medicines.find_one({"_id": ObjectId(item.get("medicine_id"))}) if item.get("medicine_id") else None
@@ -0,0 +1,47 @@
+import asyncio
+from fastapi import APIRouter, Response
+from app.core.metrics import exposition, family, registry
+from app.db.mongodb import pool_metrics
+from app.services.barcode_service import barcode_decoder
+from app.services.cdsco_verification_service import match_cache
+from app.services.content_cache import barcode_cache, image_analysis_cache
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _cache_and_queue_families() -> list:
+    """Cache hit ratios and queue depths, read from the services at scrape time"""
+    caches = {
+        "barcode": barcode_cache.stats(),
+        "image_analysis": image_analysis_cache.stats(),
+        "cdsco_match": match_cache.stats()
+    }
+    return [
+        family("medguard_cache_hits", "counter", "Cache hits (memory and disk)",
+               {(name,): s["hits"] + s.get("disk_hits", 0) for name, s in caches.items()}, ("cache",)),
+        family("medguard_cache_misses", "counter", "Cache misses",
+               {(name,): s["misses"] for name, s in caches.items()}, ("cache",)),
+        family("medguard_cache_hit_ratio", "gauge", "Cache hit ratio since start",
+               {(name,): s["hit_ratio"] for name, s in caches.items()}, ("cache",)),
+        family("medguard_cache_entries", "gauge", "Entries held in memory",
+               {(name,): s["entries"] for name, s in caches.items()}, ("cache",)),
+        family("medguard_barcode_decode_pending", "gauge", "Barcode decodes queued or running",
+               {(): barcode_decoder.pending}),
+        family("medguard_barcode_decode_max_pending", "gauge", "Barcode decodes allowed at once",
+               {(): barcode_decoder.max_pending}),
+        family("medguard_mongo_pool_checked_out", "gauge", "MongoDB connections checked out",
+               {(): pool_metrics.checked_out}),
+        family("medguard_mongo_pool_checkout_failures", "counter", "Failed MongoDB connection checkouts",
+               {(): pool_metrics.checkout_failures}),
+    ]
+
+
+registry.register_collector(_cache_and_queue_families)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of this worker's (or every worker's) metrics."""
+    return Response(content=await asyncio.to_thread(exposition), media_type=CONTENT_TYPE)
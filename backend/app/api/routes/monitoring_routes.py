@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException
+from app.core.tracing import span_histograms
+from app.db.indexes import index_report
+from app.db.mongodb import pool_metrics
+from app.services.barcode_service import barcode_decoder
+from app.services.cdsco_verification_service import match_cache, reload_cdsco_data
+from app.services.content_cache import barcode_cache, image_analysis_cache
+
+router = APIRouter()
+
+
+@router.get("/indexes")
+async def indexes():
+    """Report missing, unused and unregistered MongoDB indexes."""
+    return await index_report()
+
+
+@router.get("/pool")
+async def pool():
+    """MongoDB connection pool checkout wait-time metrics for this worker."""
+    return pool_metrics.snapshot()
+
+
+@router.get("/barcode")
+async def barcode():
+    """Barcode decoder pool usage and per-stage success counters for this worker."""
+    return barcode_decoder.stats()
+
+
+@router.get("/upload-cache")
+async def upload_cache():
+    """Hit ratios of the content-addressed upload result caches for this worker."""
+    return {
+        "barcode": barcode_cache.stats(),
+        "image_analysis": image_analysis_cache.stats()
+    }
+
+
+@router.get("/cdsco")
+async def cdsco():
+    """CDSCO manufacturer match cache hit ratio for this worker."""
+    return match_cache.stats()
+
+
+@router.post("/cdsco/reload")
+async def cdsco_reload():
+    """Reload the CDSCO registry file in this worker (others pick it up on their next file check)."""
+    try:
+        return reload_cdsco_data()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Registry reload failed: {e}")
+
+
+@router.get("/spans")
+async def spans():
+    """Per-span latency histograms (p50/p95/p99) and the slowest requests for this worker."""
+    return span_histograms.snapshot()
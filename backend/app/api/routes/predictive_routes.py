@@ -1,10 +1,11 @@
-from fastapi import APIRouter
-from app.services.predictive_service import calculate_priority
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from app.services.predictive_service import calculate_priority, calculate_priority_page
 
 router = APIRouter()
 
 @router.get("/usage")
-async def predictive_usage():
+async def predictive_usage(limit: Optional[int] = None, recommendation: Optional[str] = None):
     """Get usage priority recommendations for all supplies.
     
     Returns list of supplies with priority scores and recommendations:
@@ -12,5 +13,29 @@ async def predictive_usage():
     - USE_SOON: Medium priority (score >= 40)
     - NORMAL: Standard priority (score >= 20)
     - HOLD: Low priority (score < 20)
+
+    Optional `limit` returns only the top N supplies and `recommendation`
+    filters to a single recommendation.
+    """
+    try:
+        return await calculate_priority(limit=limit, recommendation=recommendation)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/usage/page")
+async def predictive_usage_page(
+    limit: int = 50,
+    recommendation: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    """Cursor-paginated usage priority list.
+
+    Pass the returned `next_cursor` to fetch the next page.
     """
-    return await calculate_priority()
+    if limit < 1 or limit > 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    try:
+        return await calculate_priority_page(limit=limit, recommendation=recommendation, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -4,14 +4,24 @@ Citizen-facing medicine verification endpoints
 Uses AI-powered dynamic verification engine
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException, Request
-from app.models.public_scan_log import PublicVerificationRequest, PublicVerificationResponse
+from fastapi.responses import StreamingResponse
+from app.api.uploads import read_image_upload, read_image_uploads
+from app.core.config import settings
+from app.models.public_scan_log import (
+    BatchVerificationManyRequest,
+    PublicVerificationRequest,
+    PublicVerificationResponse
+)
 from app.services.public_verification_engine_v2 import (
     verify_by_barcode,
+    verify_by_barcode_batch,
     verify_by_batch_number,
     verify_by_image,
-    verify_by_medicine_name
+    verify_by_medicine_name,
+    stream_batch_verifications
 )
-from typing import Optional
+import json
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -37,21 +47,8 @@ async def verify_medicine_by_barcode(
     Returns verification verdict with confidence score
     """
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file type. Please upload an image."
-            )
-        
-        # Read image
-        image_data = await file.read()
-        
-        if not image_data or len(image_data) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Empty image file"
-            )
+        # Read image (type, signature and size checked while reading)
+        image_data = await read_image_upload(file)
         
         # Get client info
         client_info = get_client_info(request)
@@ -74,6 +71,41 @@ async def verify_medicine_by_barcode(
         )
 
 
+@router.post("/verify/barcode/batch")
+async def verify_medicine_barcode_batch(
+    files: List[UploadFile] = File(...),
+    device_id: Optional[str] = None,
+    request: Request = None
+):
+    """
+    Verify many barcode images in one request
+    
+    Upload several images and/or zip archives of images (e.g. every box
+    of a delivery). Returns a verdict per image plus a summary.
+    """
+    try:
+        # Read images (unreadable files become per-image errors)
+        images = await read_image_uploads(files)
+        
+        # Get client info
+        client_info = get_client_info(request)
+        
+        # Run verification
+        return await verify_by_barcode_batch(
+            images=images,
+            device_id=device_id,
+            ip_address=client_info.get("ip_address")
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Verification failed: {str(e)}"
+        )
+
+
 @router.post("/verify/batch")
 async def verify_medicine_by_batch(
     batch_number: str,
@@ -115,6 +147,44 @@ async def verify_medicine_by_batch(
         )
 
 
+@router.post("/verify/batch/many")
+async def verify_medicine_batch_many(
+    payload: BatchVerificationManyRequest,
+    request: Request = None
+):
+    """
+    Verify many batch numbers in one request (hospital integrations)
+    
+    Items are normalized and deduped. Results stream back as NDJSON, one
+    line per distinct (batch_number, manufacturer) with the "indices" of
+    the request items it answers, followed by a {"summary": ...} line.
+    """
+    if not payload.items:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one item is required"
+        )
+    
+    if len(payload.items) > settings.batch_verify_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items. Maximum {settings.batch_verify_max_items} per request."
+        )
+    
+    # Get client info
+    client_info = get_client_info(request)
+    
+    async def ndjson():
+        async for line in stream_batch_verifications(
+            items=[item.model_dump() for item in payload.items],
+            device_id=payload.device_id,
+            ip_address=client_info.get("ip_address")
+        ):
+            yield json.dumps(line, default=str) + "\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @router.post("/verify/image")
 async def verify_medicine_by_image(
     file: UploadFile = File(...),
@@ -127,28 +197,8 @@ async def verify_medicine_by_image(
     Analyzes packaging, attempts barcode detection, validates authenticity
     """
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file type. Please upload an image."
-            )
-        
-        # Read image
-        image_data = await file.read()
-        
-        if not image_data or len(image_data) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Empty image file"
-            )
-        
-        # File size check (max 10MB)
-        if len(image_data) > 10 * 1024 * 1024:
-            raise HTTPException(
-                status_code=400,
-                detail="Image file too large. Maximum 10MB allowed."
-            )
+        # Read image (type, signature and size checked while reading)
+        image_data = await read_image_upload(file)
         
         # Get client info
         client_info = get_client_info(request)
@@ -242,7 +292,9 @@ async def test_public_verification():
         "endpoints": {
             "medicine_name": "POST /verify/medicine (PRIMARY - simple interface)",
             "batch": "POST /verify/batch (advanced with batch number)",
+            "batch_many": "POST /verify/batch/many (bulk batch numbers, NDJSON results)",
             "barcode": "POST /verify/barcode (scan barcode image)",
+            "barcode_batch": "POST /verify/barcode/batch (many barcode images or a zip)",
             "image": "POST /verify/image (scan medicine package)"
         }
     }
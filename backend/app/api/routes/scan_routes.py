@@ -1,4 +1,5 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from app.api.uploads import read_image_upload
 from app.services.scan_service import scan_medicine, verify_medicine_authenticity
 from app.schemas.scan_schema import ManualBatchVerify
 from typing import Optional
@@ -20,21 +21,8 @@ async def scan_medicine_barcode(file: UploadFile = File(...)):
     - warning flags (if any)
     """
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file type. Please upload an image file."
-            )
-        
-        # Read image data
-        image_data = await file.read()
-        
-        if not image_data:
-            raise HTTPException(
-                status_code=400,
-                detail="Empty file uploaded"
-            )
+        # Read image data (type, signature and size checked while reading)
+        image_data = await read_image_upload(file)
         
         # Process scan
         result = await scan_medicine(image_data)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
-from app.schemas.supply_schema import SupplyIntake, Supply
-from app.services.supply_service import intake_supply, list_supplies, get_supply_by_id
+from app.schemas.supply_schema import SupplyIntake, Supply, SupplyStatusUpdate
+from app.services.supply_service import intake_supply, list_supplies, get_supply_by_id, update_supply_status
 from app.services.recycle_service import (
     soft_delete,
     restore,
@@ -44,6 +44,17 @@ async def get_supply(supply_id: str):
     return supply
 
 
+# 🔄 Update compliance/fake status (recomputes usage priority)
+@router.put("/status/{supply_id}")
+async def update_status(supply_id: str, data: SupplyStatusUpdate):
+    supply = await update_supply_status(supply_id, data)
+
+    if not supply:
+        raise HTTPException(status_code=404, detail="Supply not found")
+
+    return supply
+
+
 @router.delete("/{supply_id}")
 async def delete_supply(supply_id: str):
     return await soft_delete("supplies", supply_id)
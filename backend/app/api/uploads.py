@@ -0,0 +1,204 @@
+"""
+Image upload reading shared by the scan and public verification routes
+
+Uploads are read in chunks into one buffer and rejected as soon as they
+pass the size cap or do not start with a known image signature, so a
+request never holds more than max_upload_bytes of image data in memory
+(barcode_batch_max_total_bytes for a multi-image upload).
+The buffer is handed on as a memoryview; np.frombuffer / cv2.imdecode
+read it without another copy.
+"""
+import asyncio
+import zipfile
+from fastapi import HTTPException, UploadFile
+from typing import List, Optional
+
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+ZIP_SIGNATURE = b"PK\x03\x04"
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+# Leading bytes of the image formats OpenCV and PIL can decode
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    """Image format from the first bytes of a file, or None"""
+    for signature, fmt in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return fmt
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Image file too large. Maximum {max_bytes / (1024 * 1024):.3g}MB allowed."
+    )
+
+
+async def read_image_upload(file: UploadFile, max_bytes: Optional[int] = None) -> memoryview:
+    """
+    Read an uploaded image with an early size cap and format sniff
+
+    Raises HTTPException 400 for a non-image content type, an empty file
+    or unrecognised image bytes, and 413 once more than max_bytes
+    (default settings.max_upload_bytes) have been read.
+    """
+    max_bytes = max_bytes or settings.max_upload_bytes
+
+    if not file.content_type or not file.content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file type. Please upload an image."
+        )
+
+    # The multipart parser already knows the size of spooled files
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_bytes:
+            raise _too_large(max_bytes)
+        if not buffer and sniff_image_format(chunk[:16]) is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Unsupported or corrupt image. Please upload a JPEG, PNG or WebP photo."
+            )
+        buffer += chunk
+
+    if not buffer:
+        raise HTTPException(
+            status_code=400,
+            detail="Empty image file"
+        )
+
+    return memoryview(buffer)
+
+
+def _batch_too_large(max_total_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload too large. Maximum {max_total_bytes / (1024 * 1024):.3g}MB of images per request."
+    )
+
+
+def _read_zip_images(file, max_bytes: int, max_images: int, max_total_bytes: int, used: int = 0) -> list:
+    """
+    Extract image members of an uploaded zip (blocking)
+
+    Members are read straight from the spooled upload and capped at
+    max_bytes each using the declared and the actual decompressed size.
+    Raises HTTPException 413 once the extracted images would pass
+    max_total_bytes together with the `used` bytes already read.
+    """
+    images = []
+    total = used
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        return [{"filename": None, "error": "Corrupt zip archive"}]
+
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or name.rsplit("/", 1)[-1].startswith("."):
+                continue
+            if len(images) >= max_images:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Too many images. Maximum {max_images} per request."
+                )
+            if info.file_size > max_bytes:
+                images.append({"filename": name, "error": _too_large(max_bytes).detail})
+                continue
+            cap = min(max_bytes, max_total_bytes - total)
+            if info.file_size > cap:
+                raise _batch_too_large(max_total_bytes)
+            with archive.open(info) as member:
+                data = member.read(cap + 1)
+            if len(data) > max_bytes:
+                images.append({"filename": name, "error": _too_large(max_bytes).detail})
+            elif len(data) > cap:
+                raise _batch_too_large(max_total_bytes)
+            elif sniff_image_format(data[:16]) is None:
+                images.append({"filename": name, "error": "Unsupported or corrupt image"})
+            else:
+                images.append({"filename": name, "data": memoryview(data)})
+                total += len(data)
+    return images
+
+
+async def read_image_uploads(
+    files: List[UploadFile],
+    max_images: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    max_total_bytes: Optional[int] = None
+) -> list:
+    """
+    Read a multi-image upload: any mix of image files and zip archives
+
+    Returns {"filename", "data"} items, or {"filename", "error"} for
+    files rejected by read_image_upload, so one bad photo does not fail
+    the whole batch. Raises HTTPException 413 past max_images images or
+    once the images read pass max_total_bytes (default
+    settings.barcode_batch_max_total_bytes) together.
+    """
+    max_images = max_images or settings.barcode_batch_max_images
+    max_bytes = max_bytes or settings.max_upload_bytes
+    max_total_bytes = max_total_bytes or settings.barcode_batch_max_total_bytes
+    images = []
+    total = 0
+
+    for file in files:
+        head = await file.read(len(ZIP_SIGNATURE))
+        await file.seek(0)
+
+        if file.content_type in ZIP_CONTENT_TYPES or head == ZIP_SIGNATURE:
+            extracted = await asyncio.to_thread(
+                _read_zip_images, file.file, max_bytes, max_images - len(images), max_total_bytes, total
+            )
+            images.extend(extracted)
+            total += sum(len(item["data"]) for item in extracted if "data" in item)
+        else:
+            if len(images) >= max_images:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Too many images. Maximum {max_images} per request."
+                )
+            remaining = max_total_bytes - total
+            if remaining <= 0:
+                raise _batch_too_large(max_total_bytes)
+            try:
+                data = await read_image_upload(file, min(max_bytes, remaining))
+            except HTTPException as e:
+                # Over what is left of the request budget, not the per-image cap
+                if e.status_code == 413 and remaining < max_bytes:
+                    raise _batch_too_large(max_total_bytes)
+                images.append({"filename": file.filename, "error": e.detail})
+                continue
+            images.append({"filename": file.filename, "data": data})
+            total += len(data)
+
+    if not images:
+        raise HTTPException(
+            status_code=400,
+            detail="No images uploaded"
+        )
+    return images
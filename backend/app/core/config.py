@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -8,6 +9,102 @@ class Settings(BaseSettings):
     jwt_algorithm: str
     access_token_expire_minutes: int
 
+    # Import cv2 / pyzbar / sklearn in the background after startup
+    warmup_heavy_imports: bool = True
+
+    # Level of the "app" logger; DEBUG enables the per-phase verification trace
+    log_level: str = "INFO"
+    # One JSON object per log line; False for plain text while developing
+    log_json: bool = True
+
+    # One JSON line per request with its span breakdown (see app/core/tracing.py)
+    trace_log_requests: bool = True
+
+    # Directory shared by uvicorn workers for /metrics snapshots; empty
+    # serves only the answering worker's metrics
+    metrics_multiprocess_dir: str = ""
+    metrics_publish_seconds: float = 5
+
+    # MongoDB connection pool (per worker process)
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: int = 30000
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    # Comma-separated wire compressors, e.g. "zstd,snappy" (needs zstandard / python-snappy)
+    mongo_compressors: str = ""
+    mongo_read_preference: str = "primary"
+    # "majority" or a node count such as "1"; empty uses the server default
+    mongo_write_concern: str = ""
+
+    # Barcode decoding worker pool (per worker process); unset uses the CPU count
+    barcode_decode_workers: Optional[int] = None
+    # Decodes queued or running at once; further requests wait for a slot
+    barcode_decode_max_pending: int = 16
+    # Images accepted by one /public/verify/barcode/batch request
+    barcode_batch_max_images: int = 100
+    # Image bytes held by one /public/verify/barcode/batch request, across all images
+    barcode_batch_max_total_bytes: int = 64 * 1024 * 1024
+    # Items accepted by one /public/verify/batch/many request
+    batch_verify_max_items: int = 10000
+
+    # Binary CDSCO registry from scripts/build_cdsco_registry.py (memory-mapped);
+    # empty builds the registry from app/data/cdsco_manufacturers.json
+    cdsco_registry_path: str = ""
+    # CDSCO manufacturer match memo size, in entries
+    cdsco_cache_max_entries: int = 4096
+    # How often workers check the registry file for a new dump; 0 disables
+    cdsco_reload_check_seconds: float = 30
+
+    # How long hourly scan frequency buckets are kept; must cover the
+    # scan history window (24 hours)
+    scan_frequency_retention_hours: int = 48
+
+    # Prefix lengths compared by the known-fake batch check
+    fake_batch_prefix_lengths: List[int] = [4]
+    # How often each worker reloads the flagged batch numbers it compares against
+    fake_batch_prefix_refresh_seconds: float = 60
+
+    # Weighting of verification signals (app/services/verification_engine.py):
+    # a multiplier per signal provider (default 1), and the share of the
+    # evidence total in the confidence when a database / CDSCO match confirms
+    # the medicine and when none does (the batch heuristics get the rest).
+    # A provider weighted 0 is not run. Scan history is off by default: its
+    # verdict counts come from earlier verdicts, which it would reinforce.
+    # Scans are only counted into the hourly buckets while it is weighted;
+    # after enabling it, rebuild them with scripts/backfill_scan_frequency.py
+    verification_signal_weights: Dict[str, float] = {"scan_history": 0.0}
+    verification_confirmed_evidence_share: float = 0.65
+    verification_unconfirmed_evidence_share: float = 0.4
+
+    # Time a public verification waits for its signals, and the share of it
+    # each signal may take (unlisted ones get the whole deadline); a signal
+    # that misses its budget is skipped and the verdict uses the others
+    verification_deadline_ms: float = 300
+    verification_signal_budgets_ms: Dict[str, float] = {
+        "database": 250,
+        "batch_record": 250,
+        "cdsco": 150,
+        "scan_history": 100,
+    }
+    # The same for staff scans (/scan), which wait for the supply records:
+    # a verdict from them matters more there than a fast answer. The batch
+    # pattern and scan history checks are capped so they never hold it up
+    scan_deadline_ms: float = 5000
+    scan_signal_budgets_ms: Dict[str, float] = {
+        "batch_pattern": 300,
+        "scan_history": 200,
+    }
+
+    # Largest accepted image upload, in bytes
+    max_upload_bytes: int = 10 * 1024 * 1024
+
+    # Content-addressed cache of barcode decode / image analysis results
+    upload_cache_max_entries: int = 1024
+    # Directory for entries evicted from memory; empty disables the spill
+    upload_cache_spill_dir: str = ""
+    upload_cache_spill_max_entries: int = 20000
+
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(__file__), "..", "..", ".env"),
         extra="ignore"
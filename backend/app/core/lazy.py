@@ -0,0 +1,71 @@
+"""
+Deferred imports for heavy optional dependencies
+
+cv2, pyzbar, PIL and sklearn take seconds to import on a cold container.
+Modules bind them with lazy_import so importing the app (and therefore
+startup) does not load them; the real import happens on first attribute
+access, or earlier in the background via warm_up after startup.
+"""
+import asyncio
+import importlib
+import time
+
+# Imported in the background once the app is serving
+HEAVY_MODULES = ["numpy", "cv2", "PIL.Image", "pyzbar.pyzbar", "sklearn.ensemble"]
+
+
+class LazyModule:
+    """Module proxy that imports the module on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+class WarmupState:
+    """Outcome of the background warm-up, reported by /ready"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.ready_at = None
+        self.done = False
+        self.modules = {}
+
+    def snapshot(self) -> dict:
+        return {
+            "done": self.done,
+            "modules": dict(self.modules),
+        }
+
+
+warmup_state = WarmupState()
+
+
+def _import_heavy_modules():
+    for name in HEAVY_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            warmup_state.modules[name] = {"loaded": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+        except Exception as e:
+            warmup_state.modules[name] = {"loaded": False, "error": str(e)}
+
+
+async def warm_up():
+    """Import the heavy modules in a worker thread so first requests do not pay for it"""
+    await asyncio.to_thread(_import_heavy_modules)
+    warmup_state.done = True
@@ -0,0 +1,158 @@
+"""
+Structured logging
+
+Modules log through logging.getLogger(__name__) under the "app" logger.
+Records are handed to a QueueHandler, which only enqueues them, and a
+QueueListener thread formats them as one JSON object per line and writes
+them to stdout, so request handlers never block on the stream. The level
+(settings.log_level) is checked before a record is built, so debug
+tracing with %-style arguments costs almost nothing in production.
+
+Fields passed with extra={...} become top-level JSON keys; the current
+request id (app.core.tracing) is added to every record.
+"""
+import json
+import logging
+import queue
+import sys
+import time
+import traceback
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+from app.core.tracing import current_request_id
+
+APP_LOGGER = "app"
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    _encoder = json.JSONEncoder(default=str, ensure_ascii=False, separators=(",", ":"))
+
+    def __init__(self):
+        super().__init__()
+        self._second = None
+        self._second_text = ""
+
+    def _timestamp(self, created: float) -> str:
+        # Records arrive in bursts within the same second; format that part once
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._second_text}.{int((created - second) * 1000):03d}Z"
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self._timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return self._encoder.encode(entry)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    QueueHandler that captures request context in the calling thread
+
+    The message and any traceback are rendered here, because the record
+    is read later by the listener thread; formatting itself happens there.
+    The record is not copied: this is the only handler that sees it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        return record
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to LogListener"""
+
+    def flush(self):
+        pass
+
+    def flush_stream(self):
+        with self.lock:
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+
+
+class LogListener(QueueListener):
+    """
+    QueueListener that flushes once the queue is drained
+
+    Under load a burst of records becomes one write instead of one
+    write (and syscall) per line; when idle each record is flushed
+    immediately.
+    """
+
+    def handle(self, record: logging.LogRecord):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush_stream()
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            handler.flush_stream()
+
+
+def setup_logging(level: Optional[str] = None) -> QueueListener:
+    """Route the "app" logger through the queue; idempotent"""
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    stream = BufferedStreamHandler(sys.stdout)
+    if settings.log_json:
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(APP_LOGGER)
+    logger.setLevel((level or settings.log_level).upper())
+    _handler = ContextQueueHandler(log_queue)
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+    _listener = LogListener(log_queue, stream)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logger = logging.getLogger(APP_LOGGER)
+    logger.removeHandler(_handler)
+    logger.propagate = True
+    _listener.stop()
+    _listener = None
+    _handler = None
@@ -0,0 +1,323 @@
+"""
+Prometheus metrics
+
+Counters, gauges and histograms rendered in the Prometheus text
+exposition format by GET /metrics, without a client library or an
+external service.
+
+Every sample carries a worker="<pid>" label. With several uvicorn
+workers, set metrics_multiprocess_dir to a directory shared by them:
+each worker then publishes a snapshot of its metrics there every
+metrics_publish_seconds, and whichever worker answers a scrape renders
+all live workers' snapshots, so one scrape sees every process.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.tracing import Histogram, route_template
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+
+def worker_id() -> str:
+    # Read per call: with a preloading master the module is imported before fork
+    return str(os.getpid())
+
+
+class Metric:
+    """A metric family: a name, a type and samples keyed by label values"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, values: tuple) -> dict:
+        return dict(zip(self.labelnames, values))
+
+    def collect(self) -> dict:
+        return {"name": self.name, "type": self.type, "help": self.help, "samples": self.samples()}
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[self.name + "_total", self._labels(k), v] for k, v in self._values.items()]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self) -> list:
+        with self._lock:
+            return [[self.name, self._labels(k), v] for k, v in self._values.items()]
+
+
+class LabeledHistogram(Metric):
+    """Histogram per label combination (values in seconds)"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            histogram = self._values.get(labels)
+            if histogram is None:
+                histogram = self._values[labels] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def samples(self) -> list:
+        samples = []
+        with self._lock:
+            for key, histogram in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), histogram.counts):
+                    cumulative += count
+                    samples.append([self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative])
+                samples.append([self.name + "_sum", labels, histogram.total])
+                samples.append([self.name + "_count", labels, histogram.count])
+        return samples
+
+
+class Registry:
+    """Metrics of this worker, plus collectors computed at scrape time"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], List[dict]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[dict]]):
+        """collector() returns families as {"name", "type", "help", "samples"}"""
+        self._collectors.append(collector)
+
+    def collect(self) -> List[dict]:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.warning("Metrics collector failed: %r", e)
+        return families
+
+
+registry = Registry()
+
+http_request_duration = registry.register(LabeledHistogram(
+    "medguard_http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+http_requests = registry.register(Counter(
+    "medguard_http_requests", "HTTP requests by route and status", ("method", "route", "status")
+))
+verdicts = registry.register(Counter(
+    "medguard_verdicts", "Public verification verdicts by input type", ("input_type", "verdict")
+))
+# Degraded rate: medguard_verifications_degraded / medguard_verdicts per input type
+verifications_degraded = registry.register(Counter(
+    "medguard_verifications_degraded", "Verdicts given without some of their signals, by input type", ("input_type",)
+))
+verification_signals_skipped = registry.register(Counter(
+    "medguard_verification_signals_skipped", "Signals left out of a verdict", ("input_type", "signal", "reason")
+))
+mongo_command_duration = registry.register(LabeledHistogram(
+    "medguard_mongo_command_duration_seconds", "MongoDB command latency", ("command",)
+))
+mongo_command_failures = registry.register(Counter(
+    "medguard_mongo_command_failures", "Failed MongoDB commands", ("command",)
+))
+event_loop_lag = registry.register(Gauge(
+    "medguard_event_loop_lag_seconds", "Latest event loop scheduling delay"
+))
+event_loop_lag_histogram = registry.register(LabeledHistogram(
+    "medguard_event_loop_lag_distribution_seconds", "Event loop scheduling delay"
+))
+
+
+def record_verdict(input_type: str, verdict: str, skipped_signals: Optional[Dict[str, str]] = None):
+    """Count a verdict; skipped_signals is {signal: reason} of signals it went without"""
+    verdicts.inc(input_type, verdict)
+    if skipped_signals:
+        verifications_degraded.inc(input_type)
+        for signal, reason in skipped_signals.items():
+            verification_signals_skipped.inc(input_type, signal, reason)
+
+
+def family(name: str, type: str, help: str, values: Dict[tuple, float], labelnames=()) -> dict:
+    """Counter or gauge family for a collector, from {label values: value}"""
+    sample_name = name + "_total" if type == "counter" else name
+    return {
+        "name": name,
+        "type": type,
+        "help": help,
+        "samples": [[sample_name, dict(zip(labelnames, k)), v] for k, v in values.items()]
+    }
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(workers: Dict[str, List[dict]]) -> str:
+    """Text exposition of {worker: families}, samples labelled by worker"""
+    merged = {}
+    for worker, families in workers.items():
+        for family in families:
+            entry = merged.setdefault(family["name"], {**family, "samples": []})
+            for name, labels, value in family["samples"]:
+                entry["samples"].append((name, {"worker": worker, **labels}, value))
+
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for sample_name, labels, value in family["samples"]:
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _snapshot_path(directory: str, worker: str) -> str:
+    return os.path.join(directory, f"metrics-{worker}.json")
+
+
+def publish_snapshot(directory: str):
+    """Write this worker's families for other workers to render"""
+    path = _snapshot_path(directory, worker_id())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry.collect(), f)
+    os.replace(tmp, path)
+
+
+def _other_worker_snapshots(directory: str, max_age: float) -> Dict[str, List[dict]]:
+    workers = {}
+    now = time.time()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return workers
+    for file_name in names:
+        if not (file_name.startswith("metrics-") and file_name.endswith(".json")):
+            continue
+        worker = file_name[len("metrics-"):-len(".json")]
+        path = os.path.join(directory, file_name)
+        if worker == worker_id():
+            continue
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                # Worker gone: drop its series
+                os.remove(path)
+                continue
+            with open(path) as f:
+                workers[worker] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return workers
+
+
+def exposition(directory: Optional[str] = None) -> str:
+    """Metrics of this worker, plus live workers' snapshots in multiprocess mode"""
+    directory = directory if directory is not None else settings.metrics_multiprocess_dir
+    workers = {worker_id(): registry.collect()}
+    if directory:
+        workers.update(_other_worker_snapshots(directory, 3 * settings.metrics_publish_seconds))
+    return render(workers)
+
+
+async def publish_loop():
+    """Publish this worker's snapshot periodically (multiprocess mode)"""
+    directory = settings.metrics_multiprocess_dir
+    os.makedirs(directory, exist_ok=True)
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(publish_snapshot, directory)
+            except OSError as e:
+                logger.warning("Metrics publish failed: %r", e)
+            await asyncio.sleep(settings.metrics_publish_seconds)
+    finally:
+        try:
+            os.remove(_snapshot_path(directory, worker_id()))
+        except OSError:
+            pass
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Measure how late the loop wakes up from a sleep"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        event_loop_lag.set(lag)
+        event_loop_lag_histogram.observe(lag)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and status counts"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope)
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], route)
+            http_requests.inc(scope["method"], route, str(status))
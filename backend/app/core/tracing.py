@@ -0,0 +1,301 @@
+"""
+Request tracing
+
+Lightweight spans for finding out where request time goes. Each request
+gets an id (the incoming X-Request-ID, or a fresh one) held in a
+contextvar; span() and traced() time a block or a function, and every
+finished span is added to the current request's trace and to in-process
+per-span histograms. TracingMiddleware emits the trace as a
+Server-Timing header and one structured log line per request.
+
+Span names are dotted: "verify_batch.db_lookup" for engine phases,
+"mongo.<collection>.<op>" for database calls and "cpu.<stage>" for CPU
+bound work.
+"""
+import asyncio
+import functools
+import logging
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in milliseconds
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Slowest requests kept with their full span breakdown
+SLOW_TRACES_KEPT = 20
+
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_trace_var: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds)"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            if cumulative + c >= rank and c:
+                if i == len(self.buckets):
+                    return self.max
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = min(self.buckets[i], self.max)
+                return lower + (upper - lower) * (rank - cumulative) / c
+            cumulative += c
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "max_ms": round(self.max, 3)
+        }
+
+
+class SpanHistograms:
+    """Per-span-name histograms, plus the slowest request traces"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._slowest = []
+
+    def observe(self, name: str, duration_ms: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(duration_ms)
+
+    def keep_if_slow(self, trace_summary: dict):
+        with self._lock:
+            slowest = self._slowest
+            if len(slowest) >= SLOW_TRACES_KEPT and trace_summary["duration_ms"] <= slowest[-1]["duration_ms"]:
+                return
+            slowest.append(trace_summary)
+            slowest.sort(key=lambda t: t["duration_ms"], reverse=True)
+            del slowest[SLOW_TRACES_KEPT:]
+
+    def snapshot(self) -> dict:
+        """Span histograms ordered by p99, slowest first"""
+        with self._lock:
+            spans = {name: h.snapshot() for name, h in self._histograms.items()}
+            slowest = list(self._slowest)
+        ordered = dict(sorted(spans.items(), key=lambda item: item[1]["p99_ms"], reverse=True))
+        return {"spans": ordered, "slowest_requests": slowest}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._slowest.clear()
+
+
+span_histograms = SpanHistograms()
+
+
+class Trace:
+    """Spans finished while handling one request"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def add(self, name: str, duration_ms: float):
+        # list.append is atomic, so spans from to_thread workers are safe
+        self.spans.append((name, duration_ms))
+
+    def totals(self) -> dict:
+        """{span name: [total ms, count]} in first-finished order"""
+        totals = {}
+        for name, duration_ms in self.spans:
+            entry = totals.setdefault(name, [0.0, 0])
+            entry[0] += duration_ms
+            entry[1] += 1
+        return totals
+
+    def server_timing(self, total_ms: float) -> str:
+        metrics = [f"{name};dur={ms:.2f}" for name, (ms, _) in self.totals().items()]
+        metrics.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(metrics)
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def record_span(name: str, duration_ms: float):
+    """Add a finished span to the histograms and the current trace"""
+    span_histograms.observe(name, duration_ms)
+    trace = _trace_var.get()
+    if trace is not None:
+        trace.add(name, duration_ms)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a span (works around awaits too)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, (time.perf_counter() - started) * 1000)
+
+
+def traced(name: str = None):
+    """Decorator timing every call of a sync or async function as a span"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class PhaseTimer:
+    """
+    Sequential phases of one function, timed without re-indenting it
+
+    phase() ends the running phase and starts the next; close() ends the
+    last one (call it from a finally).
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._name = None
+        self._started = 0.0
+
+    def phase(self, name: str):
+        now = time.perf_counter()
+        if self._name is not None:
+            record_span(self._name, (now - self._started) * 1000)
+        self._name = f"{self.prefix}.{name}"
+        self._started = now
+
+    def close(self):
+        if self._name is not None:
+            record_span(self._name, (time.perf_counter() - self._started) * 1000)
+            self._name = None
+
+
+def route_template(scope) -> str:
+    """
+    Low-cardinality route label for a finished request, e.g. "/supply/{supply_id}"
+
+    Routes of included routers may report their template without the
+    router prefix, so the prefix is taken from the concrete path.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    if not scope.get("path_params"):
+        return scope["path"]
+    template = route.path
+    segments = scope["path"].split("/")
+    return "/".join(segments[:len(segments) - template.count("/")]) + template
+
+
+def _incoming_request_id(scope) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == REQUEST_ID_HEADER:
+            value = value.decode("latin-1")
+            return value if _VALID_REQUEST_ID.match(value) else None
+    return None
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: request id, Server-Timing header, per-request log line
+
+    Server-Timing reflects the spans finished when the response starts;
+    the log line is written once the body is sent and covers all of them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        trace = Trace(request_id)
+        id_token = request_id_var.set(request_id)
+        trace_token = _trace_var.set(trace)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - trace.started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing(total_ms).encode("latin-1")))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            total_ms = (time.perf_counter() - trace.started) * 1000
+            request_id_var.reset(id_token)
+            _trace_var.reset(trace_token)
+            span_histograms.observe("request", total_ms)
+
+            summary = {
+                "request_id": request_id,
+                "method": scope["method"],
+                "route": route_template(scope),
+                "status": status,
+                "duration_ms": round(total_ms, 3),
+                "spans": {name: round(ms, 3) for name, (ms, _) in trace.totals().items()}
+            }
+            span_histograms.keep_if_slow(summary)
+            if settings.trace_log_requests:
+                logger.info("request", extra=summary)
@@ -0,0 +1,72 @@
+"""
+Collection names and the declarative index registry
+
+Every index the application relies on is declared here and created at
+startup by app.db.indexes.ensure_indexes.
+"""
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+SUPPLIES = "supplies"
+MEDICINES = "medicines"
+SUPPLIERS = "suppliers"
+ALERTS = "alerts"
+USERS = "users"
+PUBLIC_SCAN_LOGS = "public_scan_logs"
+SCAN_FREQUENCY = "scan_frequency_buckets"
+
+# Soft-delete filter usable by partial indexes. MongoDB partial filters
+# cannot express {"$ne": True}, so active documents always carry an
+# explicit is_deleted: False (set at intake; documents stored before
+# that are normalized once by scripts/normalize_soft_delete_flags.py).
+ACTIVE = {"is_deleted": False}
+DELETED = {"is_deleted": True}
+# Query filter for active documents, also matching documents of
+# collections where the flag is not normalized (medicines, suppliers)
+NOT_DELETED = {"is_deleted": {"$ne": True}}
+
+INDEXES = {
+    SUPPLIES: [
+        IndexModel([("batch_number", ASCENDING)], name="batch_number"),
+        IndexModel([("supplier_id", ASCENDING)], name="supplier_id"),
+        IndexModel([("expiry_date", ASCENDING)], name="expiry_date"),
+        IndexModel([("compliance_status", ASCENDING)], name="compliance_status"),
+        IndexModel([("fake_status", ASCENDING)], name="fake_status"),
+        IndexModel(
+            [("priority_score", DESCENDING), ("_id", ASCENDING)],
+            name="active_priority_listing",
+            partialFilterExpression=ACTIVE
+        ),
+        IndexModel(
+            [("recommendation", ASCENDING), ("priority_score", DESCENDING), ("_id", ASCENDING)],
+            name="active_recommendation_priority_listing",
+            partialFilterExpression=ACTIVE
+        ),
+        IndexModel(
+            [("deleted_at", DESCENDING)],
+            name="recycle_bin",
+            partialFilterExpression=DELETED
+        ),
+    ],
+    MEDICINES: [
+        IndexModel([("deleted_at", DESCENDING)], name="recycle_bin", partialFilterExpression=DELETED),
+    ],
+    SUPPLIERS: [
+        IndexModel([("deleted_at", DESCENDING)], name="recycle_bin", partialFilterExpression=DELETED),
+    ],
+    PUBLIC_SCAN_LOGS: [
+        IndexModel([("batch_number", ASCENDING), ("timestamp", DESCENDING)], name="batch_number_timestamp"),
+    ],
+    SCAN_FREQUENCY: [
+        # Buckets are looked up by _id; this only expires them
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    ALERTS: [
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    USERS: [
+        IndexModel([("email", ASCENDING)], name="email", unique=True),
+    ],
+}
+
+# Collections whose documents must carry an explicit is_deleted flag
+SOFT_DELETE_COLLECTIONS = [SUPPLIES]
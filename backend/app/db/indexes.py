@@ -0,0 +1,84 @@
+"""
+Index bootstrap and usage report for the registry in app.db.collections
+"""
+import logging
+from datetime import datetime
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.db.mongodb import db
+from app.db.collections import INDEXES, SOFT_DELETE_COLLECTIONS
+
+logger = logging.getLogger(__name__)
+
+
+async def normalize_soft_delete_flags() -> dict:
+    """
+    Give documents without is_deleted an explicit False
+
+    One-off migration (scripts/normalize_soft_delete_flags.py) for
+    documents stored before intake set the flag; the ACTIVE partial
+    indexes do not cover them until it has run.
+    """
+    updated = {}
+    for name in SOFT_DELETE_COLLECTIONS:
+        result = await db[name].update_many(
+            {"is_deleted": {"$exists": False}},
+            {"$set": {"is_deleted": False}}
+        )
+        updated[name] = result.modified_count
+    return updated
+
+
+async def ensure_indexes() -> dict:
+    """
+    Create every registered index
+
+    Idempotent: create_indexes is a no-op for indexes that already exist
+    with the same spec. Failures are reported per collection instead of
+    aborting startup.
+    """
+    results = {"created": {}, "errors": {}}
+
+    for name, models in INDEXES.items():
+        try:
+            results["created"][name] = await db[name].create_indexes(models)
+        except PyMongoError as e:
+            logger.error("Index creation failed for %s: %s", name, e)
+            results["errors"][name] = str(e)
+
+    return results
+
+
+async def index_report() -> dict:
+    """
+    Compare registered indexes with the database
+
+    missing: registered but not present
+    unused: present but never used since the server last started
+    unregistered: present but not in the registry
+    """
+    report = {}
+
+    for name, models in INDEXES.items():
+        registered = {m.document["name"] for m in models}
+        collection = db[name]
+
+        existing = await collection.index_information()
+        stats = {}
+        try:
+            async for row in collection.aggregate([{"$indexStats": {}}]):
+                stats[row["name"]] = {
+                    "ops": row["accesses"]["ops"],
+                    "since": row["accesses"]["since"]
+                }
+        except OperationFailure as e:
+            logger.warning("$indexStats unavailable for %s: %s", name, e)
+
+        report[name] = {
+            "missing": sorted(registered - set(existing)),
+            "unused": sorted(n for n, s in stats.items() if s["ops"] == 0 and n != "_id_"),
+            "unregistered": sorted(set(existing) - registered - {"_id_"}),
+            "usage": stats
+        }
+
+    return {"collections": report, "generated_at": datetime.utcnow()}
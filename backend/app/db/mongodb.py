@@ -1,11 +1,189 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from app.core.config import settings
+from app.core.metrics import mongo_command_duration, mongo_command_failures
+from typing import Optional
+import threading
+
+_client: Optional[AsyncIOMotorClient] = None
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener recording checkout wait times
+
+    Wait time is how long a request waited for a pooled connection; a
+    growing mean or max means mongo_max_pool_size is too small. pymongo
+    calls listeners from its own threads, so updates hold a lock.
+    """
+
+    BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.wait_buckets = [0] * (len(self.BUCKETS_MS) + 1)
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.checked_out = 0
+
+    def _observe(self, duration):
+        """Record one checkout wait; the caller holds the lock"""
+        if duration is None:
+            return
+        wait_ms = duration * 1000.0
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if wait_ms <= bound:
+                self.wait_buckets[i] += 1
+                break
+        else:
+            self.wait_buckets[-1] += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self._observe(getattr(event, "duration", None))
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            self._observe(getattr(event, "duration", None))
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def snapshot(self) -> dict:
+        labels = [f"<={b}ms" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checked_out": self.checked_out,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "mean_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "wait_histogram": dict(zip(labels, self.wait_buckets))
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Command listener feeding the MongoDB latency metrics of /metrics"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+        mongo_command_failures.inc(event.command_name)
+
+
+command_metrics = CommandMetrics()
+
+
+def client_options() -> dict:
+    """Motor client keyword arguments built from Settings."""
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+        "event_listeners": [pool_metrics, command_metrics],
+    }
+    if settings.mongo_max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.mongo_max_idle_time_ms
+    if settings.mongo_wait_queue_timeout_ms is not None:
+        options["waitQueueTimeoutMS"] = settings.mongo_wait_queue_timeout_ms
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    if settings.mongo_write_concern:
+        w = settings.mongo_write_concern
+        options["w"] = int(w) if w.isdigit() else w
+    return options
+
+
+def connect() -> AsyncIOMotorClient:
+    """Create the client if needed. Called from the app lifespan."""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(settings.mongo_url, **client_options())
+    return _client
+
+
+def close():
+    """Close the client and its pool. Called on app shutdown."""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    return connect()
+
+
+class _DatabaseProxy:
+    """
+    Resolves to the current client's database on every access
+
+    Modules keep importing `db` at import time while the client itself is
+    created in the app lifespan (or lazily by scripts).
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_client()[settings.database_name], name)
+
+    def __getitem__(self, name):
+        return get_client()[settings.database_name][name]
+
+
+class _CollectionProxy:
+    """Collection handle that resolves through the current client"""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_client()[settings.database_name][self._name], attr)
+
+
+db = _DatabaseProxy()
 
-client = AsyncIOMotorClient(settings.mongo_url)
-db = client[settings.database_name]
 
 def get_collection(collection_name: str):
     """
     Get a MongoDB collection by name.
     """
-    return db[collection_name]
+    return _CollectionProxy(collection_name)
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api.routes import auth_routes
 from app.api.routes.supplier_routes import router as supplier_router
 from app.api.routes.medicine_routes import router as medicine_router
@@ -13,8 +14,53 @@ from app.api.routes.predictive_routes import router as predictive_router
 from app.api.routes.map_routes import router as map_router
 from app.api.routes.scan_routes import router as scan_router
 from app.api.routes.public_verify_routes import router as public_verify_router
+from app.api.routes.monitoring_routes import router as monitoring_router
+from app.api.routes.metrics_routes import router as metrics_router
+from app.core.config import settings
+from app.core.lazy import warm_up, warmup_state
+from app.core.log import setup_logging, shutdown_logging
+from app.core.metrics import MetricsMiddleware, monitor_event_loop_lag, publish_loop
+from app.core.tracing import TracingMiddleware
+from app.db import mongodb
+from app.db.indexes import ensure_indexes
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
 
-app = FastAPI(title="MedGuard AI Backend")
+logger = logging.getLogger(__name__)
+
+background_tasks = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    mongodb.connect()
+
+    # Build indexes in the background so startup is not blocked
+    startup_tasks = [ensure_indexes(), monitor_event_loop_lag()]
+    # Load cv2 / pyzbar / sklearn off the request path
+    if settings.warmup_heavy_imports:
+        startup_tasks.append(warm_up())
+    # Share this worker's metrics with the others
+    if settings.metrics_multiprocess_dir:
+        startup_tasks.append(publish_loop())
+    for coro in startup_tasks:
+        task = asyncio.create_task(coro)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+    warmup_state.ready_at = time.time()
+    yield
+
+    for task in list(background_tasks):
+        task.cancel()
+    mongodb.close()
+    shutdown_logging()
+
+
+app = FastAPI(title="MedGuard AI Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,13 +68,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
+app.add_middleware(MetricsMiddleware)
+# Outermost, so the request id and timings cover CORS handling too
+app.add_middleware(TracingMiddleware)
 app.include_router(supplier_router, prefix="/supplier", tags=["Supplier"])
 
 @app.get("/")
 async def root():
     return {"message": "MedGuard Backend Running"}
 
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once startup finished and MongoDB answers a ping, else 503."""
+    mongo_ok = False
+    if warmup_state.ready_at is not None:
+        try:
+            await asyncio.wait_for(mongodb.get_client().admin.command("ping"), timeout=2)
+            mongo_ok = True
+        except Exception as e:
+            logger.warning("Readiness ping failed: %r", e)
+
+    is_ready = warmup_state.ready_at is not None and mongo_ok
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "status": "ready" if is_ready else "starting",
+            "mongo": mongo_ok,
+            "startup_seconds": round(warmup_state.ready_at - warmup_state.started_at, 3) if warmup_state.ready_at else None,
+            "warmup": warmup_state.snapshot()
+        }
+    )
+
 app.include_router(auth_routes.router, prefix="/auth", tags=["Auth"])
 app.include_router(medicine_router, prefix="/medicine", tags=["Medicine"])
 app.include_router(supply_router, prefix="/supply", tags=["Supply"])
@@ -41,3 +114,5 @@ app.include_router(predictive_router, prefix="/predictive", tags=["Predictive"])
 app.include_router(map_router, prefix="/map", tags=["National Map"])
 app.include_router(scan_router, prefix="/scan", tags=["Medicine Scan"])
 app.include_router(public_verify_router, prefix="/public", tags=["Public Verification"])
+app.include_router(monitoring_router, prefix="/monitoring", tags=["Monitoring"])
+app.include_router(metrics_router, tags=["Monitoring"])
@@ -41,6 +41,16 @@ class PublicVerificationRequest(BaseModel):
     barcode_data: Optional[str] = None
     device_id: Optional[str] = None
 
+class BatchVerificationItem(BaseModel):
+    """One batch number of a bulk verification request"""
+    batch_number: str
+    manufacturer: Optional[str] = None
+
+class BatchVerificationManyRequest(BaseModel):
+    """Request model for bulk batch verification"""
+    items: List[BatchVerificationItem]
+    device_id: Optional[str] = None
+
 class PublicVerificationResponse(BaseModel):
     """Response model for public verification"""
     verdict: str
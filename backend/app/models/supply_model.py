@@ -15,6 +15,9 @@ class Supply(BaseModel):
     compliance_status: str = "PENDING"
     risk_flags: list[str] = []
 
+    priority_score: Optional[int] = None
+    recommendation: Optional[str] = None
+
     is_deleted: bool = False
     deleted_at: Optional[datetime] = None
 
@@ -15,7 +15,14 @@ class Supply(SupplyIntake):
     compliance_status: Optional[str] = None
     risk_flags: Optional[List[str]] = None
     fake_status: Optional[str] = None
+    priority_score: Optional[int] = None
+    recommendation: Optional[str] = None
     created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+class SupplyStatusUpdate(BaseModel):
+    compliance_status: Optional[str] = None
+    fake_status: Optional[str] = None
+    risk_flags: Optional[List[str]] = None
@@ -1,6 +1,5 @@
 from app.db.mongodb import db
 from app.ai.anomaly_detection import train_anomaly_model, detect_anomaly
-import numpy as np
 
 
 async def run_anomaly_detection():
@@ -22,6 +21,7 @@ async def run_anomaly_detection():
         return {"message": "Not enough data for training", "anomalies": []}
 
     # Train the model
+    import numpy as np
     train_anomaly_model(np.array(data))
 
     # Detect anomalies
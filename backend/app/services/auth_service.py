@@ -1,7 +1,17 @@
+import hashlib
+import logging
+
 from app.db.mongodb import db
 from app.core.security import hash_password, verify_password
 from app.core.jwt_handler import create_access_token
 
+logger = logging.getLogger(__name__)
+
+
+def _email_ref(email: str) -> str:
+    """Stable pseudonymous id for an email in log lines"""
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:16]
+
 
 async def signup_user(user):
     user_dict = user.dict()
@@ -13,22 +23,22 @@ async def signup_user(user):
 
 async def login_user(user):
     try:
-        print(f"Attempting login for: {user.email}")
+        email_ref = _email_ref(user.email)
+        logger.debug("Attempting login for %s", email_ref)
         db_user = await db.users.find_one({"email": user.email})
         if not db_user:
-            print("User not found in DB")
+            logger.info("Login failed: user not found", extra={"email_sha256": email_ref})
             return None
 
         # Support both 'hashed_password' (new) and 'password' (old/Node) fields
         stored_password = db_user.get("hashed_password") or db_user.get("password")
         
         if not stored_password:
-            print("No password hash found for user")
-            print(f"User keys: {db_user.keys()}")
+            logger.warning("Login failed: no password hash stored", extra={"email_sha256": email_ref})
             return None
 
         if not verify_password(user.password, stored_password):
-            print("Password verification failed")
+            logger.info("Login failed: wrong password", extra={"email_sha256": email_ref})
             return None
 
         token = create_access_token({
@@ -36,10 +46,8 @@ async def login_user(user):
             "role": db_user.get("role", "user")
         })
         
-        print("Login successful, token generated")
+        logger.debug("Login successful for %s", email_ref)
         return {"access_token": token}
     except Exception as e:
-        print(f"Login error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Login error: %s", e)
         return None
@@ -2,94 +2,352 @@
 Barcode Service Module
 Handles QR code and barcode decoding for public verification
 """
-import cv2
-import numpy as np
-try:
-    from pyzbar import pyzbar
-    PYZBAR_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: pyzbar not available - {e}")
-    PYZBAR_AVAILABLE = False
-from PIL import Image
-import io
+import asyncio
+import contextvars
+import logging
+import os
 import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+from app.core.config import settings
+from app.core.lazy import lazy_import
+from app.core.tracing import span
+from app.services.content_cache import barcode_cache, content_key
 
-async def decode_barcode_from_bytes(image_data: bytes) -> dict:
+# Imported on first use (see app.core.lazy)
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+pyzbar = lazy_import("pyzbar.pyzbar")
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def pyzbar_available() -> bool:
+    """Whether pyzbar and the zbar shared library can be loaded"""
+    try:
+        pyzbar.decode
+        return True
+    except Exception as e:
+        logger.warning("pyzbar not available - %s", e)
+        return False
+
+
+# Longest side of the working image used for the first decode attempt
+WORKING_MAX_SIDE = 1280
+# Candidate regions tried at full resolution after a failed working decode
+ROI_MAX_CANDIDATES = 4
+ROI_PADDING = 0.15
+ROI_MIN_AREA_RATIO = 0.002
+ROI_MAX_AREA_RATIO = 0.5
+# Text lines are long and thin; barcodes and QR codes are not
+ROI_MAX_ASPECT = 6.0
+
+# Decode failures that depend only on the image bytes
+CACHEABLE_DECODE_ERRORS = ("No barcode detected in image", "Invalid image format")
+
+
+def _threshold_variants(gray, adaptive: bool = False):
+    """Preprocessing variants tried on one image, in order"""
+    yield "gray", gray
+    yield "otsu", cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+    if adaptive:
+        yield "adaptive", cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+        )
+
+
+def _downscale(gray, max_side: int):
+    """Resize so the longest side is at most max_side. Returns (image, scale)"""
+    height, width = gray.shape[:2]
+    longest = max(height, width)
+    if longest <= max_side:
+        return gray, 1.0
+    scale = max_side / longest
+    small = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def find_barcode_regions(gray, max_candidates: int = ROI_MAX_CANDIDATES) -> list:
     """
-    Decode QR code or barcode from image bytes
-    
-    Returns:
-        dict with 'success', 'data', 'type', 'error'
+    Locate likely barcode/QR regions with gradient + morphology
+
+    Barcodes are dense in strong gradients, so closing the gradient
+    magnitude map merges bars/modules into solid blobs. Returns up to
+    max_candidates (x, y, w, h) boxes, largest first.
     """
-    if not PYZBAR_AVAILABLE:
-        return {
-            "success": False,
-            "error": "Barcode decoder not available",
-            "data": None,
-            "type": None
-        }
-    
-    try:
-        # Convert bytes to numpy array
-        nparr = np.frombuffer(image_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
+    smooth = cv2.GaussianBlur(gray, (5, 5), 0)
+    grad_x = cv2.Sobel(smooth, cv2.CV_32F, 1, 0, ksize=-1)
+    grad_y = cv2.Sobel(smooth, cv2.CV_32F, 0, 1, ksize=-1)
+    gradient = cv2.convertScaleAbs(np.abs(grad_x) + np.abs(grad_y))
+
+    blurred = cv2.blur(gradient, (9, 9))
+    _, binary = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (21, 21))
+    closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    closed = cv2.erode(closed, None, iterations=4)
+    closed = cv2.dilate(closed, None, iterations=4)
+
+    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    image_area = gray.shape[0] * gray.shape[1]
+    min_area = ROI_MIN_AREA_RATIO * image_area
+    max_area = ROI_MAX_AREA_RATIO * image_area
+
+    boxes = [cv2.boundingRect(c) for c in contours]
+    boxes = [
+        b for b in boxes
+        if min_area <= b[2] * b[3] <= max_area
+        and max(b[2], b[3]) <= ROI_MAX_ASPECT * min(b[2], b[3])
+    ]
+    boxes.sort(key=lambda b: b[2] * b[3], reverse=True)
+    return boxes[:max_candidates]
+
+
+def _roi_crops(gray, boxes: list, scale: float):
+    """Map working-resolution boxes to padded full-resolution crops"""
+    height, width = gray.shape[:2]
+    for x, y, w, h in boxes:
+        pad_x, pad_y = w * ROI_PADDING, h * ROI_PADDING
+        x0 = max(0, int((x - pad_x) / scale))
+        y0 = max(0, int((y - pad_y) / scale))
+        x1 = min(width, int((x + w + pad_x) / scale))
+        y1 = min(height, int((y + h + pad_y) / scale))
+        if x1 > x0 and y1 > y0:
+            yield gray[y0:y1, x0:x1]
+
+
+def _decode_attempts(gray):
+    """
+    Multi-resolution decode strategy, as (stage, image) attempts in order
+
+    1. working: decode a downscaled copy (longest side <= WORKING_MAX_SIDE)
+    2. roi: crop candidate regions from the full-resolution image
+    3. full: the original full-resolution variants as a last resort
+
+    Attempts are produced lazily, so regions are only located once the
+    working stage has failed.
+    """
+    working, scale = _downscale(gray, WORKING_MAX_SIDE)
+
+    if scale == 1.0:
+        # Small image: working resolution is full resolution
+        for variant, processed in _threshold_variants(gray, adaptive=True):
+            yield f"full:{variant}", processed
+        return
+
+    for variant, processed in _threshold_variants(working):
+        yield f"working:{variant}", processed
+
+    for crop in _roi_crops(gray, find_barcode_regions(working), scale):
+        for variant, processed in _threshold_variants(crop):
+            yield f"roi:{variant}", processed
+
+    for variant, processed in _threshold_variants(gray, adaptive=True):
+        yield f"full:{variant}", processed
+
+
+def decode_multiresolution(gray, on_attempt=None) -> tuple:
+    """
+    Decode with the multi-resolution strategy (see _decode_attempts)
+
+    Stops at the first attempt that finds any symbol. on_attempt, if
+    given, is called with (stage, success) for every attempt.
+    Returns (decoded_objects, stage).
+    """
+    for stage, processed in _decode_attempts(gray):
+        decoded = pyzbar.decode(processed)
+        if on_attempt is not None:
+            on_attempt(stage, bool(decoded))
+        if decoded:
+            return decoded, stage
+    return [], None
+
+
+def _symbols(decoded_objects) -> list:
+    """All distinct symbols of a pyzbar result, in detection order"""
+    symbols = []
+    seen = set()
+    for obj in decoded_objects:
+        data = obj.data.decode('utf-8', errors='replace')
+        key = (obj.type, data)
+        if key in seen:
+            continue
+        seen.add(key)
+        symbols.append({"data": data, "type": obj.type})
+    return symbols
+
+
+class BarcodeDecoder:
+    """
+    Shared barcode/QR decoder for every scan endpoint
+
+    Decoding is CPU bound, so it runs on a dedicated bounded thread pool
+    instead of the event loop; at most max_pending decodes are queued or
+    running at once and further callers wait for a slot. Keeps per-stage
+    attempt/success counters for tuning the preprocessing variants.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None):
+        self.max_workers = max_workers or settings.barcode_decode_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or settings.barcode_decode_max_pending
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.attempts = Counter()
+        self.successes = Counter()
+        self.decodes = 0
+        self.failures = 0
+        # Decodes queued for or running on the pool
+        self.pending = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="barcode-decode"
+            )
+        return self._executor
+
+    def _record_attempt(self, stage: str, success: bool):
+        with self._lock:
+            self.attempts[stage] += 1
+            if success:
+                self.successes[stage] += 1
+
+    def decode_gray(self, gray) -> tuple:
+        """Decode a grayscale image in the calling thread. Returns (symbols, stage)"""
+        decoded, stage = decode_multiresolution(gray, on_attempt=self._record_attempt)
+        with self._lock:
+            self.decodes += 1
+            if not decoded:
+                self.failures += 1
+        return _symbols(decoded), stage
+
+    def decode_bytes(self, image_data: bytes) -> dict:
+        """
+        Decode every symbol in encoded image bytes (blocking)
+
+        Returns dict with 'success', 'data' and 'type' of the first symbol,
+        'symbols' (all symbols), 'error', 'stage' and 'decode_ms'
+        """
+        if not pyzbar_available():
             return {
                 "success": False,
-                "error": "Invalid image format",
+                "error": "Barcode decoder not available",
                 "data": None,
-                "type": None
+                "type": None,
+                "symbols": []
             }
-        
-        # Preprocess image for better detection
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Try multiple preprocessing techniques
-        images_to_try = [
-            gray,
-            cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1],
-            cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        ]
-        
-        decoded_objects = []
-        for processed_img in images_to_try:
-            decoded = pyzbar.decode(processed_img)
-            if decoded:
-                decoded_objects = decoded
-                break
-        
-        if not decoded_objects:
+
+        started = time.perf_counter()
+        try:
+            nparr = np.frombuffer(image_data, np.uint8)
+            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+            if img is None:
+                return {
+                    "success": False,
+                    "error": "Invalid image format",
+                    "data": None,
+                    "type": None,
+                    "symbols": []
+                }
+
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            symbols, stage = self.decode_gray(gray)
+            decode_ms = round((time.perf_counter() - started) * 1000, 2)
+
+            if not symbols:
+                return {
+                    "success": False,
+                    "error": "No barcode detected in image",
+                    "data": None,
+                    "type": None,
+                    "symbols": [],
+                    "stage": None,
+                    "decode_ms": decode_ms
+                }
+
+            return {
+                "success": True,
+                "data": symbols[0]["data"],
+                "type": symbols[0]["type"],
+                "symbols": symbols,
+                "error": None,
+                "stage": stage,
+                "decode_ms": decode_ms
+            }
+
+        except Exception as e:
             return {
                 "success": False,
-                "error": "No barcode detected in image",
+                "error": f"Barcode decode error: {str(e)}",
                 "data": None,
-                "type": None
+                "type": None,
+                "symbols": []
             }
-        
-        # Get first barcode
-        barcode_obj = decoded_objects[0]
-        barcode_data = barcode_obj.data.decode('utf-8')
-        barcode_type = barcode_obj.type
-        
-        return {
-            "success": True,
-            "data": barcode_data,
-            "type": barcode_type,
-            "error": None
-        }
-        
-    except Exception as e:
-        return {
-            "success": False,
-            "error": f"Barcode decode error: {str(e)}",
-            "data": None,
-            "type": None
-        }
+
+    async def decode(self, image_data: bytes) -> dict:
+        """Decode image bytes on the worker pool (see decode_bytes)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        self.pending += 1
+        try:
+            with span("barcode.slot_wait"):
+                await self._slots.acquire()
+            try:
+                loop = asyncio.get_running_loop()
+                with span("cpu.barcode_decode"):
+                    # Carry the request's trace and id into the worker thread
+                    context = contextvars.copy_context()
+                    return await loop.run_in_executor(self.executor, context.run, self.decode_bytes, image_data)
+            finally:
+                self._slots.release()
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        """Per-stage attempt and success counters"""
+        with self._lock:
+            stages = {
+                stage: {
+                    "attempts": attempts,
+                    "successes": self.successes[stage],
+                    "success_rate": round(self.successes[stage] / attempts, 4)
+                }
+                for stage, attempts in sorted(self.attempts.items())
+            }
+            return {
+                "decodes": self.decodes,
+                "failures": self.failures,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "stages": stages
+            }
+
+
+barcode_decoder = BarcodeDecoder()
+
+
+async def decode_barcode_from_bytes(image_data: bytes) -> dict:
+    """
+    Decode QR code or barcode from image bytes
+    
+    Returns:
+        dict with 'success', 'data', 'type', 'error', plus every decoded
+        'symbols', the decode 'stage' that succeeded and 'decode_ms'
+    """
+    return await barcode_decoder.decode(image_data)
 
 
-def parse_barcode_intelligently(barcode_string: str) -> dict:
+def parse_barcode_intelligently(barcode_string: str, pipe_only: bool = False) -> dict:
     """
     Intelligently parse barcode string to extract medicine info
     
@@ -98,6 +356,9 @@ def parse_barcode_intelligently(barcode_string: str) -> dict:
     - BATCH_MANUFACTURER_PRODUCT
     - Just BATCH
     - EAN/UPC codes
+
+    With pipe_only, only the first format is split; anything else
+    (including dashed or numeric batches) is taken as the batch number.
     """
     result = {
         "batch_number": None,
@@ -115,6 +376,11 @@ def parse_barcode_intelligently(barcode_string: str) -> dict:
             result["product_code"] = parts[2].strip() if len(parts) > 2 else None
             result["format"] = "pipe_separated"
             return result
+
+        if pipe_only:
+            result["batch_number"] = barcode_string.strip()
+            result["format"] = "simple_batch"
+            return result
         
         # Format 2: Underscore-separated
         if '_' in barcode_string and len(barcode_string.split('_')) >= 2:
@@ -146,7 +412,7 @@ def parse_barcode_intelligently(barcode_string: str) -> dict:
         return result
         
     except Exception as e:
-        print(f"Barcode parse error: {e}")
+        logger.warning("Barcode parse error: %s", e)
         result["batch_number"] = barcode_string
         result["format"] = "raw"
         return result
@@ -211,18 +477,30 @@ async def extract_medicine_info_from_barcode(image_bytes: bytes) -> dict:
     """
     Complete barcode extraction pipeline
     
-    Returns all extracted information and quality signals
+    Returns all extracted information and quality signals. Results are
+    cached by content hash, so a re-submitted photo is not decoded again.
     """
+    key = content_key(image_bytes)
+    cached = await barcode_cache.get(key)
+    if cached is not None:
+        cached["cache_hit"] = True
+        return cached
+
     # Step 1: Decode barcode
     decode_result = await decode_barcode_from_bytes(image_bytes)
     
     if not decode_result["success"]:
-        return {
+        result = {
             "success": False,
             "error": decode_result["error"],
             "extracted_data": None,
-            "quality_signals": []
+            "quality_signals": [],
+            "cache_hit": False
         }
+        # Decoder outages and exceptions are not properties of the image
+        if decode_result["error"] in CACHEABLE_DECODE_ERRORS:
+            await barcode_cache.put(key, result)
+        return result
     
     # Step 2: Parse barcode data
     parsed_data = parse_barcode_intelligently(decode_result["data"])
@@ -233,7 +511,7 @@ async def extract_medicine_info_from_barcode(image_bytes: bytes) -> dict:
         validation = validate_batch_format(parsed_data["batch_number"])
     
     # Step 4: Compile results
-    return {
+    result = {
         "success": True,
         "barcode_type": decode_result["type"],
         "raw_data": decode_result["data"],
@@ -243,5 +521,11 @@ async def extract_medicine_info_from_barcode(image_bytes: bytes) -> dict:
         "format": parsed_data["format"],
         "validation": validation,
         "quality_signals": validation.get("signals", []),
-        "error": None
+        "decode_stage": decode_result.get("stage"),
+        "decode_ms": decode_result.get("decode_ms"),
+        "symbols": decode_result.get("symbols", []),
+        "error": None,
+        "cache_hit": False
     }
+    await barcode_cache.put(key, result)
+    return result
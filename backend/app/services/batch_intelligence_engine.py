@@ -8,6 +8,8 @@ from datetime import datetime
 from typing import Dict, List, Tuple
 import hashlib
 
+from app.core.tracing import traced
+
 # Known pharmaceutical manufacturer prefixes/patterns (expandable)
 PHARMA_PATTERNS = {
     "BD": {"name": "Beximco", "country": "Bangladesh", "trust": 85},
@@ -61,6 +63,7 @@ class BatchIntelligenceEngine:
         self.suspicious_indicators = SUSPICIOUS_INDICATORS
         self.valid_formats = VALID_FORMATS
     
+    @traced("cpu.batch_intelligence")
     def analyze_batch(self, batch_number: str, manufacturer: str = None) -> Dict:
         """
         Complete intelligent analysis of batch number
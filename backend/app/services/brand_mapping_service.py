@@ -3,6 +3,7 @@ Brand Mapping Service
 Maps medicine brand names to manufacturers
 Enables medicine-name-first verification workflow
 """
+import logging
 from pathlib import Path
 from typing import Dict, List, Optional
 import json
@@ -10,6 +11,8 @@ import json
 # Load medicine brand mapping dataset
 DATA_PATH = Path(__file__).parent.parent / "data" / "medicine_brand_mapping.json"
 
+logger = logging.getLogger(__name__)
+
 def _load_brand_data():
     """Load brand data from JSON file"""
     try:
@@ -17,10 +20,10 @@ def _load_brand_data():
             data = json.load(f).get("medicine_brands", [])
         return data
     except FileNotFoundError:
-        print(f"⚠️ Brand mapping file not found at {DATA_PATH}")
+        logger.warning("Brand mapping file not found at %s", DATA_PATH)
         return []
     except json.JSONDecodeError as e:
-        print(f"❌ Error parsing brand mapping JSON: {e}")
+        logger.error("Error parsing brand mapping JSON: %s", e)
         return []
 
 
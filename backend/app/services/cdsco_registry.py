@@ -0,0 +1,290 @@
+"""
+CDSCO Registry Store
+Compact columnar storage of the CDSCO manufacturer registry
+
+Manufacturer names live in one contiguous UTF-8 blob (plus a lower-cased
+copy used for matching) addressed by offset arrays. Every other field is
+a categorical column of uint16 codes into a small vocabulary. The whole
+registry is one binary image that is either built in memory from the
+JSON dump or memory-mapped from a file written by
+scripts/build_cdsco_registry.py, in which case all worker processes
+share the same page-cache pages.
+
+Binary layout (little-endian):
+    magic (8 bytes) | header length (uint32) | JSON header | sections
+The header records the field order, vocabularies and the offset of each
+section; numeric sections are 8-byte aligned so numpy can view them
+without copying.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+MAGIC = b"CDSCOREG"
+VERSION = 1
+NAME_FIELD = "manufacturer_name"
+# Code of a field that is absent from an entry
+MISSING = 0xFFFF
+# Hash table slot holding no entry
+EMPTY_SLOT = 0
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _hash(name: bytes) -> int:
+    return zlib.crc32(name)
+
+
+def _table_size(n: int) -> int:
+    size = 8
+    while size < 2 * n:
+        size *= 2
+    return size
+
+
+def build_registry_bytes(entries: List[dict]) -> bytes:
+    """Serialize registry entries (dicts with a manufacturer_name) to the binary image"""
+    n = len(entries)
+    fields = []
+    for entry in entries:
+        for key in entry:
+            if key != NAME_FIELD and key not in fields:
+                fields.append(key)
+
+    vocab = {field: [] for field in fields}
+    vocab_index = {field: {} for field in fields}
+    codes = np.full((len(fields), n), MISSING, dtype=np.uint16)
+    for i, entry in enumerate(entries):
+        for f, field in enumerate(fields):
+            if field not in entry:
+                continue
+            value = entry[field]
+            key = json.dumps(value)
+            code = vocab_index[field].get(key)
+            if code is None:
+                code = len(vocab[field])
+                if code >= MISSING:
+                    raise ValueError(f"Too many distinct values for CDSCO field {field}")
+                vocab[field].append(value)
+                vocab_index[field][key] = code
+            codes[f, i] = code
+
+    names = [entry[NAME_FIELD].encode("utf-8") for entry in entries]
+    lowers = [entry[NAME_FIELD].lower().encode("utf-8") for entry in entries]
+    name_offsets = np.zeros(n + 1, dtype=np.uint32)
+    lower_offsets = np.zeros(n + 1, dtype=np.uint32)
+    name_offsets[1:] = np.cumsum([len(b) for b in names], dtype=np.uint64)
+    lower_offsets[1:] = np.cumsum([len(b) for b in lowers], dtype=np.uint64)
+
+    # Open-addressing table: lower-cased name -> first entry index + 1
+    table = np.zeros(_table_size(n), dtype=np.uint32)
+    mask = len(table) - 1
+    for i, lower in enumerate(lowers):
+        slot = _hash(lower) & mask
+        while table[slot] != EMPTY_SLOT:
+            if lowers[table[slot] - 1] == lower:
+                break
+            slot = (slot + 1) & mask
+        else:
+            table[slot] = i + 1
+
+    sections = [
+        ("name_offsets", name_offsets.tobytes()),
+        ("lower_offsets", lower_offsets.tobytes()),
+        ("codes", codes.tobytes()),
+        ("table", table.tobytes()),
+        ("names", b"".join(names)),
+        ("lowers", b"".join(lowers)),
+    ]
+    name_lengths = sorted({len(b) for b in lowers})
+
+    # Section offsets depend on the header length, so size it first
+    header = {"version": VERSION, "count": n, "fields": fields, "vocab": vocab,
+              "name_lengths": name_lengths, "sections": {}}
+    for _ in range(2):
+        offset = _align(len(MAGIC) + 4 + len(json.dumps(header).encode("utf-8")))
+        for name, data in sections:
+            header["sections"][name] = [offset, len(data)]
+            offset = _align(offset + len(data))
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    out = bytearray(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+    for name, data in sections:
+        start, _ = header["sections"][name]
+        out.extend(b"\0" * (start - len(out)))
+        out.extend(data)
+    return bytes(out)
+
+
+def write_registry(entries: List[dict], path: str) -> int:
+    """
+    Write the binary registry atomically (temp file + rename)
+
+    Workers that mapped the previous file keep reading its pages until
+    they reload. Returns the file size.
+    """
+    data = build_registry_bytes(entries)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+class CdscoRegistry:
+    """
+    Read-only view over a binary registry image (bytes or mmap)
+
+    Iterating yields entry dicts built on demand, so code written for the
+    former list of dicts keeps working; hot paths use find() and the
+    categorical helpers instead.
+    """
+
+    def __init__(self, buffer):
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a CDSCO registry file")
+        (header_len,) = struct.unpack_from("<I", buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buffer[start:start + header_len]))
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported CDSCO registry version {header['version']}")
+
+        self._buffer = buffer
+        self.count = header["count"]
+        self.fields = header["fields"]
+        self.vocab = header["vocab"]
+        self.name_lengths = header["name_lengths"]
+        sections = header["sections"]
+
+        def view(name, dtype):
+            offset, size = sections[name]
+            return np.frombuffer(buffer, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset)
+
+        self.name_offsets = view("name_offsets", np.uint32)
+        self.lower_offsets = view("lower_offsets", np.uint32)
+        self.codes = view("codes", np.uint16).reshape(len(self.fields), self.count)
+        self.table = view("table", np.uint32)
+        self._names_start, self._names_size = sections["names"]
+        self._lowers_start, self._lowers_size = sections["lowers"]
+
+    @classmethod
+    def from_entries(cls, entries: List[dict]) -> "CdscoRegistry":
+        return cls(build_registry_bytes(entries))
+
+    @classmethod
+    def open(cls, path: str) -> "CdscoRegistry":
+        """Memory-map a registry file (pages are shared between processes)"""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(self.count):
+            yield self.entry(i)
+
+    def _name_bytes(self, i: int, lower: bool = False) -> bytes:
+        offsets = self.lower_offsets if lower else self.name_offsets
+        base = self._lowers_start if lower else self._names_start
+        return self._buffer[base + int(offsets[i]):base + int(offsets[i + 1])]
+
+    def name(self, i: int) -> str:
+        return bytes(self._name_bytes(i)).decode("utf-8")
+
+    def entry(self, i: int) -> dict:
+        """Materialize entry i as a dict in the original field order"""
+        entry = {NAME_FIELD: self.name(i)}
+        for f, field in enumerate(self.fields):
+            code = self.codes[f, i]
+            if code != MISSING:
+                entry[field] = self.vocab[field][code]
+        return entry
+
+    def _index_of_exact(self, lower: bytes) -> int:
+        """First entry whose lower-cased name equals lower, or -1"""
+        mask = len(self.table) - 1
+        slot = _hash(lower) & mask
+        while True:
+            stored = int(self.table[slot])
+            if stored == EMPTY_SLOT:
+                return -1
+            if bytes(self._name_bytes(stored - 1, lower=True)) == lower:
+                return stored - 1
+            slot = (slot + 1) & mask
+
+    def first_containing(self, query_lower: str) -> int:
+        """First entry whose lower-cased name contains the query, or -1"""
+        query = query_lower.encode("utf-8")
+        # First occurrence in the lower-cased blob, skipping hits that
+        # straddle a name boundary
+        end = self._lowers_start + self._lowers_size
+        pos = self._buffer.find(query, self._lowers_start, end)
+        while pos != -1:
+            rel = pos - self._lowers_start
+            i = int(np.searchsorted(self.lower_offsets, rel, side="right")) - 1
+            if rel + len(query) <= int(self.lower_offsets[i + 1]):
+                return i
+            pos = self._buffer.find(query, pos + 1, end)
+        return -1
+
+    def find(self, query_lower: str) -> int:
+        """
+        First entry matching a lower-cased query, or -1
+
+        Same rule as the former linear scan: the first entry whose
+        lower-cased name equals, contains, or is contained in the query.
+        """
+        best = self.first_containing(query_lower)
+        if best == -1:
+            best = self.count
+
+        # Name inside the query: look up every substring of a registered length
+        query = query_lower.encode("utf-8")
+        for length in self.name_lengths:
+            if length > len(query):
+                break
+            for start in range(len(query) - length + 1):
+                i = self._index_of_exact(query[start:start + length])
+                if 0 <= i < best:
+                    best = i
+
+        return best if best < self.count else -1
+
+    def value_counts(self, field: str) -> Dict:
+        """{value: count} for a categorical field, in first-seen order"""
+        f = self.fields.index(field)
+        counts = np.bincount(self.codes[f][self.codes[f] != MISSING], minlength=len(self.vocab[field]))
+        return {value: int(c) for value, c in zip(self.vocab[field], counts) if c}
+
+    def filter_by(self, field: str, value_lower: str) -> List[dict]:
+        """Entries whose string field equals value_lower, case-insensitively"""
+        if field not in self.fields:
+            return []
+        f = self.fields.index(field)
+        wanted = [c for c, v in enumerate(self.vocab[field]) if isinstance(v, str) and v.lower() == value_lower]
+        if not wanted:
+            return []
+        return [self.entry(int(i)) for i in np.flatnonzero(np.isin(self.codes[f], wanted))]
+
+
+def load_registry(path: str) -> CdscoRegistry:
+    """Open a binary registry file or build one from a JSON dump"""
+    if str(path).endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError("CDSCO registry must be a JSON list")
+        for entry in data:
+            if not isinstance(entry, dict) or not isinstance(entry.get(NAME_FIELD), str):
+                raise ValueError(f"Invalid CDSCO registry entry: {entry!r}")
+        return CdscoRegistry.from_entries(data)
+    return CdscoRegistry.open(path)
@@ -3,19 +3,175 @@ CDSCO Verification Service
 National Central Drugs Standard Control Organisation Registry Verification
 Validates manufacturers against official CDSCO database
 """
-import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Optional
 
-# Load CDSCO dataset once at startup
+from app.core.config import settings
+from app.core.tracing import traced
+from app.services.cdsco_registry import CdscoRegistry, load_registry
+
+logger = logging.getLogger(__name__)
+
+# Load CDSCO dataset once at startup: the binary registry when configured
+# (memory-mapped, shared by all workers), otherwise built from the JSON dump
 DATA_PATH = Path(__file__).parent.parent / "data" / "cdsco_manufacturers.json"
+REGISTRY_PATH = Path(settings.cdsco_registry_path) if settings.cdsco_registry_path else DATA_PATH
 
 try:
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        CDSCO_DATA = json.load(f)
+    CDSCO_DATA = load_registry(REGISTRY_PATH)
+    _data_mtime = os.path.getmtime(REGISTRY_PATH)
 except FileNotFoundError:
-    print(f"Warning: CDSCO data file not found at {DATA_PATH}")
-    CDSCO_DATA = []
+    logger.warning("CDSCO data file not found at %s", REGISTRY_PATH)
+    CDSCO_DATA = CdscoRegistry.from_entries([])
+    _data_mtime = None
+
+_last_reload_check = time.monotonic()
+_reload_lock = threading.Lock()
+
+
+class ManufacturerMatchCache:
+    """
+    LRU memo of verify_manufacturer results by normalized name
+
+    Entries are tagged with the registry generation they were computed
+    from; reload_cdsco_data bumps the generation and clears the cache,
+    so results from a replaced registry are never served.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key: str, result: Dict, generation: int):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "generation": self.generation
+            }
+
+
+match_cache = ManufacturerMatchCache(settings.cdsco_cache_max_entries)
+
+
+def reload_cdsco_data(path: Optional[Path] = None) -> Dict:
+    """
+    Swap in a new registry dump without restarting the worker
+
+    The file is fully parsed and validated before CDSCO_DATA is replaced
+    (a single reference assignment), so lookups see either the old or
+    the new registry, never a partial one. On error the current registry
+    stays in place and the error is raised. Clears the match cache.
+    """
+    global CDSCO_DATA, _data_mtime
+    path = Path(path) if path else REGISTRY_PATH
+
+    with _reload_lock:
+        mtime = os.path.getmtime(path)
+        data = load_registry(path)
+        CDSCO_DATA = data
+        if path == REGISTRY_PATH:
+            _data_mtime = mtime
+        match_cache.invalidate()
+
+    logger.info("CDSCO registry reloaded: %d manufacturers from %s", len(data), path)
+    return {"manufacturers": len(data), "path": str(path), "generation": match_cache.generation}
+
+
+def _reload_if_changed():
+    """Reload when the registry file changed, checking at most every cdsco_reload_check_seconds"""
+    global _last_reload_check
+    interval = settings.cdsco_reload_check_seconds
+    now = time.monotonic()
+    if interval <= 0 or now - _last_reload_check < interval:
+        return
+    _last_reload_check = now
+
+    try:
+        mtime = os.path.getmtime(REGISTRY_PATH)
+    except OSError:
+        return
+    if mtime != _data_mtime:
+        try:
+            reload_cdsco_data()
+        except (OSError, ValueError) as e:
+            logger.error("CDSCO registry reload failed, keeping current data: %s", e)
+
+
+@traced("cpu.cdsco_match")
+def _match_manufacturer(manufacturer_name_lower: str) -> Dict:
+    """Match a normalized manufacturer name against the registry"""
+    registry = CDSCO_DATA
+    index = registry.find(manufacturer_name_lower)
+    if index != -1:
+        entry = registry.entry(index)
+        
+        # Determine confidence modifier based on status
+        status = entry.get("status", "Approved")
+        
+        if status == "Approved":
+            confidence_modifier = +35  # Core signal: Approved manufacturers
+            risk_flag = None
+        elif status == "Provisional":
+            confidence_modifier = +10  # Under review by CDSCO
+            risk_flag = "CDSCO_PROVISIONAL_STATUS"
+        else:
+            confidence_modifier = -30  # Critical: Not in registry
+            risk_flag = "CDSCO_UNAPPROVED_STATUS"
+        
+        return {
+            "cdsco_match": True,
+            "manufacturer_verified": True,
+            "details": entry,
+            "confidence_modifier": confidence_modifier,
+            "risk_flag": risk_flag
+        }
+
+    # No match found in CDSCO registry
+    return {
+        "cdsco_match": False,
+        "manufacturer_verified": False,
+        "details": None,
+        "confidence_modifier": -30,  # Major penalty for manufacturer not in registry
+        "risk_flag": "MANUFACTURER_NOT_IN_CDSCO_REGISTRY"
+    }
 
 
 async def verify_manufacturer(manufacturer_name: str) -> Dict:
@@ -43,46 +199,15 @@ async def verify_manufacturer(manufacturer_name: str) -> Dict:
             "risk_flag": None
         }
 
+    _reload_if_changed()
     manufacturer_name_lower = manufacturer_name.lower().strip()
 
-    # Search through CDSCO registry
-    for entry in CDSCO_DATA:
-        entry_name_lower = entry["manufacturer_name"].lower()
-        
-        # Exact or partial match
-        if (manufacturer_name_lower == entry_name_lower or 
-            manufacturer_name_lower in entry_name_lower or
-            entry_name_lower in manufacturer_name_lower):
-            
-            # Determine confidence modifier based on status
-            status = entry.get("status", "Approved")
-            
-            if status == "Approved":
-                confidence_modifier = +35  # Core signal: Approved manufacturers
-                risk_flag = None
-            elif status == "Provisional":
-                confidence_modifier = +10  # Under review by CDSCO
-                risk_flag = "CDSCO_PROVISIONAL_STATUS"
-            else:
-                confidence_modifier = -30  # Critical: Not in registry
-                risk_flag = "CDSCO_UNAPPROVED_STATUS"
-            
-            return {
-                "cdsco_match": True,
-                "manufacturer_verified": True,
-                "details": entry,
-                "confidence_modifier": confidence_modifier,
-                "risk_flag": risk_flag
-            }
-
-    # No match found in CDSCO registry
-    return {
-        "cdsco_match": False,
-        "manufacturer_verified": False,
-        "details": None,
-        "confidence_modifier": -30,  # Major penalty for manufacturer not in registry
-        "risk_flag": "MANUFACTURER_NOT_IN_CDSCO_REGISTRY"
-    }
+    result = match_cache.get(manufacturer_name_lower)
+    if result is None:
+        generation = match_cache.generation
+        result = _match_manufacturer(manufacturer_name_lower)
+        match_cache.put(manufacturer_name_lower, result, generation)
+    return result
 
 
 async def get_manufacturer_details(manufacturer_name: str) -> Optional[Dict]:
@@ -94,11 +219,9 @@ async def get_manufacturer_details(manufacturer_name: str) -> Optional[Dict]:
     
     manufacturer_name_lower = manufacturer_name.lower().strip()
     
-    for entry in CDSCO_DATA:
-        if manufacturer_name_lower in entry["manufacturer_name"].lower():
-            return entry
-    
-    return None
+    registry = CDSCO_DATA
+    index = registry.first_containing(manufacturer_name_lower)
+    return registry.entry(index) if index != -1 else None
 
 
 async def get_manufacturers_by_state(state: str) -> list:
@@ -109,7 +232,7 @@ async def get_manufacturers_by_state(state: str) -> list:
         return []
     
     state_lower = state.lower().strip()
-    return [m for m in CDSCO_DATA if m["state"].lower() == state_lower]
+    return CDSCO_DATA.filter_by("state", state_lower)
 
 
 async def get_manufacturers_by_category(category: str) -> list:
@@ -121,27 +244,22 @@ async def get_manufacturers_by_category(category: str) -> list:
         return []
     
     category_lower = category.lower().strip()
-    return [m for m in CDSCO_DATA if m["category"].lower() == category_lower]
+    return CDSCO_DATA.filter_by("category", category_lower)
 
 
 async def get_cdsco_statistics() -> Dict:
     """
     Get statistical overview of CDSCO registry
     """
-    total = len(CDSCO_DATA)
-    
-    approved = len([m for m in CDSCO_DATA if m["status"] == "Approved"])
-    provisional = len([m for m in CDSCO_DATA if m["status"] == "Provisional"])
+    registry = CDSCO_DATA
+    total = len(registry)
     
-    categories = {}
-    for m in CDSCO_DATA:
-        cat = m["category"]
-        categories[cat] = categories.get(cat, 0) + 1
+    statuses = registry.value_counts("status") if "status" in registry.fields else {}
+    approved = statuses.get("Approved", 0)
+    provisional = statuses.get("Provisional", 0)
     
-    states = {}
-    for m in CDSCO_DATA:
-        state = m["state"]
-        states[state] = states.get(state, 0) + 1
+    categories = registry.value_counts("category") if "category" in registry.fields else {}
+    states = registry.value_counts("state") if "state" in registry.fields else {}
     
     return {
         "total_manufacturers": total,
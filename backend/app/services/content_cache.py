@@ -0,0 +1,197 @@
+"""
+Content Cache Module
+Content-addressed LRU cache for per-upload results (barcode decode,
+image analysis), so re-submitted photos skip OpenCV entirely
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(data) -> str:
+    """blake2b digest of upload bytes (bytes, bytearray or memoryview)"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def _json_default(value):
+    # numpy scalars and arrays in analysis results
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ContentCache:
+    """
+    Size-bounded LRU keyed by content hash, with optional disk spill
+
+    Entries evicted from memory are written to spill_dir (one JSON file
+    per key) when configured, and promoted back on a later hit. The spill
+    is bounded by spill_max_entries, oldest first. Spill files are read
+    and written in a worker thread, outside the lock. Values are
+    deep-copied in and out so callers can mutate what they get.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        spill_dir: Optional[str] = None,
+        spill_max_entries: int = 0
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.spill_dir = os.path.join(spill_dir, name) if spill_dir and spill_max_entries > 0 else None
+        self.spill_max_entries = spill_max_entries
+        self._entries = OrderedDict()
+        self._spilled = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # Rebuild the spill index oldest first, so restarts keep the bound
+            files = [f for f in os.listdir(self.spill_dir) if f.endswith(".json")]
+            files.sort(key=lambda f: os.path.getmtime(os.path.join(self.spill_dir, f)))
+            for f in files:
+                self._spilled[f[:-5]] = None
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.json")
+
+    def _remove(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._spill_path(key))
+            except OSError:
+                pass
+
+    def _write_spill(self, evicted: list):
+        """Write evicted entries to disk (worker thread)"""
+        written = []
+        for key, value in evicted:
+            path = self._spill_path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, "w") as f:
+                    json.dump(value, f, default=_json_default)
+                os.replace(tmp, path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning("Content cache spill failed (%s): %s", self.name, e)
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                continue
+            written.append(key)
+
+        with self._lock:
+            for key in written:
+                self._spilled[key] = None
+                self._spilled.move_to_end(key)
+            expired = []
+            while len(self._spilled) > self.spill_max_entries:
+                old, _ = self._spilled.popitem(last=False)
+                expired.append(old)
+        self._remove(expired)
+
+    def _read_spill(self, key: str):
+        """Read and remove one spilled entry (worker thread); None if unreadable"""
+        path = self._spill_path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            value = None
+        self._remove([key])
+        return value
+
+    async def get(self, key: str):
+        """Cached value for key, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+            if self.spill_dir is None or key not in self._spilled:
+                self.misses += 1
+                return None
+            # Claimed here, so a concurrent get does not read it again
+            del self._spilled[key]
+
+        value = await asyncio.to_thread(self._read_spill, key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            evicted = self._insert(key, value)
+            value = copy.deepcopy(value)
+        await self._spill(evicted)
+        return value
+
+    async def put(self, key: str, value):
+        value = copy.deepcopy(value)
+        with self._lock:
+            evicted = self._insert(key, value)
+        await self._spill(evicted)
+
+    def _insert(self, key: str, value) -> list:
+        """Insert under the lock; returns the evicted entries to spill"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            evicted.append(self._entries.popitem(last=False))
+        return evicted
+
+    async def _spill(self, evicted: list):
+        if evicted and self.spill_dir:
+            await asyncio.to_thread(self._write_spill, evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            spilled = list(self._spilled)
+            self._spilled.clear()
+        if self.spill_dir:
+            self._remove(spilled)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "spilled_entries": len(self._spilled),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+
+def _make_cache(name: str) -> ContentCache:
+    return ContentCache(
+        name,
+        max_entries=settings.upload_cache_max_entries,
+        spill_dir=settings.upload_cache_spill_dir or None,
+        spill_max_entries=settings.upload_cache_spill_max_entries
+    )
+
+
+# Decoded barcode payloads and image analysis results, by upload hash
+barcode_cache = _make_cache("barcode")
+image_analysis_cache = _make_cache("image_analysis")
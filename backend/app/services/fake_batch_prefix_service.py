@@ -0,0 +1,119 @@
+"""
+Fake Batch Prefix Service
+In-memory index of batch numbers flagged as fake, for prefix lookups
+
+The known-fake check asks whether any active supply marked FAKE or
+SUSPICIOUS has a batch number starting with the same few characters
+(case-insensitively) as the scanned one. Flagged supplies are few, so
+each worker keeps their upper-cased batch numbers in a sorted list and
+answers a prefix query with one bisect, for any prefix length.
+
+The list is reloaded in the background when it is older than
+fake_batch_prefix_refresh_seconds, lookups answering from the previous
+one meanwhile. Writes that change a supply's fake status invalidate it at
+once in the worker that made them, and other workers catch up at their
+next refresh.
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.db.collections import SUPPLIES
+from app.db.mongodb import get_collection
+
+supply_collection = get_collection(SUPPLIES)
+
+logger = logging.getLogger(__name__)
+
+FAKE_STATUSES = ["FAKE", "SUSPICIOUS"]
+
+
+class FakeBatchPrefixIndex:
+    """Sorted upper-cased batch numbers of active supplies flagged as fake"""
+
+    def __init__(self):
+        # None until the first load
+        self._batches: Optional[List[str]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def invalidate(self):
+        """Reload before the next lookup"""
+        self._loaded_at = None
+
+    def _refresh_in_background(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._background_refresh())
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning("Fake batch prefix load failed: %r", e)
+
+    def _is_fresh(self) -> bool:
+        return (self._loaded_at is not None
+                and time.monotonic() - self._loaded_at < settings.fake_batch_prefix_refresh_seconds)
+
+    def load(self, batch_numbers: Iterable[str]):
+        self._batches = sorted({b.upper() for b in batch_numbers if b})
+        self._loaded_at = time.monotonic()
+
+    async def refresh(self):
+        """Reload flagged batch numbers; a failed reload keeps the previous list"""
+        async with self._lock:
+            if self._is_fresh():
+                return
+            try:
+                with span("mongo.supplies.find"):
+                    cursor = supply_collection.find(
+                        {"fake_status": {"$in": FAKE_STATUSES}, "is_deleted": {"$ne": True}},
+                        {"batch_number": 1, "_id": 0}
+                    )
+                    docs = await cursor.to_list(None)
+            except Exception as e:
+                if self._batches is None:
+                    raise
+                logger.warning("Fake batch prefix reload failed, keeping %d entries: %r", len(self._batches), e)
+                return
+            self.load(doc.get("batch_number") for doc in docs)
+
+    def has_prefix(self, prefix: str) -> bool:
+        """Whether any flagged batch number starts with the upper-cased prefix"""
+        i = bisect_left(self._batches, prefix)
+        return i < len(self._batches) and self._batches[i].startswith(prefix)
+
+    async def matches(self, batch_number: str, lengths: Optional[List[int]] = None,
+                      wait: bool = True) -> Optional[bool]:
+        """
+        Whether a flagged batch shares a prefix of any of the given lengths
+
+        A list past its refresh interval still answers while it reloads in
+        the background. Before the first load, or after an invalidation,
+        the lookup waits for the reload; with wait=False it answers from
+        the current list instead, or None (unknown) if none is loaded yet.
+        """
+        if not self._is_fresh():
+            if self._loaded_at is None and wait:
+                await self.refresh()
+            else:
+                self._refresh_in_background()
+        if self._batches is None:
+            return None
+        key = batch_number.upper()
+        lengths = lengths or settings.fake_batch_prefix_lengths
+        return any(self.has_prefix(key[:length]) for length in lengths)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._batches or ()),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None
+        }
+
+
+fake_batch_prefixes = FakeBatchPrefixIndex()
@@ -3,22 +3,98 @@ Image Analysis Service
 Validates medicine images and performs basic packaging analysis
 Placeholder for future CNN model integration
 """
-import cv2
-import numpy as np
-from PIL import Image
+import asyncio
 import io
-from typing import Dict, List
+import threading
+from typing import Dict, List, Union
 
+from app.core.lazy import lazy_import
+from app.core.tracing import span
+from app.services.content_cache import content_key, image_analysis_cache
 
-async def validate_image_quality(image_bytes: bytes) -> dict:
+# Imported on first use (see app.core.lazy)
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+
+class ImageContext:
+    """
+    Decode-once view of an uploaded image
+
+    The BGR decode and derived views (gray, HSV, Canny edges, gray
+    histogram) are computed on first use and shared by every analyzer.
+    Safe to share across the analyzer threads.
+    """
+
+    def __init__(self, image_bytes: bytes):
+        self.image_bytes = image_bytes
+        self._views = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _view(self, name: str, build):
+        if name not in self._views:
+            # One lock per view: views build on each other (gray -> bgr)
+            with self._lock:
+                lock = self._locks.setdefault(name, threading.Lock())
+            with lock:
+                if name not in self._views:
+                    self._views[name] = build()
+        return self._views[name]
+
+    @property
+    def pil_image(self):
+        """PIL handle (header only; pixels are not decoded)"""
+        return self._view("pil", lambda: Image.open(io.BytesIO(self.image_bytes)))
+
+    @property
+    def image(self):
+        """BGR pixels, or None if the bytes are not a decodable image"""
+        return self._view(
+            "bgr",
+            lambda: cv2.imdecode(np.frombuffer(self.image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        )
+
+    @property
+    def gray(self):
+        return self._view("gray", lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def hsv(self):
+        return self._view("hsv", lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV))
+
+    @property
+    def edges(self):
+        return self._view("edges", lambda: cv2.Canny(self.gray, 50, 150))
+
+    @property
+    def gray_histogram(self):
+        return self._view("hist", lambda: cv2.calcHist([self.gray], [0], None, [256], [0, 256]))
+
+    @property
+    def mean_colors(self):
+        return self._view("mean", lambda: cv2.mean(self.image))
+
+
+def _as_context(image: Union[bytes, ImageContext]) -> ImageContext:
+    return image if isinstance(image, ImageContext) else ImageContext(image)
+
+
+async def validate_image_quality(image: Union[bytes, ImageContext]) -> dict:
     """
     Validate image quality for analysis
     
     Checks resolution, clarity, format
     """
+    return _validate_image_quality(_as_context(image))
+
+
+def _validate_image_quality(ctx: ImageContext) -> dict:
     try:
         # Load image
-        image = Image.open(io.BytesIO(image_bytes))
+        image = ctx.pil_image
+        image_bytes = ctx.image_bytes
         width, height = image.size
         
         signals = []
@@ -73,28 +149,26 @@ async def validate_image_quality(image_bytes: bytes) -> dict:
         }
 
 
-async def analyze_image_blur(image_bytes: bytes) -> dict:
+async def analyze_image_blur(image: Union[bytes, ImageContext]) -> dict:
     """
     Detect if image is too blurry for analysis
     
     Uses Laplacian variance method
     """
+    return _analyze_image_blur(_as_context(image))
+
+
+def _analyze_image_blur(ctx: ImageContext) -> dict:
     try:
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
+        if ctx.image is None:
             return {
                 "blurry": True,
                 "blur_score": 0,
                 "signals": ["image_decode_failed"]
             }
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
         # Calculate Laplacian variance
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+        laplacian_var = cv2.Laplacian(ctx.gray, cv2.CV_64F).var()
         
         # Thresholds
         signals = []
@@ -126,18 +200,19 @@ async def analyze_image_blur(image_bytes: bytes) -> dict:
         }
 
 
-async def detect_tampering_indicators(image_bytes: bytes) -> dict:
+async def detect_tampering_indicators(image: Union[bytes, ImageContext]) -> dict:
     """
     Basic tampering detection
     
     Looks for signs of image manipulation
     Placeholder for advanced forensics
     """
+    return _detect_tampering_indicators(_as_context(image))
+
+
+def _detect_tampering_indicators(ctx: ImageContext) -> dict:
     try:
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if img is None:
+        if ctx.image is None:
             return {
                 "tampering_detected": False,
                 "signals": [],
@@ -148,8 +223,7 @@ async def detect_tampering_indicators(image_bytes: bytes) -> dict:
         tampering_score = 0
         
         # Check for extreme contrast (possible filter/edit)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
+        hist = ctx.gray_histogram
         
         # Check histogram distribution
         hist_std = np.std(hist)
@@ -158,13 +232,13 @@ async def detect_tampering_indicators(image_bytes: bytes) -> dict:
             tampering_score += 20
         
         # Check for color anomalies
-        mean_colors = cv2.mean(img)[:3]
+        mean_colors = ctx.mean_colors[:3]
         if max(mean_colors) > 240 or min(mean_colors) < 15:
             signals.append("extreme_color_values")
             tampering_score += 15
         
         # Check for edge artifacts (common in edited images)
-        edges = cv2.Canny(gray, 50, 150)
+        edges = ctx.edges
         edge_density = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
         if edge_density > 0.3:
             signals.append("high_edge_density")
@@ -185,16 +259,18 @@ async def detect_tampering_indicators(image_bytes: bytes) -> dict:
         }
 
 
-async def extract_image_features(image_bytes: bytes) -> dict:
+async def extract_image_features(image: Union[bytes, ImageContext]) -> dict:
     """
     Extract basic features from medicine image
     
     Placeholder for future CNN feature extraction
     """
+    return _extract_image_features(_as_context(image))
+
+
+def _extract_image_features(ctx: ImageContext) -> dict:
     try:
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
+        img = ctx.image
         if img is None:
             return {"success": False, "features": {}}
         
@@ -202,14 +278,13 @@ async def extract_image_features(image_bytes: bytes) -> dict:
         height, width = img.shape[:2]
         
         # Color distribution
-        mean_colors = cv2.mean(img)
+        mean_colors = ctx.mean_colors
         
         # Brightness
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        brightness = np.mean(gray)
+        brightness = np.mean(ctx.gray)
         
         # Dominant colors (simplified)
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        hsv = ctx.hsv
         mean_hue = np.mean(hsv[:, :, 0])
         mean_saturation = np.mean(hsv[:, :, 1])
         
@@ -238,17 +313,28 @@ async def extract_image_features(image_bytes: bytes) -> dict:
         }
 
 
-async def analyze_medicine_image(image_bytes: bytes) -> dict:
+async def analyze_medicine_image(image: Union[bytes, ImageContext]) -> dict:
     """
     Complete image analysis pipeline
     
-    Combines all image analysis techniques
+    Combines all image analysis techniques. The image is decoded once and
+    the analyzers run concurrently in the default thread pool (OpenCV
+    releases the GIL). Results are cached by content hash.
     """
+    ctx = _as_context(image)
+    key = content_key(ctx.image_bytes)
+    cached = await image_analysis_cache.get(key)
+    if cached is not None:
+        return cached
+
     # Run all analyses
-    quality_check = await validate_image_quality(image_bytes)
-    blur_check = await analyze_image_blur(image_bytes)
-    tampering_check = await detect_tampering_indicators(image_bytes)
-    features = await extract_image_features(image_bytes)
+    with span("cpu.image_analysis"):
+        quality_check, blur_check, tampering_check, features = await asyncio.gather(
+            asyncio.to_thread(_validate_image_quality, ctx),
+            asyncio.to_thread(_analyze_image_blur, ctx),
+            asyncio.to_thread(_detect_tampering_indicators, ctx),
+            asyncio.to_thread(_extract_image_features, ctx)
+        )
     
     # Compile signals
     all_signals = []
@@ -272,7 +358,7 @@ async def analyze_medicine_image(image_bytes: bytes) -> dict:
     if quality_check["quality_score"] > 80 and not blur_check["blurry"]:
         confidence_modifier += 10
     
-    return {
+    result = {
         "quality_analysis": quality_check,
         "blur_analysis": blur_check,
         "tampering_analysis": tampering_check,
@@ -281,3 +367,5 @@ async def analyze_medicine_image(image_bytes: bytes) -> dict:
         "confidence_modifier": confidence_modifier,
         "ready_for_cnn": quality_check["valid"] and not blur_check["blurry"]
     }
+    await image_analysis_cache.put(key, result)
+    return result
@@ -1,96 +1,286 @@
 from app.db.mongodb import db
-from datetime import datetime
+from app.db.collections import ACTIVE
+from app.services.priority_vectorized_engine import RECOMMENDATION_LABELS, iter_priority_chunks
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from typing import Optional
 
 
-async def calculate_priority():
-    """Calculate priority scores for all supplies.
-    
+RECOMMENDATIONS = ["EXPIRED", "USE_IMMEDIATELY", "USE_SOON", "NORMAL", "HOLD"]
+
+# Days-to-expiry values at which the expiry factor of the score changes
+PRIORITY_BOUNDARY_DAYS = [0, 7, 30, 60]
+
+PRIORITY_JOB_ID = "priority_refresh"
+
+
+def score_supply(s: dict, now: datetime) -> dict:
+    """Score a single supply document.
+
     Scoring factors:
-    - Expiry close: +50 if <7 days, +30 if <30 days
+    - Expiry close: +50 if <7 days, +30 if <30 days, +15 if <60 days
     - Temperature alert: +20
     - Unverified supplier: +15
+    - Rejected: +25, Pending: +10
     - Fake suspicion: +10
     - Large quantity: +5
-    
+
     Recommendations:
+    - expired: EXPIRED
     - >=70: USE_IMMEDIATELY
     - >=40: USE_SOON
     - >=20: NORMAL
     - <20: HOLD
     """
-    results = []
-
-    async for s in db.supplies.find({"is_deleted": {"$ne": True}}):
-        score = 0
-
-        # Expiry factor
-        expiry = s.get("expiry_date")
-        days_to_expiry = None
-        if expiry:
-            days_left = (expiry - datetime.utcnow()).days
-            days_to_expiry = days_left
-
-            if days_left < 0:
-                # Already expired - mark as expired regardless of other factors
-                score = 100  # High score but marked as expired
-            elif days_left < 7:
-                score += 50
-            elif days_left < 30:
-                score += 30
-            elif days_left < 60:
-                score += 15
-
-        # Risk flags
-        flags = s.get("risk_flags", [])
-        if any("TEMPERATURE" in flag.upper() for flag in flags):
-            score += 20
-        if any("UNVERIFIED" in flag.upper() or "VERIFY" in flag.upper() for flag in flags):
+    score = 0
+
+    # Expiry factor
+    expiry = s.get("expiry_date")
+    days_to_expiry = None
+    if expiry:
+        days_left = (expiry - now).days
+        days_to_expiry = days_left
+
+        if days_left < 0:
+            # Already expired - mark as expired regardless of other factors
+            score = 100  # High score but marked as expired
+        elif days_left < 7:
+            score += 50
+        elif days_left < 30:
+            score += 30
+        elif days_left < 60:
             score += 15
 
-        # Compliance status
-        status = s.get("compliance_status")
-        if status == "REJECTED":
-            score += 25  # High priority to handle rejected items
-        elif status == "PENDING":
-            score += 10
-
-        # Fake suspicion
-        fake_status = s.get("fake_status", "")
-        if fake_status in ["SUSPICIOUS", "FAKE"]:
-            score += 10
-
-        # Quantity impact
-        qty = s.get("quantity", 0)
-        if qty > 500:
-            score += 5
-
-        # Recommendation
-        if days_to_expiry is not None and days_to_expiry < 0:
-            rec = "EXPIRED"
-        elif score >= 70:
-            rec = "USE_IMMEDIATELY"
-        elif score >= 40:
-            rec = "USE_SOON"
-        elif score >= 20:
-            rec = "NORMAL"
-        else:
-            rec = "HOLD"
-
-        # Calculate days to expiry for display
-        results.append({
-            "supply_id": str(s["_id"]),
-            "batch_number": s.get("batch_number", "N/A"),
-            "medicine_id": str(s.get("medicine_id", "")),
-            "quantity": qty,
-            "priority_score": score,
-            "recommendation": rec,
-            "days_to_expiry": days_to_expiry,
-            "risk_flags": flags,
-            "compliance_status": status,
-            "fake_status": fake_status
-        })
-
-    # Sort by priority score (highest first)
-    results.sort(key=lambda x: x["priority_score"], reverse=True)
-
-    return results
+    # Risk flags
+    flags = s.get("risk_flags", [])
+    if any("TEMPERATURE" in flag.upper() for flag in flags):
+        score += 20
+    if any("UNVERIFIED" in flag.upper() or "VERIFY" in flag.upper() for flag in flags):
+        score += 15
+
+    # Compliance status
+    status = s.get("compliance_status")
+    if status == "REJECTED":
+        score += 25  # High priority to handle rejected items
+    elif status == "PENDING":
+        score += 10
+
+    # Fake suspicion
+    fake_status = s.get("fake_status", "")
+    if fake_status in ["SUSPICIOUS", "FAKE"]:
+        score += 10
+
+    # Quantity impact
+    qty = s.get("quantity", 0)
+    if qty > 500:
+        score += 5
+
+    # Recommendation
+    if days_to_expiry is not None and days_to_expiry < 0:
+        rec = "EXPIRED"
+    elif score >= 70:
+        rec = "USE_IMMEDIATELY"
+    elif score >= 40:
+        rec = "USE_SOON"
+    elif score >= 20:
+        rec = "NORMAL"
+    else:
+        rec = "HOLD"
+
+    return {
+        "supply_id": str(s.get("_id", "")),
+        "batch_number": s.get("batch_number", "N/A"),
+        "medicine_id": str(s.get("medicine_id", "")),
+        "quantity": qty,
+        "priority_score": score,
+        "recommendation": rec,
+        "days_to_expiry": days_to_expiry,
+        "risk_flags": flags,
+        "compliance_status": status,
+        "fake_status": fake_status
+    }
+
+
+def priority_fields(s: dict, now: datetime) -> dict:
+    """Stored priority fields for a supply document."""
+    item = score_supply(s, now)
+    return {
+        "priority_score": item["priority_score"],
+        "recommendation": item["recommendation"],
+        "priority_updated_at": now
+    }
+
+
+def _priority_item(s: dict, now: datetime) -> dict:
+    """Build a listing item from a supply with stored priority fields."""
+    expiry = s.get("expiry_date")
+    return {
+        "supply_id": str(s["_id"]),
+        "batch_number": s.get("batch_number", "N/A"),
+        "medicine_id": str(s.get("medicine_id", "")),
+        "quantity": s.get("quantity", 0),
+        "priority_score": s.get("priority_score", 0),
+        "recommendation": s.get("recommendation"),
+        "days_to_expiry": (expiry - now).days if expiry else None,
+        "risk_flags": s.get("risk_flags", []),
+        "compliance_status": s.get("compliance_status"),
+        "fake_status": s.get("fake_status", "")
+    }
+
+
+def _encode_cursor(item: dict) -> str:
+    return f"{item['priority_score']}:{item['supply_id']}"
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        score, supply_id = cursor.split(":", 1)
+        return int(score), ObjectId(supply_id)
+    except (ValueError, InvalidId):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+async def _top_priorities(
+    limit: Optional[int] = None,
+    recommendation: Optional[str] = None,
+    after: Optional[tuple] = None
+) -> list:
+    """List supplies ordered by (priority_score desc, _id asc).
+
+    Reads the stored priority fields through the active_priority_listing
+    partial index, so only `limit` documents are fetched. `after` is a decoded cursor; only items
+    strictly after it are returned.
+    """
+    if recommendation is not None and recommendation not in RECOMMENDATIONS:
+        raise ValueError(f"Unknown recommendation: {recommendation}")
+
+    query = {**ACTIVE, "priority_score": {"$exists": True}}
+    if recommendation is not None:
+        query["recommendation"] = recommendation
+    if after is not None:
+        score, supply_id = after
+        query["$or"] = [
+            {"priority_score": {"$lt": score}},
+            {"priority_score": score, "_id": {"$gt": supply_id}}
+        ]
+
+    cursor = db.supplies.find(query).sort([("priority_score", -1), ("_id", 1)])
+    if limit is not None:
+        cursor = cursor.limit(limit)
+
+    now = datetime.utcnow()
+    return [_priority_item(s, now) async for s in cursor]
+
+
+async def calculate_priority(limit: Optional[int] = None, recommendation: Optional[str] = None):
+    """Calculate priority scores for supplies, highest priority first.
+
+    Args:
+        limit: Only return the top `limit` supplies (bounded memory)
+        recommendation: Only return supplies with this recommendation
+
+    See score_supply for the scoring factors and recommendations.
+    """
+    return await _top_priorities(limit=limit, recommendation=recommendation)
+
+
+async def calculate_priority_page(
+    limit: int = 50,
+    recommendation: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> dict:
+    """Cursor-paginated priority list.
+
+    Returns {"items": [...], "next_cursor": str or None}. Pass next_cursor
+    back to fetch the following page; it is None on the last page.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    items = await _top_priorities(limit=limit + 1, recommendation=recommendation, after=after)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = _encode_cursor(items[-1])
+
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def refresh_supply_priority(supply_id) -> Optional[dict]:
+    """Recompute and store the priority fields of one supply.
+
+    Called whenever a supply's flags or statuses change.
+    """
+    if isinstance(supply_id, str):
+        supply_id = ObjectId(supply_id)
+
+    supply = await db.supplies.find_one({"_id": supply_id})
+    if not supply:
+        return None
+
+    fields = priority_fields(supply, datetime.utcnow())
+    await db.supplies.update_one({"_id": supply_id}, {"$set": fields})
+    return fields
+
+
+async def _store_priorities(query: dict, now: datetime, chunk_size: int) -> int:
+    """Score matching supplies in chunks and bulk-write their priority fields."""
+    updated = 0
+    async for supply_ids, scored in iter_priority_chunks(query=query, chunk_size=chunk_size, now=now):
+        scores = scored["priority_score"].tolist()
+        recs = RECOMMENDATION_LABELS[scored["recommendation"]].tolist()
+        ops = [
+            UpdateOne(
+                {"_id": supply_id},
+                {"$set": {
+                    "priority_score": scores[i],
+                    "recommendation": recs[i],
+                    "priority_updated_at": now
+                }}
+            )
+            for i, supply_id in enumerate(supply_ids)
+        ]
+        if ops:
+            await db.supplies.bulk_write(ops, ordered=False)
+            updated += len(ops)
+    return updated
+
+
+async def refresh_expiry_crossings(since: Optional[datetime] = None, chunk_size: int = 10000) -> dict:
+    """Daily job: recompute supplies whose days-to-expiry crossed a boundary.
+
+    Only the expiry factor changes with time, and only when days-to-expiry
+    crosses 0, 7, 30 or 60. A supply crossed boundary b between `since`
+    and now iff since + b <= expiry_date < now + b, so each boundary is an
+    indexed range query on expiry_date. `since` defaults to the last run.
+    """
+    now = datetime.utcnow()
+    if since is None:
+        state = await db.job_state.find_one({"_id": PRIORITY_JOB_ID})
+        since = state["last_run"] if state else now - timedelta(days=1)
+
+    query = {
+        "is_deleted": {"$ne": True},
+        "$or": [
+            {"expiry_date": {"$gte": since + timedelta(days=b), "$lt": now + timedelta(days=b)}}
+            for b in PRIORITY_BOUNDARY_DAYS
+        ]
+    }
+    updated = await _store_priorities(query, now, chunk_size)
+
+    await db.job_state.update_one(
+        {"_id": PRIORITY_JOB_ID},
+        {"$set": {"last_run": now}},
+        upsert=True
+    )
+
+    return {"updated": updated, "since": since, "until": now}
+
+
+async def backfill_priorities(chunk_size: int = 10000) -> dict:
+    """Store priority fields on supplies that do not have them yet."""
+    now = datetime.utcnow()
+    updated = await _store_priorities({"priority_score": {"$exists": False}}, now, chunk_size)
+    return {"updated": updated}
+
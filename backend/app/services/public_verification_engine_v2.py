@@ -3,32 +3,33 @@ Dynamic Verification Engine - AI-Powered
 Combines database lookup with intelligent batch analysis
 Works even when batch is not in database
 """
+import asyncio
+import logging
+from app.core.metrics import record_verdict
+from app.core.tracing import PhaseTimer, span
+from app.db.collections import PUBLIC_SCAN_LOGS
 from app.db.mongodb import get_collection
 from app.services.batch_intelligence_engine import intelligence_engine
 from app.services.cdsco_verification_service import verify_manufacturer
+from app.services.scan_frequency_service import record_scans
+from app.services.verification_context import NO_SUPPLY, VerificationContext, load_supply_contexts
+from app.services.verification_engine import (
+    batch_engine,
+    image_engine,
+    map_confidence_to_verdict,
+    medicine_name_engine,
+    provider_enabled,
+    verification_deadline
+)
 from datetime import datetime
 from typing import Optional
-from bson import ObjectId
-
-# Collections
-medicines_collection = get_collection("medicines")
-supplies_collection = get_collection("supplies")
-suppliers_collection = get_collection("suppliers")
-scan_log_collection = get_collection("public_scan_logs")
-
-
-def map_confidence_to_verdict(confidence: float) -> str:
-    """Map confidence score to verdict"""
-    if confidence >= 80:
-        return "SAFE"
-    elif confidence >= 60:
-        return "LIKELY_AUTHENTIC"
-    elif confidence >= 40:
-        return "UNKNOWN"
-    elif confidence >= 20:
-        return "SUSPICIOUS"
-    else:
-        return "HIGH_RISK_FAKE"
+
+scan_log_collection = get_collection(PUBLIC_SCAN_LOGS)
+
+logger = logging.getLogger(__name__)
+
+# Scan log writes still running after their verification answered
+background_scan_logs = set()
 
 
 def generate_recommendation(verdict: str, confidence: float, reasoning: list) -> str:
@@ -45,217 +46,114 @@ def generate_recommendation(verdict: str, confidence: float, reasoning: list) ->
         return "🚨 HIGH RISK OF COUNTERFEIT! This batch shows strong fake indicators. DO NOT USE under any circumstances. Report immediately."
 
 
+def degraded_reasoning(assessment) -> list:
+    if not assessment.skipped:
+        return []
+    return [f"ℹ Some checks were unavailable and were skipped: {', '.join(assessment.skipped)}"]
+
+
+async def _count_scans(scan_logs: list):
+    # The hourly scan counters are only read by the scan history signal
+    if provider_enabled("scan_history"):
+        await record_scans(scan_logs)
+
+
+async def _log_scan(scan_log: dict):
+    try:
+        with span("mongo.public_scan_logs.insert_one"):
+            await scan_log_collection.insert_one(scan_log)
+        await _count_scans([scan_log])
+    except Exception as e:
+        logger.warning("Scan logging error (non-critical): %s", e)
+
+
+async def log_scan_within(scan_log: dict, deadline: float):
+    """
+    Log a scan, waiting for the write at most until the deadline
+
+    A slower write is left to finish in the background, so a slow
+    database does not hold the citizen's answer.
+    """
+    task = asyncio.create_task(_log_scan(scan_log))
+    background_scan_logs.add(task)
+    task.add_done_callback(background_scan_logs.discard)
+    remaining = max(0.0, deadline - asyncio.get_running_loop().time())
+    try:
+        await asyncio.wait_for(asyncio.shield(task), remaining)
+    except asyncio.TimeoutError:
+        logger.warning("Scan log write still running at the verification deadline")
+
+
 async def verify_by_batch_number_dynamic(
     batch_number: str,
     manufacturer: Optional[str] = None,
     device_id: Optional[str] = None,
-    ip_address: Optional[str] = None
+    ip_address: Optional[str] = None,
+    supply_context: Optional[tuple] = None,
+    cdsco_result: Optional[dict] = None,
+    scan_logs: Optional[list] = None,
+    image_bytes: Optional[bytes] = None
 ) -> dict:
     """
     Dynamic verification - combines DB + AI intelligence
     ALWAYS provides intelligent analysis, never just "UNKNOWN"
+
+    The verdict is batch_engine's (image_engine's when the package image
+    is given); see app/services/verification_engine.py. Signals that miss
+    their budget or settings.verification_deadline_ms are skipped and
+    listed in analysis_metadata.degraded_signals. The package image is
+    analysed (CPU-bound, cached by content) before the deadline starts.
+
+    Bulk callers can pass pre-fetched inputs: supply_context is a
+    (supply, medicine, supplier) tuple from load_supply_contexts and
+    cdsco_result a verify_manufacturer result. When scan_logs is given
+    the scan log document is appended to it instead of inserted.
     """
+    phases = PhaseTimer("verify_batch")
     try:
-        # ===== PHASE 1: DATABASE LOOKUP =====
-        supply = await supplies_collection.find_one({
-            "batch_number": batch_number,
-            "$or": [
-                {"deleted": {"$exists": False}},
-                {"deleted": False}
-            ]
-        })
-        
+        ctx = VerificationContext(
+            batch_number,
+            manufacturer,
+            image_bytes=image_bytes,
+            supply_context=supply_context,
+            cdsco=cdsco_result
+        )
+        if image_bytes is not None:
+            phases.phase("image_analysis")
+            try:
+                await ctx.get("image_analysis")
+            except Exception:
+                pass  # the image signal re-raises it and is skipped as an error
+        deadline = verification_deadline()
+        
+        # ===== PHASE 1: SIGNALS (DB, CDSCO, AI, SCAN HISTORY) =====
+        phases.phase("signals")
+        engine = image_engine if image_bytes is not None else batch_engine
+        assessment = await engine.assess(ctx, deadline)
+        # A skipped supply lookup is reported as unknown (database_match None),
+        # not as "not registered", even if it finished after the deadline
+        db_skipped = "database" in assessment.skipped
+        supply, db_medicine, db_supplier = NO_SUPPLY if db_skipped else ctx.value("supply_context", NO_SUPPLY)
+        cdsco_result = ctx.value("cdsco", {})
+        ai_analysis = ctx.value("batch_analysis") or intelligence_engine.analyze_batch(batch_number, manufacturer)
         db_found = supply is not None
-        db_confidence_modifier = 0.0
-        db_medicine = None
-        db_supplier = None
-        db_risk_flags = []
-        
-        if db_found:
-            # Get related data
-            if supply.get("medicine_id"):
-                try:
-                    med_id = supply["medicine_id"]
-                    if isinstance(med_id, str):
-                        med_id = ObjectId(med_id)
-                    db_medicine = await medicines_collection.find_one({
-                        "_id": med_id,
-                        "$or": [
-                            {"deleted": {"$exists": False}},
-                            {"deleted": False}
-                        ]
-                    })
-                except Exception as e:
-                    print(f"Medicine lookup error: {e}")
-            
-            if supply.get("supplier_id"):
-                try:
-                    supp_id = supply["supplier_id"]
-                    if isinstance(supp_id, str):
-                        supp_id = ObjectId(supp_id)
-                    db_supplier = await suppliers_collection.find_one({
-                        "_id": supp_id,
-                        "$or": [
-                            {"deleted": {"$exists": False}},
-                            {"deleted": False}
-                        ]
-                    })
-                except Exception as e:
-                    print(f"Supplier lookup error: {e}")
-            
-            # Calculate DB confidence modifier
-            db_confidence_modifier += 35.0  # Found in DB
-            
-            if db_medicine:
-                db_confidence_modifier += 10.0
-            
-            # Check supplier trust
-            if db_supplier:
-                trust_score = db_supplier.get("trust_score", 50)
-                if trust_score >= 80:
-                    db_confidence_modifier += 15.0
-                elif trust_score >= 60:
-                    db_confidence_modifier += 5.0
-                elif trust_score < 40:
-                    db_risk_flags.append("LOW_TRUST_SUPPLIER")
-                    db_confidence_modifier -= 20.0
-            
-            # Check expiry
-            expiry_date = supply.get("expiry_date")
-            if expiry_date:
-                try:
-                    if isinstance(expiry_date, str):
-                        expiry_date = datetime.fromisoformat(expiry_date.replace("Z", "+00:00"))
-                    
-                    if expiry_date < datetime.now():
-                        db_risk_flags.append("EXPIRED")
-                        db_confidence_modifier = -50.0  # Override - expired
-                    elif (expiry_date - datetime.now()).days < 30:
-                        db_risk_flags.append("NEAR_EXPIRY")
-                        db_confidence_modifier -= 10.0
-                except Exception as e:
-                    print(f"Expiry check error: {e}")
-            
-            # Check compliance status
-            compliance = supply.get("compliance_status")
-            if compliance == "REJECTED":
-                db_risk_flags.append("COMPLIANCE_REJECTED")
-                db_confidence_modifier -= 25.0
-            elif compliance == "PENDING":
-                db_risk_flags.append("COMPLIANCE_PENDING")
-                db_confidence_modifier -= 10.0
-            
-            # Check fake status
-            fake_status = supply.get("fake_status")
-            if fake_status == "SUSPECTED_FAKE":
-                db_risk_flags.append("FLAGGED_AS_FAKE")
-                db_confidence_modifier = -60.0  # Override
-            elif fake_status == "CONFIRMED_FAKE":
-                db_risk_flags.append("CONFIRMED_COUNTERFEIT")
-                db_confidence_modifier = -80.0  # Critical override
-        
-        # ===== PHASE 2: AI INTELLIGENCE ANALYSIS =====
-        # ALWAYS run intelligence, even if DB found
-        ai_analysis = intelligence_engine.analyze_batch(batch_number, manufacturer)
-        
-        # ===== PHASE 2B: CDSCO MANUFACTURER VERIFICATION =====
-        cdsco_result = {"cdsco_match": False, "confidence_modifier": 0, "risk_flag": None}
-        if manufacturer:
-            cdsco_result = await verify_manufacturer(manufacturer)
-            print(f"🔍 CDSCO RESULT for {manufacturer}: {cdsco_result}")
-        
-        # ===== PHASE 3: MERGE SIGNALS =====
-        # Combine DB confidence with AI confidence and CDSCO
-        base_confidence = 0.0
-        
-        # Start with DB modifier if found
-        if db_found:
-            base_confidence += 35.0  # Found in DB
-            base_confidence += db_confidence_modifier
-        else:
-            db_risk_flags.append("NOT_IN_DATABASE")
-        
-        # Add CDSCO manufacturer verification (CORE SIGNAL)
-        if cdsco_result.get("cdsco_match"):
-            cdsco_mod = cdsco_result.get("confidence_modifier", 0)
-            base_confidence += cdsco_mod
-            print(f"✅ CDSCO Match: +{cdsco_mod} → {base_confidence}")
-            if cdsco_result.get("risk_flag"):
-                db_risk_flags.append(cdsco_result["risk_flag"])
-        elif manufacturer:
-            # CDSCO lookup happened but no match
-            cdsco_penalty = cdsco_result.get("confidence_modifier", -30)
-            base_confidence += cdsco_penalty
-            print(f"⚠️ CDSCO No Match: {cdsco_penalty} → {base_confidence}")
-            if cdsco_result.get("risk_flag"):
-                db_risk_flags.append(cdsco_result["risk_flag"])
-        
-        # Add AI analysis (weighted based on DB/CDSCO availability)
+        database_match = None if db_skipped else db_found
         ai_confidence = ai_analysis["confidence_score"]
         
-        if db_found or cdsco_result.get("cdsco_match"):
-            # DB found OR CDSCO verified: weight towards confirmed sources (65% base, 35% AI)
-            final_confidence = (base_confidence * 0.65) + (ai_confidence * 0.35)
-        else:
-            # No DB and no CDSCO match: weight AI heavily (40% base, 60% AI)
-            final_confidence = (base_confidence * 0.4) + (ai_confidence * 0.6)
-        
-        # Clamp confidence
-        final_confidence = max(0.0, min(100.0, final_confidence))
-        
-        # ===== PHASE 4: AGGREGATE RISK FLAGS =====
-        all_risk_flags = db_risk_flags.copy()
-        
-        # Add AI risk flags
-        if ai_analysis["fake_similarity"].get("matches_fake_pattern"):
-            all_risk_flags.append("MATCHES_FAKE_PATTERN")
-        
-        if ai_analysis["fake_similarity"].get("risk_level") == "high":
-            all_risk_flags.append("HIGH_FAKE_SIMILARITY")
-        
-        if ai_analysis["anomaly_signals"].get("repetition_anomaly"):
-            all_risk_flags.append("REPETITION_ANOMALY")
-        
-        if ai_analysis["anomaly_signals"].get("length_anomaly"):
-            all_risk_flags.append("LENGTH_ANOMALY")
-        
-        if not ai_analysis["format_analysis"].get("format_valid"):
-            all_risk_flags.append("INVALID_FORMAT")
-        
-        # ===== PHASE 5: GENERATE VERDICT =====
-        verdict = map_confidence_to_verdict(final_confidence)
+        # ===== PHASE 2: VERDICT =====
+        phases.phase("verdict")
+        final_confidence = assessment.confidence
+        verdict = assessment.verdict
+        all_risk_flags = assessment.risk_flags
+        reasoning = assessment.reasoning + degraded_reasoning(assessment)
+        record_verdict("batch", verdict, assessment.skipped)
         
-        # ===== PHASE 6: BUILD REASONING =====
-        reasoning = []
-        
-        # CDSCO reasoning
-        if cdsco_result.get("cdsco_match"):
-            status = cdsco_result.get("details", {}).get("status", "Approved")
-            reasoning.append(f"✓ Manufacturer verified in CDSCO registry ({status})")
-        elif manufacturer:
-            reasoning.append("⚠ Manufacturer not found in CDSCO registry")
-        
-        # DB reasoning
-        if db_found:
-            reasoning.append("✓ Batch found in MedGuard database")
-            if db_medicine:
-                reasoning.append(f"✓ Registered product: {db_medicine.get('name')}")
-            if db_supplier:
-                trust = db_supplier.get("trust_score", 50)
-                if trust >= 80:
-                    reasoning.append(f"✓ High-trust supplier: {db_supplier.get('name')} ({trust}% trust)")
-                elif trust < 40:
-                    reasoning.append(f"⚠ Low-trust supplier: {db_supplier.get('name')} ({trust}% trust)")
-        else:
-            reasoning.append("⚠ Batch not found in MedGuard database")
-        
-        # Add AI reasoning
-        reasoning.extend(ai_analysis["reasoning"])
-        
-        # ===== PHASE 7: GENERATE RECOMMENDATION =====
+        # ===== PHASE 3: GENERATE RECOMMENDATION =====
+        phases.phase("recommendation")
         recommendation = generate_recommendation(verdict, final_confidence, reasoning)
         
-        # ===== PHASE 8: PREPARE MEDICINE DETAILS =====
+        # ===== PHASE 4: PREPARE MEDICINE DETAILS =====
+        phases.phase("medicine_details")
         medicine_details = None
         if db_medicine or db_found:
             medicine_details = {
@@ -267,27 +165,28 @@ async def verify_by_batch_number_dynamic(
                 "expiry_date": str(supply.get("expiry_date")) if db_found and supply.get("expiry_date") else None,
                 "supplier": db_supplier.get("name") if db_supplier else "Unknown",
                 "quantity": supply.get("quantity") if db_found else None,
-                "database_match": db_found,
+                "database_match": database_match,
                 "ai_confidence": round(ai_confidence, 1)
             }
         else:
             # No DB match - use AI inference
             recognized_mfg = ai_analysis["pattern_recognition"].get("recognized_manufacturer")
             medicine_details = {
-                "name": "Not registered in database",
+                "name": "Not registered in database" if database_match is False else "Database lookup unavailable",
                 "manufacturer": recognized_mfg or manufacturer or "Unknown",
                 "batch_number": batch_number,
                 "expiry_date": None,
                 "supplier": "Unknown",
                 "quantity": None,
-                "database_match": False,
+                "database_match": database_match,
                 "ai_confidence": round(ai_confidence, 1),
                 "inferred_manufacturer": recognized_mfg
             }
         
-        # ===== PHASE 9: LOG SCAN =====
+        # ===== PHASE 5: LOG SCAN =====
+        phases.phase("log_scan")
         try:
-            await scan_log_collection.insert_one({
+            scan_log = {
                 "input_type": "batch",
                 "batch_number": batch_number,
                 "manufacturer": manufacturer,
@@ -301,17 +200,22 @@ async def verify_by_batch_number_dynamic(
                 "medicine_id": str(db_medicine["_id"]) if db_medicine else None,
                 "supplier_id": str(db_supplier["_id"]) if db_supplier else None,
                 "supply_id": str(supply["_id"]) if db_found else None,
-                "database_match": db_found,
+                "database_match": database_match,
                 "ai_analysis_summary": {
                     "format_valid": ai_analysis["format_analysis"].get("format_valid"),
                     "fake_similarity": ai_analysis["fake_similarity"].get("risk_level"),
                     "recognized_manufacturer": ai_analysis["pattern_recognition"].get("recognized_manufacturer")
                 }
-            })
+            }
+            if scan_logs is not None:
+                scan_logs.append(scan_log)
+            else:
+                await log_scan_within(scan_log, deadline)
         except Exception as e:
-            print(f"Logging error (non-critical): {e}")
+            logger.warning("Scan logging error (non-critical): %s", e)
         
-        # ===== PHASE 10: RETURN RESULT =====
+        # ===== PHASE 6: RETURN RESULT =====
+        phases.phase("build_result")
         return {
             "verdict": verdict,
             "confidence": round(final_confidence, 1),
@@ -326,18 +230,18 @@ async def verify_by_batch_number_dynamic(
                 "confidence_modifier": cdsco_result.get("confidence_modifier", 0)
             },
             "analysis_metadata": {
-                "database_match": db_found,
+                "database_match": database_match,
                 "cdsco_verified": cdsco_result.get("cdsco_match", False),
                 "ai_confidence": round(ai_confidence, 1),
                 "format_valid": ai_analysis["format_analysis"].get("format_valid"),
-                "recognized_manufacturer": ai_analysis["pattern_recognition"].get("recognized_manufacturer")
+                "recognized_manufacturer": ai_analysis["pattern_recognition"].get("recognized_manufacturer"),
+                "signals": assessment.scores(),
+                "degraded_signals": assessment.degraded_signals
             }
         }
         
     except Exception as e:
-        print(f"Dynamic verification error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Dynamic verification error: %s", e)
         
         # Even on error, try to return AI analysis
         try:
@@ -359,6 +263,20 @@ async def verify_by_batch_number_dynamic(
                 "reasoning": ["System error occurred during verification"],
                 "medicine_details": None
             }
+    finally:
+        phases.close()
+
+
+def barcode_read_failed() -> dict:
+    """Result for an image whose barcode could not be decoded"""
+    return {
+        "verdict": "UNKNOWN",
+        "confidence": 30.0,
+        "risk_flags": ["BARCODE_READ_FAILED"],
+        "recommendation": "❓ Could not read barcode. Try manual entry or ensure better lighting and focus.",
+        "reasoning": ["Barcode could not be decoded from image"],
+        "medicine_details": None
+    }
 
 
 async def verify_by_barcode(
@@ -373,14 +291,7 @@ async def verify_by_barcode(
         barcode_result = await extract_medicine_info_from_barcode(image_bytes)
         
         if not barcode_result.get("success"):
-            return {
-                "verdict": "UNKNOWN",
-                "confidence": 30.0,
-                "risk_flags": ["BARCODE_READ_FAILED"],
-                "recommendation": "❓ Could not read barcode. Try manual entry or ensure better lighting and focus.",
-                "reasoning": ["Barcode could not be decoded from image"],
-                "medicine_details": None
-            }
+            return barcode_read_failed()
         
         batch_number = barcode_result.get("batch_number")
         manufacturer = barcode_result.get("manufacturer")
@@ -397,7 +308,7 @@ async def verify_by_barcode(
             "medicine_details": None
         }
     except Exception as e:
-        print(f"Barcode verification error: {str(e)}")
+        logger.exception("Barcode verification error: %s", e)
         return {
             "verdict": "UNKNOWN",
             "confidence": 25.0,
@@ -422,7 +333,9 @@ async def verify_by_image(
         if barcode_result and barcode_result.get("success"):
             batch_number = barcode_result.get("batch_number")
             manufacturer = barcode_result.get("manufacturer")
-            return await verify_by_batch_number_dynamic(batch_number, manufacturer, device_id, ip_address)
+            return await verify_by_batch_number_dynamic(
+                batch_number, manufacturer, device_id, ip_address, image_bytes=image_bytes
+            )
         
         return {
             "verdict": "UNKNOWN",
@@ -434,7 +347,7 @@ async def verify_by_image(
         }
         
     except Exception as e:
-        print(f"Image verification error: {str(e)}")
+        logger.exception("Image verification error: %s", e)
         return {
             "verdict": "UNKNOWN",
             "confidence": 30.0,
@@ -445,6 +358,171 @@ async def verify_by_image(
         }
 
 
+async def verify_by_barcode_batch(
+    images: list,
+    device_id: Optional[str] = None,
+    ip_address: Optional[str] = None
+) -> dict:
+    """
+    Verify many barcode images at once (e.g. a delivery of boxes)
+
+    images is a list of {"filename", "data"} or {"filename", "error"}
+    items. All images are decoded concurrently on the barcode worker
+    pool, decoded batch numbers are resolved with one $in lookup, and
+    each distinct (batch, manufacturer) is verified and logged once.
+    Returns per-image results in input order plus a summary.
+    """
+    from app.services.barcode_service import extract_medicine_info_from_barcode
+    
+    readable = [i for i, image in enumerate(images) if image.get("data") is not None]
+    extracted = dict(zip(readable, await asyncio.gather(
+        *(extract_medicine_info_from_barcode(images[i]["data"]) for i in readable),
+        return_exceptions=True
+    )))
+    
+    keys = {}
+    for i, barcode_result in extracted.items():
+        if isinstance(barcode_result, Exception):
+            logger.warning("Barcode batch decode error (%s): %s", images[i].get("filename"), barcode_result)
+        elif barcode_result.get("success") and barcode_result.get("batch_number"):
+            keys[i] = (barcode_result["batch_number"], barcode_result.get("manufacturer"))
+    
+    unique_keys = list(dict.fromkeys(keys.values()))
+    contexts = await load_supply_contexts(batch for batch, _ in unique_keys)
+    verdicts = dict(zip(unique_keys, await asyncio.gather(*(
+        verify_by_batch_number_dynamic(
+            batch, manufacturer, device_id, ip_address, supply_context=contexts[batch]
+        )
+        for batch, manufacturer in unique_keys
+    ))))
+    
+    results = []
+    counts = {}
+    for i, image in enumerate(images):
+        item = {"index": i, "filename": image.get("filename")}
+        if image.get("data") is None:
+            item["error"] = image.get("error")
+            item["result"] = None
+        elif i in keys:
+            barcode_result = extracted[i]
+            item["batch_number"], item["manufacturer"] = keys[i]
+            item["barcode_type"] = barcode_result.get("barcode_type")
+            item["result"] = verdicts[keys[i]]
+        else:
+            item["result"] = barcode_read_failed()
+        
+        if item["result"] is not None:
+            verdict = item["result"]["verdict"]
+            counts[verdict] = counts.get(verdict, 0) + 1
+        results.append(item)
+    
+    return {
+        "results": results,
+        "summary": {
+            "images": len(images),
+            "decoded": len(keys),
+            "unique_batches": len(unique_keys),
+            "verdicts": counts
+        }
+    }
+
+
+def normalize_batch_items(items: list) -> tuple:
+    """
+    Normalize and dedupe (batch_number, manufacturer) items
+
+    Returns ({(batch, manufacturer): [input indices]}, [indices of items
+    without a batch number]), keys in first-seen order.
+    """
+    positions = {}
+    invalid = []
+    for i, item in enumerate(items):
+        batch_number = (item.get("batch_number") or "").strip()
+        manufacturer = (item.get("manufacturer") or "").strip() or None
+        if not batch_number:
+            invalid.append(i)
+            continue
+        positions.setdefault((batch_number, manufacturer), []).append(i)
+    return positions, invalid
+
+
+async def _insert_scan_logs(scan_logs: list):
+    if not scan_logs:
+        return
+    try:
+        with span("mongo.public_scan_logs.insert_many"):
+            await scan_log_collection.insert_many(scan_logs, ordered=False)
+        await _count_scans(scan_logs)
+    except Exception as e:
+        logger.warning("Scan logging error (non-critical): %s", e)
+
+
+async def stream_batch_verifications(
+    items: list,
+    device_id: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    log_chunk_size: int = 500
+):
+    """
+    Verify many batch numbers, yielding one result per distinct item
+
+    Items ({"batch_number", "manufacturer"}) are normalized and deduped,
+    all supplies are fetched with one aggregation, CDSCO runs once per
+    distinct manufacturer and scan logs are bulk-inserted in chunks.
+    Each yielded dict carries the input "indices" it answers; a final
+    {"summary": ...} is yielded last.
+    """
+    positions, invalid = normalize_batch_items(items)
+    
+    if invalid:
+        yield {"indices": invalid, "error": "Batch number is required", "result": None}
+    
+    contexts = await load_supply_contexts(batch for batch, _ in positions)
+    manufacturers = list(dict.fromkeys(m for _, m in positions if m))
+    cdsco_results = dict(zip(manufacturers, await asyncio.gather(
+        *(verify_manufacturer(m) for m in manufacturers)
+    )))
+    
+    counts = {}
+    scan_logs = []
+    try:
+        for (batch_number, manufacturer), indices in positions.items():
+            result = await verify_by_batch_number_dynamic(
+                batch_number,
+                manufacturer,
+                device_id,
+                ip_address,
+                supply_context=contexts[batch_number],
+                cdsco_result=cdsco_results.get(manufacturer),
+                scan_logs=scan_logs
+            )
+            counts[result["verdict"]] = counts.get(result["verdict"], 0) + 1
+            
+            yield {
+                "indices": indices,
+                "batch_number": batch_number,
+                "manufacturer": manufacturer,
+                "result": result
+            }
+            
+            if len(scan_logs) >= log_chunk_size:
+                await _insert_scan_logs(scan_logs)
+                scan_logs = []
+    finally:
+        # Also flushes what was verified before a client disconnect
+        await _insert_scan_logs(scan_logs)
+    
+    yield {
+        "summary": {
+            "items": len(items),
+            "unique_items": len(positions),
+            "invalid_items": len(invalid),
+            "database_matches": sum(1 for b, _ in positions if contexts[b][0] is not None),
+            "verdicts": counts
+        }
+    }
+
+
 # Maintain backward compatibility
 verify_by_batch_number = verify_by_batch_number_dynamic
 
@@ -462,16 +540,15 @@ async def verify_by_medicine_name(
     
     Pipeline:
     1. Resolve medicine name → manufacturer(s) using brand mapping
-    2. CDSCO verification on inferred manufacturer (CORE)
-    3. If batch provided: batch intelligence
-    4. Compute confidence without batch if needed
-    5. Return verdict + recommendation
+    2. medicine_name_engine: brand match, CDSCO verification on the
+       inferred manufacturer (CORE), the batch record if a batch is given
+    3. Return verdict + recommendation
     
     Works even without batch (but more accurate with it)
     """
+    deadline = verification_deadline()
+    phases = PhaseTimer("verify_medicine")
     try:
-        from app.services.brand_mapping_service import find_manufacturer_by_brand
-        
         if not medicine_name or not medicine_name.strip():
             return {
                 "verdict": "UNKNOWN",
@@ -484,15 +561,17 @@ async def verify_by_medicine_name(
             }
         
         medicine_name = medicine_name.strip()
+        batch_number = batch_number.strip().upper() if batch_number and batch_number.strip() else None
         
-        print(f"\n🔍 MEDICINE-NAME VERIFICATION: {medicine_name}")
+        logger.debug("Medicine-name verification: %s", medicine_name)
         
         # ===== STEP 1: Brand Mapping - Map medicine name to manufacturer =====
-        print(f"\n[STEP 1] Brand Mapping: Resolving '{medicine_name}' to manufacturer...")
-        brand_result = await find_manufacturer_by_brand(medicine_name)
+        phases.phase("brand_mapping")
+        ctx = VerificationContext(batch_number, medicine_name=medicine_name)
+        brand_result = await ctx.get("brand")
         
         if not brand_result.get("found"):
-            print(f"⚠️ Medicine brand not found in mapping database")
+            logger.debug("Brand not found in mapping database: %s", medicine_name)
             recommendation = f"❌ Medicine '{medicine_name}' not found in MedGuard database. \n\nThis could mean:\n• Brand name is spelled incorrectly\n• It's not a registered medicine\n• It's a very new product\n\nPlease verify the spelling or consult a pharmacist."
             
             return {
@@ -513,119 +592,30 @@ async def verify_by_medicine_name(
         primary_manufacturer = brand_result.get("primary_manufacturer")
         brand_confidence_match = brand_result.get("confidence", 100.0)
         
-        print(f"✅ Brand found: {brand_result['brand_name']}")
-        print(f"   Category: {brand_result['category']}")
-        print(f"   Manufacturers: {inferred_manufacturers}")
-        print(f"   Primary: {primary_manufacturer}")
-        
-        # ===== STEP 2: CDSCO Verification on Inferred Manufacturer =====
-        print(f"\n[STEP 2] CDSCO Verification on manufacturer '{primary_manufacturer}'...")
-        
-        cdsco_result = {}
-        if primary_manufacturer:
-            cdsco_result = await verify_manufacturer(primary_manufacturer)
-            print(f"🔍 CDSCO RESULT: Match={cdsco_result.get('cdsco_match')}, Modifier={cdsco_result.get('confidence_modifier')}")
-        else:
-            cdsco_result = {
-                "cdsco_match": False,
-                "confidence_modifier": 0,
-                "risk_flag": "NO_MANUFACTURER_INFERRED"
-            }
-        
-        # ===== STEP 3: Calculate Base Confidence from Brand + CDSCO =====
-        print(f"\n[STEP 3] Base Confidence Calculation...")
-        
-        base_confidence = 0.0
-        reasoning = []
-        risk_flags = []
-        sources = []
-        
-        # Brand mapping confidence
-        brand_bonus = (brand_confidence_match / 100.0) * 40.0  # Up to 40 points
-        base_confidence += brand_bonus
-        print(f"✅ Brand mapping: +{round(brand_bonus, 1)} (match quality: {brand_confidence_match}%)")
-        reasoning.append(f"✓ Medicine '{medicine_name}' recognized in database")
-        
-        # CDSCO manufacturer verification (CORE)
-        if cdsco_result.get("cdsco_match"):
-            cdsco_mod = cdsco_result.get("confidence_modifier", 0)
-            # CDSCO-verified manufacturers get +50 points (core verification layer)
-            cdsco_mod = max(cdsco_mod, 50)  # Ensure at least 50 for approved
-            base_confidence += cdsco_mod
-            print(f"✅ CDSCO verified: +{cdsco_mod}")
-            reasoning.append(f"✓ Manufacturer '{primary_manufacturer}' verified in CDSCO registry")
-            sources.append("BRAND_MAPPING")
-            sources.append("CDSCO_VERIFIED")
-        else:
-            cdsco_penalty = cdsco_result.get("confidence_modifier", -20)
-            base_confidence += cdsco_penalty
-            print(f"⚠️ CDSCO not found: {cdsco_penalty}")
-            reasoning.append(f"⚠ Manufacturer not verified in CDSCO registry")
-            risk_flags.append("MANUFACTURER_NOT_IN_CDSCO")
-            if cdsco_result.get("risk_flag"):
-                risk_flags.append(cdsco_result["risk_flag"])
-        
-        # Clamp to reasonable starting point
-        base_confidence = max(10.0, min(90.0, base_confidence))
-        
-        # ===== STEP 4: Optional Batch Intelligence (if batch provided) =====
-        print(f"\n[STEP 4] Optional Batch Intelligence...")
-        
-        if batch_number and batch_number.strip():
-            print(f"   Batch provided: {batch_number}")
-            batch_number = batch_number.strip().upper()
-            
-            try:
-                supply = await supplies_collection.find_one({
-                    "batch_number": batch_number,
-                    "$or": [{"deleted": {"$exists": False}}, {"deleted": False}]
-                })
-                
-                if supply:
-                    print(f"   ✅ Batch found in database")
-                    base_confidence += 15.0
-                    reasoning.append(f"✓ Batch number verified in database")
-                    sources.append("BATCH_VERIFIED")
-                    
-                    # Check expiry
-                    if supply.get("expiry_date"):
-                        try:
-                            expiry = supply["expiry_date"]
-                            if isinstance(expiry, str):
-                                from datetime import datetime
-                                expiry = datetime.fromisoformat(expiry.replace("Z", "+00:00"))
-                            
-                            if expiry < datetime.now():
-                                base_confidence = -100.0  # Critical failure
-                                risk_flags.append("BATCH_EXPIRED")
-                                reasoning.append("⚠ Batch has EXPIRED")
-                        except:
-                            pass
-                else:
-                    print(f"   ⚠️ Batch not found in database")
-                    reasoning.append("⚠ Batch number not found in database")
-                    # No penalty for optional batch - confidence stays the same
-            except Exception as e:
-                print(f"   ❌ Batch lookup error: {e}")
-        else:
-            print(f"   ℹ️ No batch provided - verification based on medicine name only")
-            reasoning.append("ℹ Medicine name verified; batch number not provided")
-        
-        # ===== STEP 5: Final Confidence Aggregation =====
-        print(f"\n[STEP 5] Final Confidence Aggregation...")
-        final_confidence = max(0.0, min(100.0, base_confidence))
-        print(f"✅ FINAL CONFIDENCE: {round(final_confidence, 1)}%")
-        
-        # ===== STEP 6: Verdict Determination =====
-        print(f"\n[STEP 6] Verdict Determination...")
-        verdict = map_confidence_to_verdict(final_confidence)
+        logger.debug(
+            "Brand found: %s (category %s), manufacturers %s, primary %s",
+            brand_result["brand_name"], brand_result["category"], inferred_manufacturers, primary_manufacturer
+        )
+        
+        # ===== STEP 2: Signals (brand, CDSCO, batch record) and verdict =====
+        phases.phase("signals")
+        assessment = await medicine_name_engine.assess(ctx, deadline)
+        cdsco_result = ctx.value("cdsco", {})
+        final_confidence = assessment.confidence
+        verdict = assessment.verdict
+        risk_flags = assessment.risk_flags
+        reasoning = assessment.reasoning + degraded_reasoning(assessment)
+        sources = assessment.sources
+        logger.debug("Confidence %.1f%%, verdict %s", final_confidence, verdict)
+        
+        phases.phase("verdict")
+        record_verdict("medicine_name", verdict, assessment.skipped)
         recommendation = generate_recommendation(verdict, final_confidence, reasoning)
         
-        print(f"✅ VERDICT: {verdict}")
-        
-        # ===== STEP 7: Log Scan =====
+        # ===== STEP 3: Log Scan =====
+        phases.phase("log_scan")
         try:
-            await scan_log_collection.insert_one({
+            scan_log = {
                 "input_type": "medicine_name",
                 "medicine_name": medicine_name,
                 "batch_number": batch_number,
@@ -640,11 +630,13 @@ async def verify_by_medicine_name(
                 "timestamp": datetime.utcnow(),
                 "brand_confidence": brand_confidence_match,
                 "cdsco_verified": cdsco_result.get("cdsco_match", False)
-            })
+            }
+            await log_scan_within(scan_log, deadline)
         except Exception as e:
-            print(f"⚠️ Logging error (non-critical): {e}")
+            logger.warning("Scan logging error (non-critical): %s", e)
         
-        # ===== STEP 8: Return Result =====
+        # ===== STEP 4: Return Result =====
+        phases.phase("build_result")
         return {
             "verdict": verdict,
             "confidence": round(final_confidence, 1),
@@ -673,12 +665,14 @@ async def verify_by_medicine_name(
                 "input_method": "medicine_name",
                 "batch_provided": bool(batch_number),
                 "brand_confidence": brand_confidence_match,
-                "cdsco_verified": cdsco_result.get("cdsco_match", False)
+                "cdsco_verified": cdsco_result.get("cdsco_match", False),
+                "signals": assessment.scores(),
+                "degraded_signals": assessment.degraded_signals
             }
         }
     
     except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
+        logger.error("Missing dependency: %s", e)
         return {
             "verdict": "UNKNOWN",
             "confidence": 20.0,
@@ -689,9 +683,7 @@ async def verify_by_medicine_name(
             "cdsco": {"cdsco_match": False}
         }
     except Exception as e:
-        print(f"❌ Medicine verification error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Medicine verification error: %s", e)
         
         return {
             "verdict": "UNKNOWN",
@@ -703,3 +695,5 @@ async def verify_by_medicine_name(
             "cdsco": {"cdsco_match": False}
         }
 
+    finally:
+        phases.close()
@@ -1,6 +1,15 @@
 from datetime import datetime
 from bson import ObjectId
+from app.db.collections import SUPPLIES
 from app.db.mongodb import db
+from app.services.fake_batch_prefix_service import fake_batch_prefixes
+from app.services.predictive_service import refresh_supply_priority
+
+
+def _supplies_changed(collection_name: str):
+    # Deleting or restoring a supply can add or remove a flagged batch
+    if collection_name == SUPPLIES:
+        fake_batch_prefixes.invalidate()
 
 
 async def soft_delete(collection_name: str, doc_id: str):
@@ -10,6 +19,7 @@ async def soft_delete(collection_name: str, doc_id: str):
         {"_id": ObjectId(doc_id)},
         {"$set": {"is_deleted": True, "deleted_at": datetime.utcnow()}}
     )
+    _supplies_changed(collection_name)
     return {"message": "Record moved to recycle bin"}
 
 
@@ -20,6 +30,10 @@ async def restore(collection_name: str, doc_id: str):
         {"_id": ObjectId(doc_id)},
         {"$set": {"is_deleted": False, "deleted_at": None}}
     )
+    _supplies_changed(collection_name)
+    if collection_name == SUPPLIES:
+        # The daily refresh skips deleted supplies, so the stored score is stale
+        await refresh_supply_priority(doc_id)
     return {"message": "Record restored"}
 
 
@@ -27,6 +41,7 @@ async def permanent_delete(collection_name: str, doc_id: str):
     """Permanently delete a document from the database."""
     collection = db[collection_name]
     result = await collection.delete_one({"_id": ObjectId(doc_id)})
+    _supplies_changed(collection_name)
     if result.deleted_count == 0:
         return {"message": "Record not found"}
     return {"message": "Record permanently deleted"}
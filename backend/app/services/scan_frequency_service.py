@@ -0,0 +1,148 @@
+"""
+Scan Frequency Service
+Per-batch, per-hour scan counters for the scan history signal
+
+While the scan history signal is enabled (weighted above 0), every
+logged public scan increments the bucket document of its batch number
+and hour:
+
+    {"_id": "<batch_number>|<YYYYMMDDHH>", "batch_number": ..., "hour": ...,
+     "count": n, "verdicts": {"SAFE": n, ...}, "expires_at": ...}
+
+so the scan count and verdict distribution of a batch over the last N
+hours is one _id lookup of at most N + 1 small documents, instead of a
+count and a find over public_scan_logs. The window slides: the oldest
+bucket only counts for the part of its hour still inside the window.
+Buckets expire through a TTL index on expires_at.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.db.collections import PUBLIC_SCAN_LOGS, SCAN_FREQUENCY
+from app.db.mongodb import get_collection
+
+bucket_collection = get_collection(SCAN_FREQUENCY)
+scan_log_collection = get_collection(PUBLIC_SCAN_LOGS)
+
+HOUR_KEY_FORMAT = "%Y%m%d%H"
+
+
+def _hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_id(batch_number: str, hour: datetime) -> str:
+    return f"{batch_number}|{hour.strftime(HOUR_KEY_FORMAT)}"
+
+
+def _verdict_key(verdict: Optional[str]) -> str:
+    # Field names must not contain "." or start with "$"
+    return str(verdict or "UNKNOWN").replace(".", "_").lstrip("$") or "UNKNOWN"
+
+
+def _bucket_updates(counts: Dict[Tuple[str, datetime], Counter]) -> list:
+    retention = timedelta(hours=settings.scan_frequency_retention_hours)
+    updates = []
+    for (batch_number, hour), verdicts in counts.items():
+        increments = {"count": sum(verdicts.values())}
+        for verdict, n in verdicts.items():
+            increments[f"verdicts.{verdict}"] = n
+        updates.append(UpdateOne(
+            {"_id": bucket_id(batch_number, hour)},
+            {
+                "$inc": increments,
+                "$setOnInsert": {
+                    "batch_number": batch_number,
+                    "hour": hour,
+                    "expires_at": hour + timedelta(hours=1) + retention
+                }
+            },
+            upsert=True
+        ))
+    return updates
+
+
+async def record_scans(scan_logs: Iterable[dict]):
+    """
+    Count logged scans into their hourly buckets
+
+    Takes the scan log documents as written to public_scan_logs; scans
+    without a batch number are skipped. Scans of the same batch and hour
+    are merged into one $inc.
+    """
+    counts: Dict[Tuple[str, datetime], Counter] = {}
+    for scan in scan_logs:
+        batch_number = scan.get("batch_number")
+        if not batch_number:
+            continue
+        hour = _hour_start(scan.get("timestamp") or datetime.utcnow())
+        counts.setdefault((batch_number, hour), Counter())[_verdict_key(scan.get("verdict"))] += 1
+    if not counts:
+        return
+    with span("mongo.scan_frequency_buckets.bulk_write"):
+        await bucket_collection.bulk_write(_bucket_updates(counts), ordered=False)
+
+
+async def scan_window(batch_number: str, hours: int = 24, now: Optional[datetime] = None) -> Tuple[int, Dict[str, int]]:
+    """
+    (scan count, {verdict: count}) of a batch over the last `hours` hours
+
+    Hourly buckets approximate the window: the oldest bucket is weighted
+    by the fraction of its hour that is still inside the window.
+    """
+    now = now or datetime.utcnow()
+    window_start = now - timedelta(hours=hours)
+    oldest = _hour_start(window_start)
+    ids = [bucket_id(batch_number, oldest + timedelta(hours=h)) for h in range(hours + 1)]
+
+    with span("mongo.scan_frequency_buckets.find"):
+        buckets = await bucket_collection.find({"_id": {"$in": ids}}).to_list(None)
+
+    oldest_weight = 1 - (window_start - oldest).total_seconds() / 3600
+    count = 0.0
+    verdicts = Counter()
+    for bucket in buckets:
+        weight = oldest_weight if bucket["hour"] == oldest else 1.0
+        count += bucket.get("count", 0) * weight
+        for verdict, n in bucket.get("verdicts", {}).items():
+            verdicts[verdict] += n * weight
+    return round(count), {verdict: round(n) for verdict, n in verdicts.items() if round(n)}
+
+
+async def backfill_from_scan_logs(hours: Optional[int] = None) -> dict:
+    """
+    Rebuild the buckets of the last `hours` hours from public_scan_logs
+
+    For deployments whose scan logs predate the counters. Buckets in the
+    range are replaced, so running it twice does not double count; scans
+    logged while it runs may be missed, so run it when traffic is low.
+    """
+    hours = hours or settings.scan_frequency_retention_hours
+    since = _hour_start(datetime.utcnow() - timedelta(hours=hours))
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": since}, "batch_number": {"$nin": [None, ""]}}},
+        {"$group": {
+            "_id": {
+                "batch_number": "$batch_number",
+                "hour": {"$dateToString": {"format": "%Y%m%d%H", "date": "$timestamp"}},
+                "verdict": "$verdict"
+            },
+            "count": {"$sum": 1}
+        }}
+    ]
+    counts: Dict[Tuple[str, datetime], Counter] = {}
+    async for row in scan_log_collection.aggregate(pipeline, allowDiskUse=True):
+        key = row["_id"]
+        hour = datetime.strptime(key["hour"], HOUR_KEY_FORMAT)
+        counts.setdefault((key["batch_number"], hour), Counter())[_verdict_key(key.get("verdict"))] += row["count"]
+
+    deleted = await bucket_collection.delete_many({"hour": {"$gte": since}})
+    updates = _bucket_updates(counts)
+    for start in range(0, len(updates), 1000):
+        await bucket_collection.bulk_write(updates[start:start + 1000], ordered=False)
+    return {"since": since, "buckets": len(updates), "replaced": deleted.deleted_count}
@@ -4,6 +4,8 @@ from bson import ObjectId
 from app.services.compliance_engine import run_compliance_check
 from app.services.alert_service import create_alert
 from app.services.fake_detection_engine import detect_fake_medicine
+from app.services.predictive_service import priority_fields, refresh_supply_priority
+from app.services.fake_batch_prefix_service import FAKE_STATUSES, fake_batch_prefixes
 
 async def intake_supply(supply_data):
     supply = supply_data.dict()
@@ -11,6 +13,7 @@ async def intake_supply(supply_data):
     supply["medicine_id"] = ObjectId(supply["medicine_id"])
     supply["supplier_id"] = ObjectId(supply["supplier_id"])
     supply["created_at"] = datetime.utcnow()
+    supply["is_deleted"] = False
 
     # compliance check
     status, flags = await run_compliance_check(supply)
@@ -22,8 +25,13 @@ async def intake_supply(supply_data):
     supply["risk_flags"] = flags + fake_flags
     supply["fake_status"] = fake_verdict
 
+    # Stored usage priority, kept current by refresh_supply_priority
+    supply.update(priority_fields(supply, supply["created_at"]))
+
     result = await db.supplies.insert_one(supply)
     supply_id = str(result.inserted_id)
+    if fake_verdict in FAKE_STATUSES:
+        fake_batch_prefixes.invalidate()
 
     # 🚨 AUTO ALERT GENERATION
     for flag in supply["risk_flags"]:
@@ -35,6 +43,18 @@ async def intake_supply(supply_data):
     supply["supplier_id"] = str(supply["supplier_id"])
     return supply
 
+async def update_supply_status(supply_id: str, status_data):
+    """Update compliance/fake status or risk flags and recompute priority."""
+    if not ObjectId.is_valid(supply_id):
+        return None
+    updates = {k: v for k, v in status_data.dict().items() if v is not None}
+    if updates:
+        await db.supplies.update_one({"_id": ObjectId(supply_id)}, {"$set": updates})
+        await refresh_supply_priority(supply_id)
+        if "fake_status" in updates:
+            fake_batch_prefixes.invalidate()
+    return await get_supply_by_id(supply_id)
+
 async def list_supplies():
     supplies = []
     async for s in db.supplies.find({"is_deleted": {"$ne": True}}):
@@ -45,6 +65,8 @@ async def list_supplies():
     return supplies
 
 async def get_supply_by_id(supply_id: str):
+    if not ObjectId.is_valid(supply_id):
+        return None
     supply = await db.supplies.find_one({"_id": ObjectId(supply_id)})
     if supply:
         supply["_id"] = str(supply["_id"])
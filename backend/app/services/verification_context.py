@@ -0,0 +1,323 @@
+"""
+Verification Context
+The data one verification request needs, each piece fetched once
+
+Signal providers (app/services/verification_engine.py) declare the
+inputs they read by name: "supply", "medicine", "supplier", "brand",
+"manufacturer", "cdsco", "batch_analysis", "known_fake", "batch_pattern",
+"scan_history" and "image_analysis". A VerificationContext loads each input on first use
+and hands the same value to every provider that asks for it; loads
+that run concurrently share one fetch.
+
+Documents are looked up with one soft-delete rule for every collection
+(NOT_DELETED, i.e. is_deleted is not True).
+"""
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from bson import ObjectId
+
+from app.core.tracing import span
+from app.db.collections import MEDICINES, NOT_DELETED, SUPPLIERS, SUPPLIES
+from app.db.mongodb import get_collection
+from app.services.batch_intelligence_engine import intelligence_engine
+from app.services.batch_pattern_service import analyze_batch_pattern, check_known_fake_patterns
+from app.services.cdsco_verification_service import verify_manufacturer
+from app.services.scan_frequency_service import scan_window
+
+medicines_collection = get_collection(MEDICINES)
+supplies_collection = get_collection(SUPPLIES)
+suppliers_collection = get_collection(SUPPLIERS)
+
+logger = logging.getLogger(__name__)
+
+NO_SUPPLY = (None, None, None)
+
+# Loads whose work runs in worker threads: cancelling their task would not
+# stop the thread, only drop its result (and the cache entry it writes), so
+# VerificationContext.settle lets them finish here instead
+THREADED_LOADS = {"image_analysis"}
+background_loads = set()
+
+
+def _as_object_id(value) -> Optional[ObjectId]:
+    """ObjectId of a stored reference (ObjectId or hex string), None if invalid"""
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return None
+
+
+def is_active(doc: dict) -> bool:
+    """Python equivalent of NOT_DELETED"""
+    return doc.get("is_deleted") is not True
+
+
+async def load_supply_context(batch_number: str) -> tuple:
+    """
+    Look up (supply, medicine, supplier) for one batch number
+
+    The medicine and supplier lookups only need the supply, so they are
+    issued together. A failed one counts as not found.
+    """
+    with span("mongo.supplies.find_one"):
+        supply = await supplies_collection.find_one({"batch_number": batch_number, **NOT_DELETED})
+    if not supply:
+        return NO_SUPPLY
+
+    async def find(collection, name: str, reference):
+        object_id = _as_object_id(reference)
+        if object_id is None:
+            return None
+        try:
+            with span(f"mongo.{name}.find_one"):
+                return await collection.find_one({"_id": object_id, **NOT_DELETED})
+        except Exception as e:
+            logger.warning("%s lookup error: %s", name.capitalize(), e)
+            return None
+
+    medicine, supplier = await asyncio.gather(
+        find(medicines_collection, MEDICINES, supply.get("medicine_id")),
+        find(suppliers_collection, SUPPLIERS, supply.get("supplier_id"))
+    )
+    return supply, medicine, supplier
+
+
+def supply_contexts_pipeline(batch_numbers: list) -> list:
+    """
+    Aggregation joining matching supplies with their medicine and supplier
+
+    medicine_id / supplier_id may be stored as ObjectId or as its hex
+    string, so both are converted before the $lookup.
+    """
+    def to_object_id(field):
+        return {"$convert": {"input": f"${field}", "to": "objectId", "onError": None, "onNull": None}}
+
+    return [
+        {"$match": {"batch_number": {"$in": batch_numbers}, **NOT_DELETED}},
+        {"$addFields": {
+            "_medicine_oid": to_object_id("medicine_id"),
+            "_supplier_oid": to_object_id("supplier_id")
+        }},
+        {"$lookup": {
+            "from": MEDICINES,
+            "localField": "_medicine_oid",
+            "foreignField": "_id",
+            "as": "_medicine"
+        }},
+        {"$lookup": {
+            "from": SUPPLIERS,
+            "localField": "_supplier_oid",
+            "foreignField": "_id",
+            "as": "_supplier"
+        }}
+    ]
+
+
+async def load_supply_contexts(batch_numbers: Iterable[str]) -> dict:
+    """
+    Look up (supply, medicine, supplier) for many batch numbers
+
+    One aggregation with $lookup instead of three queries per batch.
+    Batches without a supply map to (None, None, None).
+    """
+    batch_numbers = list(dict.fromkeys(batch_numbers))
+    contexts = {batch_number: NO_SUPPLY for batch_number in batch_numbers}
+    if not batch_numbers:
+        return contexts
+
+    found = set()
+    with span("mongo.supplies.aggregate"):
+        async for supply in supplies_collection.aggregate(supply_contexts_pipeline(batch_numbers)):
+            batch_number = supply["batch_number"]
+            medicines = supply.pop("_medicine", [])
+            suppliers = supply.pop("_supplier", [])
+            supply.pop("_medicine_oid", None)
+            supply.pop("_supplier_oid", None)
+            # First match wins, as with find_one
+            if batch_number in found:
+                continue
+            found.add(batch_number)
+            contexts[batch_number] = (
+                supply,
+                next((m for m in medicines if is_active(m)), None),
+                next((s for s in suppliers if is_active(s)), None)
+            )
+    return contexts
+
+
+# ---------------------------------------------------------------------------
+# Loaders: name -> coroutine function of the context
+# ---------------------------------------------------------------------------
+
+
+async def _load_supply_context(ctx: "VerificationContext") -> tuple:
+    if not ctx.batch_number:
+        return NO_SUPPLY
+    return await load_supply_context(ctx.batch_number)
+
+
+async def _load_supply(ctx: "VerificationContext"):
+    return (await ctx.get("supply_context"))[0]
+
+
+async def _load_medicine(ctx: "VerificationContext"):
+    return (await ctx.get("supply_context"))[1]
+
+
+async def _load_supplier(ctx: "VerificationContext"):
+    return (await ctx.get("supply_context"))[2]
+
+
+async def _load_brand(ctx: "VerificationContext") -> Optional[dict]:
+    if not ctx.medicine_name:
+        return None
+    from app.services.brand_mapping_service import find_manufacturer_by_brand
+    return await find_manufacturer_by_brand(ctx.medicine_name)
+
+
+async def _load_manufacturer(ctx: "VerificationContext") -> Optional[str]:
+    """The given manufacturer, else the one inferred from the brand"""
+    if ctx.manufacturer:
+        return ctx.manufacturer
+    brand = await ctx.get("brand")
+    if brand and brand.get("found"):
+        return brand.get("primary_manufacturer")
+    return None
+
+
+async def _load_cdsco(ctx: "VerificationContext") -> dict:
+    manufacturer = await ctx.get("manufacturer")
+    if manufacturer:
+        cdsco_result = await verify_manufacturer(manufacturer)
+        logger.debug("CDSCO result for %s: %s", manufacturer, cdsco_result)
+        return cdsco_result
+    return {
+        "cdsco_match": False,
+        "confidence_modifier": 0,
+        # A medicine name whose brand names no manufacturer is a finding;
+        # a batch scanned without one is not
+        "risk_flag": "NO_MANUFACTURER_INFERRED" if ctx.medicine_name else None
+    }
+
+
+async def _load_batch_analysis(ctx: "VerificationContext") -> Optional[dict]:
+    if not ctx.batch_number:
+        return None
+    return intelligence_engine.analyze_batch(ctx.batch_number, ctx.manufacturer)
+
+
+async def _load_known_fake(ctx: "VerificationContext") -> Optional[bool]:
+    """Whether the batch shares a prefix with one flagged as fake; None if unknown"""
+    if not ctx.batch_number:
+        return None
+    # Answered from the in-memory index, never waiting for its reload
+    return await check_known_fake_patterns(ctx.batch_number, wait=False)
+
+
+async def _load_batch_pattern(ctx: "VerificationContext") -> Optional[dict]:
+    if not ctx.batch_number:
+        return None
+    return await analyze_batch_pattern(ctx.batch_number)
+
+
+async def _load_scan_history(ctx: "VerificationContext") -> Optional[tuple]:
+    """(scan count, {verdict: count}) of the batch over the last 24 hours"""
+    if not ctx.batch_number:
+        return None
+    return await scan_window(ctx.batch_number, 24)
+
+
+async def _load_image_analysis(ctx: "VerificationContext") -> Optional[dict]:
+    if ctx.image_bytes is None:
+        return None
+    from app.services.image_analysis_service import analyze_medicine_image
+    return await analyze_medicine_image(ctx.image_bytes)
+
+
+LOADERS = {
+    "supply_context": _load_supply_context,
+    "supply": _load_supply,
+    "medicine": _load_medicine,
+    "supplier": _load_supplier,
+    "brand": _load_brand,
+    "manufacturer": _load_manufacturer,
+    "cdsco": _load_cdsco,
+    "batch_analysis": _load_batch_analysis,
+    "known_fake": _load_known_fake,
+    "batch_pattern": _load_batch_pattern,
+    "scan_history": _load_scan_history,
+    "image_analysis": _load_image_analysis,
+}
+
+
+class VerificationContext:
+    """
+    Inputs of one verification request, loaded once and shared
+
+    Bulk callers pass values they already fetched for many requests at
+    once as keyword arguments, e.g. supply_context=(supply, medicine,
+    supplier) from load_supply_contexts or cdsco=verify_manufacturer(...);
+    those are never loaded again.
+    """
+
+    def __init__(
+        self,
+        batch_number: Optional[str] = None,
+        manufacturer: Optional[str] = None,
+        medicine_name: Optional[str] = None,
+        image_bytes: Optional[bytes] = None,
+        **prefetched
+    ):
+        self.batch_number = batch_number
+        self.manufacturer = manufacturer
+        self.medicine_name = medicine_name
+        self.image_bytes = image_bytes
+        self._values = {name: value for name, value in prefetched.items() if value is not None}
+        self._pending = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._values
+
+    def __getitem__(self, name: str):
+        """A loaded value; raises KeyError if it was not loaded"""
+        return self._values[name]
+
+    def value(self, name: str, default=None):
+        """A loaded value, or default if it was not loaded"""
+        return self._values.get(name, default)
+
+    async def get(self, name: str):
+        """
+        Load a value on first use; concurrent callers share the load
+
+        A caller that gives up waiting (e.g. on a timeout) does not cancel
+        the load for the others.
+        """
+        if name in self._values:
+            return self._values[name]
+        task = self._pending.get(name)
+        if task is None:
+            task = self._pending[name] = asyncio.ensure_future(LOADERS[name](self))
+        value = await asyncio.shield(task)
+        self._values[name] = value
+        return value
+
+    def settle(self):
+        """Keep the loads that finished and cancel the rest (threaded ones finish in the background)"""
+        for name, task in self._pending.items():
+            if not task.done():
+                if name in THREADED_LOADS:
+                    background_loads.add(task)
+                    task.add_done_callback(background_loads.discard)
+                else:
+                    task.cancel()
+            elif not task.cancelled() and task.exception() is None:
+                self._values.setdefault(name, task.result())
+        self._pending.clear()
+
+    async def fetch(self, names: Iterable[str]):
+        """Load several values concurrently"""
+        await asyncio.gather(*(self.get(name) for name in names))
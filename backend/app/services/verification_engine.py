@@ -0,0 +1,606 @@
+"""
+Verification Engine
+Signal providers and the weighting stage behind every public verdict
+
+A SignalProvider looks at one kind of evidence (the supply record, the
+CDSCO registry, the brand mapping, batch-number heuristics, recent scan
+history, the package image) and turns it into a Signal: a score, risk
+flags and reasoning lines. Providers declare the context inputs they
+read (see app/services/verification_context.py); the engine loads those
+through the request's VerificationContext, so a document needed by
+several providers is fetched once, and runs the providers concurrently.
+The WeightingStage then combines the signals into one confidence, which
+maps to the verdict.
+
+The engines are defined at the bottom: batch_engine, image_engine and
+medicine_name_engine for the public verification flows, scan_engine for
+staff scans.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.services.batch_pattern_service import scan_frequency_risk
+from app.services.verification_context import VerificationContext
+
+logger = logging.getLogger(__name__)
+
+# Signal groups of the weighting stage
+EVIDENCE = "evidence"
+HEURISTIC = "heuristic"
+
+# Scans in 24 hours below which the scan history signal stays neutral
+SCAN_HISTORY_MIN_SCANS = 10
+
+
+def map_confidence_to_verdict(confidence: float) -> str:
+    """Map confidence score to verdict"""
+    if confidence >= 80:
+        return "SAFE"
+    elif confidence >= 60:
+        return "LIKELY_AUTHENTIC"
+    elif confidence >= 40:
+        return "UNKNOWN"
+    elif confidence >= 20:
+        return "SUSPICIOUS"
+    else:
+        return "HIGH_RISK_FAKE"
+
+
+def verification_deadline() -> float:
+    """Event loop time by which a verification starting now must have its signals"""
+    return asyncio.get_running_loop().time() + settings.verification_deadline_ms / 1000
+
+
+def _expiry_date(supply: dict) -> Optional[datetime]:
+    expiry_date = supply.get("expiry_date")
+    if isinstance(expiry_date, str):
+        expiry_date = datetime.fromisoformat(expiry_date.replace("Z", "+00:00"))
+    return expiry_date or None
+
+
+class Signal:
+    """
+    One provider's contribution to a verdict
+
+    score is in confidence points; a confirmed signal (database or CDSCO
+    match) shifts the weighting towards evidence, and a veto forces the
+    confidence to 0 whatever the other signals say.
+    """
+
+    def __init__(
+        self,
+        score: float = 0.0,
+        risk_flags: Optional[List[str]] = None,
+        reasoning: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+        confirmed: bool = False,
+        veto: bool = False
+    ):
+        self.score = score
+        self.risk_flags = risk_flags or []
+        self.reasoning = reasoning or []
+        self.sources = sources or []
+        self.confirmed = confirmed
+        self.veto = veto
+        # Set by the engine
+        self.provider = None
+        self.group = None
+
+
+class SignalProvider:
+    """
+    One source of evidence about a scanned medicine
+
+    Subclasses set name, requires (the context inputs evaluate reads) and
+    group, and implement evaluate(ctx), which only reads loaded inputs
+    (ctx["supply"], ...) and returns a Signal, or None when it has
+    nothing to say about this request.
+    """
+
+    name = ""
+    requires: Tuple[str, ...] = ()
+    group = EVIDENCE
+
+    def evaluate(self, ctx: VerificationContext) -> Optional[Signal]:
+        raise NotImplementedError
+
+
+class CdscoSignal(SignalProvider):
+    """Whether the manufacturer is registered with CDSCO"""
+
+    name = "cdsco"
+    requires = ("manufacturer", "cdsco")
+
+    def __init__(self, miss_penalty: float = -30, match_floor: Optional[float] = None,
+                 miss_flag: Optional[str] = None):
+        self.miss_penalty = miss_penalty
+        self.match_floor = match_floor
+        self.miss_flag = miss_flag
+
+    def evaluate(self, ctx):
+        cdsco_result = ctx["cdsco"]
+        manufacturer = ctx["manufacturer"]
+        risk_flags = [cdsco_result["risk_flag"]] if cdsco_result.get("risk_flag") else []
+
+        if cdsco_result.get("cdsco_match"):
+            score = cdsco_result.get("confidence_modifier", 0)
+            if self.match_floor is not None:
+                score = max(score, self.match_floor)
+            status = (cdsco_result.get("details") or {}).get("status", "Approved")
+            return Signal(
+                score,
+                risk_flags,
+                [f"✓ Manufacturer '{manufacturer}' verified in CDSCO registry ({status})"],
+                sources=["CDSCO_VERIFIED"],
+                confirmed=True
+            )
+
+        if not manufacturer and not risk_flags:
+            return None
+        if self.miss_flag:
+            risk_flags.insert(0, self.miss_flag)
+        return Signal(
+            cdsco_result.get("confidence_modifier", self.miss_penalty),
+            risk_flags,
+            ["⚠ Manufacturer not found in CDSCO registry"]
+        )
+
+
+class DatabaseSignal(SignalProvider):
+    """The supply record of the batch: supplier trust, expiry, compliance and fake status"""
+
+    name = "database"
+    requires = ("supply", "medicine", "supplier")
+
+    def evaluate(self, ctx):
+        supply, medicine, supplier = ctx["supply"], ctx["medicine"], ctx["supplier"]
+        if supply is None:
+            return Signal(0.0, ["NOT_IN_DATABASE"], ["⚠ Batch not found in MedGuard database"])
+
+        modifier = 35.0
+        risk_flags = []
+        reasoning = ["✓ Batch found in MedGuard database"]
+
+        if medicine:
+            modifier += 10.0
+            reasoning.append(f"✓ Registered product: {medicine.get('name')}")
+
+        if supplier:
+            trust_score = supplier.get("trust_score", 50)
+            if trust_score >= 80:
+                modifier += 15.0
+                reasoning.append(f"✓ High-trust supplier: {supplier.get('name')} ({trust_score}% trust)")
+            elif trust_score >= 60:
+                modifier += 5.0
+            elif trust_score < 40:
+                risk_flags.append("LOW_TRUST_SUPPLIER")
+                modifier -= 20.0
+                reasoning.append(f"⚠ Low-trust supplier: {supplier.get('name')} ({trust_score}% trust)")
+
+        try:
+            expiry_date = _expiry_date(supply)
+            if expiry_date:
+                if expiry_date < datetime.now():
+                    risk_flags.append("EXPIRED")
+                    modifier = -50.0  # Override - expired
+                elif (expiry_date - datetime.now()).days < 30:
+                    risk_flags.append("NEAR_EXPIRY")
+                    modifier -= 10.0
+        except Exception as e:
+            logger.warning("Expiry check error: %s", e)
+
+        compliance = supply.get("compliance_status")
+        if compliance == "REJECTED":
+            risk_flags.append("COMPLIANCE_REJECTED")
+            modifier -= 25.0
+        elif compliance == "PENDING":
+            risk_flags.append("COMPLIANCE_PENDING")
+            modifier -= 10.0
+
+        # Intake writes SUSPICIOUS / FAKE; older records use the long names
+        fake_status = supply.get("fake_status")
+        if fake_status in ("SUSPICIOUS", "SUSPECTED_FAKE"):
+            risk_flags.append("FLAGGED_AS_FAKE")
+            modifier = -60.0  # Override
+        elif fake_status in ("FAKE", "CONFIRMED_FAKE"):
+            risk_flags.append("CONFIRMED_COUNTERFEIT")
+            modifier = -80.0  # Critical override
+
+        return Signal(35.0 + modifier, risk_flags, reasoning, sources=["DATABASE"], confirmed=True)
+
+
+class SupplyChainSignal(SignalProvider):
+    """
+    Supply-chain consistency of the batch record, for staff scans
+
+    The medicine and supplier of the supply must be on record, a scanned
+    manufacturer must match the medicine's, and the supply must not carry
+    fake or warning flags.
+    """
+
+    name = "supply_chain"
+    requires = ("supply", "medicine", "supplier")
+
+    # Supply risk flags that mark the batch as counterfeit
+    FAKE_FLAGS = ("FAKE", "COUNTERFEIT")
+    # Supply risk flags that need a closer look
+    WARNING_FLAGS = ("HIGH_RISK", "TEMP_BREACH", "UNVERIFIED", "SUSPICIOUS")
+
+    def evaluate(self, ctx):
+        supply, medicine, supplier = ctx["supply"], ctx["medicine"], ctx["supplier"]
+        if supply is None:
+            return None
+
+        signal = Signal()
+        if medicine is None:
+            signal.score -= 40.0
+            signal.risk_flags.append("MEDICINE_NOT_FOUND")
+            signal.reasoning.append("⚠ Medicine information not found for this batch")
+        if supplier is None:
+            signal.score -= 40.0
+            signal.risk_flags.append("SUPPLIER_NOT_REGISTERED")
+            signal.reasoning.append("⚠ Supplier not registered")
+        if ctx.manufacturer and medicine and \
+                (medicine.get("manufacturer") or "").strip().lower() != ctx.manufacturer.strip().lower():
+            signal.score -= 40.0
+            signal.risk_flags.append("MANUFACTURER_MISMATCH")
+            signal.reasoning.append(
+                f"⚠ Scanned manufacturer '{ctx.manufacturer}' does not match "
+                f"'{medicine.get('manufacturer')}' on record"
+            )
+
+        supply_flags = supply.get("risk_flags") or []
+        if any(flag in supply_flags for flag in self.FAKE_FLAGS):
+            signal.veto = True
+            signal.risk_flags.append("FLAGGED_AS_FAKE_IN_SUPPLY")
+            signal.reasoning.append("⚠ This batch has been flagged as fake")
+        warnings = [flag for flag in supply_flags if flag in self.WARNING_FLAGS]
+        if warnings:
+            signal.score -= 25.0
+            signal.risk_flags.extend(warnings)
+        return signal
+
+
+class BatchRecordSignal(SignalProvider):
+    """An optional batch number given with a medicine name: on record, and not expired"""
+
+    name = "batch_record"
+    requires = ("supply",)
+
+    def evaluate(self, ctx):
+        if not ctx.batch_number:
+            return Signal(reasoning=["ℹ Medicine name verified; batch number not provided"])
+        supply = ctx["supply"]
+        if supply is None:
+            # No penalty for an optional batch
+            return Signal(reasoning=["⚠ Batch number not found in database"])
+
+        signal = Signal(15.0, reasoning=["✓ Batch number verified in database"],
+                        sources=["BATCH_VERIFIED"], confirmed=True)
+        try:
+            expiry_date = _expiry_date(supply)
+            if expiry_date and expiry_date < datetime.now():
+                signal.veto = True
+                signal.risk_flags.append("BATCH_EXPIRED")
+                signal.reasoning.append("⚠ Batch has EXPIRED")
+        except Exception as e:
+            logger.warning("Expiry check error: %s", e)
+        return signal
+
+
+class BrandSignal(SignalProvider):
+    """How well the medicine name matched the brand mapping"""
+
+    name = "brand"
+    requires = ("brand",)
+
+    def evaluate(self, ctx):
+        brand = ctx["brand"]
+        if not brand or not brand.get("found"):
+            return None
+        return Signal(
+            brand.get("confidence", 100.0) / 100.0 * 40.0,  # Up to 40 points
+            reasoning=[f"✓ Medicine '{ctx.medicine_name}' recognized in database"],
+            sources=["BRAND_MAPPING"]
+        )
+
+
+class BatchHeuristicsSignal(SignalProvider):
+    """
+    Format, fake-similarity and anomaly analysis of the batch number itself,
+    and whether it shares its prefix with a batch flagged as fake
+    """
+
+    name = "batch_heuristics"
+    requires = ("batch_analysis", "known_fake")
+    group = HEURISTIC
+
+    # Score lost by a batch number resembling a known fake
+    KNOWN_FAKE_PENALTY = 50.0
+
+    def evaluate(self, ctx):
+        ai_analysis = ctx["batch_analysis"]
+        if ai_analysis is None:
+            return None
+        score = ai_analysis["confidence_score"]
+        reasoning = list(ai_analysis["reasoning"])
+        risk_flags = []
+        if ctx["known_fake"]:
+            risk_flags.append("MATCHES_KNOWN_FAKE_BATCH")
+            reasoning.append("⚠ Batch number resembles a batch flagged as fake")
+            score = max(0.0, score - self.KNOWN_FAKE_PENALTY)
+        if ai_analysis["fake_similarity"].get("matches_fake_pattern"):
+            risk_flags.append("MATCHES_FAKE_PATTERN")
+        if ai_analysis["fake_similarity"].get("risk_level") == "high":
+            risk_flags.append("HIGH_FAKE_SIMILARITY")
+        if ai_analysis["anomaly_signals"].get("repetition_anomaly"):
+            risk_flags.append("REPETITION_ANOMALY")
+        if ai_analysis["anomaly_signals"].get("length_anomaly"):
+            risk_flags.append("LENGTH_ANOMALY")
+        if not ai_analysis["format_analysis"].get("format_valid"):
+            risk_flags.append("INVALID_FORMAT")
+        return Signal(score, risk_flags, reasoning)
+
+
+class BatchPatternSignal(SignalProvider):
+    """Suspicious batch-number patterns, including a known-fake prefix, for staff scans"""
+
+    name = "batch_pattern"
+    requires = ("batch_pattern",)
+
+    def evaluate(self, ctx):
+        pattern = ctx["batch_pattern"]
+        if pattern is None or not pattern["signals"]:
+            return None
+        signal = Signal(risk_flags=[s.upper() for s in pattern["signals"]])
+        if pattern["suspicious"]:
+            signal.score = -float(pattern["suspicion_score"])
+            signal.reasoning.append("⚠ Batch number follows a suspicious pattern")
+        return signal
+
+
+class ScanHistorySignal(SignalProvider):
+    """How often, and with what verdicts, the batch was scanned in the last 24 hours"""
+
+    name = "scan_history"
+    requires = ("scan_history",)
+
+    def evaluate(self, ctx):
+        history = ctx["scan_history"]
+        if history is None:
+            return None
+        scan_count, verdict_counts = history
+        if scan_count <= SCAN_HISTORY_MIN_SCANS:
+            # Too few scans for their verdict mix to mean anything
+            return Signal()
+        signals, risk_level = scan_frequency_risk(scan_count, verdict_counts)
+        signal = Signal({"high": -20.0, "medium": -10.0}.get(risk_level, 0.0),
+                        [s.upper() for s in signals])
+        if risk_level in ("high", "medium"):
+            signal.reasoning.append(f"⚠ Batch scanned {scan_count} times in the last 24 hours")
+        if "frequent_negative_verdicts" in signals:
+            signal.reasoning.append("⚠ Recent scans of this batch were often flagged as suspicious")
+        return signal
+
+
+class ImageSignal(SignalProvider):
+    """Quality, blur and tampering analysis of the package image"""
+
+    name = "image"
+    requires = ("image_analysis",)
+
+    def evaluate(self, ctx):
+        analysis = ctx["image_analysis"]
+        if analysis is None:
+            return None
+        signal = Signal(analysis.get("confidence_modifier", 0))
+        if analysis.get("tampering_analysis", {}).get("tampering_detected"):
+            signal.risk_flags.append("PACKAGING_TAMPERING_INDICATORS")
+            signal.reasoning.append("⚠ Package image shows possible tampering")
+        if not analysis.get("quality_analysis", {}).get("valid", True):
+            signal.risk_flags.append("LOW_IMAGE_QUALITY")
+        if analysis.get("blur_analysis", {}).get("blurry"):
+            signal.risk_flags.append("BLURRY_IMAGE")
+        return signal
+
+
+class WeightingStage:
+    """
+    Combine signals into one confidence (0-100)
+
+    Evidence signals add up, each multiplied by its provider's weight
+    (settings.verification_signal_weights, default 1); heuristic signals
+    are averaged with the same weights. Without heuristic signals the
+    evidence total is the confidence. Otherwise the evidence total gets
+    settings.verification_confirmed_evidence_share of it when a signal
+    confirmed the medicine (database or CDSCO match) and
+    verification_unconfirmed_evidence_share when none did; the heuristics
+    get the rest. A vetoing signal forces 0. The engine does not run
+    providers weighted 0.
+
+    An engine can clamp the sum of some evidence signals (`baseline`, by
+    provider name) to `baseline_bounds` before the other signals are
+    added, e.g. the brand + CDSCO score of a medicine-name check.
+    """
+
+    def __init__(self, baseline: Iterable[str] = (), baseline_bounds: Tuple[float, float] = (0.0, 100.0)):
+        self.baseline = frozenset(baseline)
+        self.baseline_bounds = baseline_bounds
+
+    def weight(self, provider: str) -> float:
+        return settings.verification_signal_weights.get(provider, 1.0)
+
+    def combine(self, signals: Iterable[Signal]) -> float:
+        signals = list(signals)
+        if any(s.veto for s in signals):
+            return 0.0
+
+        evidence = sum(self.weight(s.provider) * s.score for s in signals
+                       if s.group == EVIDENCE and s.provider not in self.baseline)
+        baseline = [self.weight(s.provider) * s.score for s in signals if s.provider in self.baseline]
+        if baseline:
+            low, high = self.baseline_bounds
+            evidence += max(low, min(high, sum(baseline)))
+        heuristics = [(self.weight(s.provider), s.score) for s in signals if s.group == HEURISTIC]
+        heuristic_weight = sum(w for w, _ in heuristics)
+
+        if not heuristic_weight:
+            confidence = evidence
+        else:
+            heuristic = sum(w * score for w, score in heuristics) / heuristic_weight
+            if any(s.confirmed for s in signals):
+                share = settings.verification_confirmed_evidence_share
+            else:
+                share = settings.verification_unconfirmed_evidence_share
+            confidence = evidence * share + heuristic * (1 - share)
+
+        return max(0.0, min(100.0, confidence))
+
+
+def provider_enabled(name: str) -> bool:
+    """Whether the engines run a provider, i.e. it is not weighted 0"""
+    return bool(WeightingStage().weight(name))
+
+
+class Assessment:
+    """The signals of one request and the verdict they add up to"""
+
+    def __init__(self, signals: List[Signal], confidence: float, skipped: Optional[Dict[str, str]] = None,
+                 latency_ms: Optional[Dict[str, float]] = None):
+        self.signals = {s.provider: s for s in signals}
+        # {provider: "timeout" | "error"} of the signals the verdict went without
+        self.skipped = skipped or {}
+        # {provider: ms, "total": ms} of the assessment
+        self.latency_ms = latency_ms or {}
+        self.confidence = confidence
+        self.verdict = map_confidence_to_verdict(confidence)
+
+    def _collect(self, attribute: str) -> list:
+        return [item for s in self.signals.values() for item in getattr(s, attribute)]
+
+    @property
+    def risk_flags(self) -> List[str]:
+        return self._collect("risk_flags")
+
+    @property
+    def reasoning(self) -> List[str]:
+        return self._collect("reasoning")
+
+    @property
+    def sources(self) -> List[str]:
+        return self._collect("sources")
+
+    @property
+    def degraded_signals(self) -> List[str]:
+        return list(self.skipped)
+
+    def scores(self) -> dict:
+        """{provider: score} of the signals that counted"""
+        return {name: round(s.score, 1) for name, s in self.signals.items()}
+
+
+class VerificationEngine:
+    """
+    Runs a fixed set of signal providers over a context and weighs their signals
+
+    deadline_setting and budgets_setting name the settings with the
+    engine's deadline and per-signal budgets (the public verification
+    ones by default).
+    """
+
+    def __init__(self, providers: List[SignalProvider], weighting: Optional[WeightingStage] = None,
+                 deadline_setting: str = "verification_deadline_ms",
+                 budgets_setting: str = "verification_signal_budgets_ms"):
+        self.providers = providers
+        self.weighting = weighting or WeightingStage()
+        self.deadline_setting = deadline_setting
+        self.budgets_setting = budgets_setting
+
+    def deadline(self) -> float:
+        """Event loop time by which an assessment starting now must have its signals"""
+        return asyncio.get_running_loop().time() + getattr(settings, self.deadline_setting) / 1000
+
+    async def _evaluate(self, provider: SignalProvider, ctx: VerificationContext) -> Optional[Signal]:
+        with span(f"signal.{provider.name}"):
+            await ctx.fetch(provider.requires)
+            signal = provider.evaluate(ctx)
+        if signal is not None:
+            signal.provider = provider.name
+            signal.group = provider.group
+        return signal
+
+    async def _evaluate_within(self, provider: SignalProvider, ctx: VerificationContext,
+                               remaining: float, latency_ms: dict) -> Optional[Signal]:
+        budget_ms = getattr(settings, self.budgets_setting).get(provider.name)
+        timeout = remaining if budget_ms is None else min(remaining, budget_ms / 1000)
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(self._evaluate(provider, ctx), timeout)
+        finally:
+            latency_ms[provider.name] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def assess(self, ctx: VerificationContext, deadline: Optional[float] = None) -> Assessment:
+        """
+        Evaluate every provider (concurrently) and combine their signals
+
+        Each provider gets its budget (the engine's budgets_setting) but no
+        more than what is left until `deadline`, an event loop time
+        (default: the engine's deadline_setting from now). A provider
+        that misses it or fails is skipped and listed in
+        Assessment.skipped; the verdict is computed from the others.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        if deadline is None:
+            deadline = self.deadline()
+        remaining = max(0.0, deadline - loop.time())
+
+        # A provider weighted 0 could not change the verdict; do not wait for it
+        providers = [p for p in self.providers if self.weighting.weight(p.name)]
+        latency_ms = {}
+        results = await asyncio.gather(
+            *(self._evaluate_within(p, ctx, remaining, latency_ms) for p in providers),
+            return_exceptions=True
+        )
+        ctx.settle()
+        latency_ms["total"] = round((time.perf_counter() - started) * 1000, 2)
+
+        signals = []
+        skipped = {}
+        for provider, result in zip(providers, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning("Signal %s skipped: no result within its budget", provider.name)
+                skipped[provider.name] = "timeout"
+            elif isinstance(result, Exception):
+                logger.warning("Signal %s skipped: %r", provider.name, result)
+                skipped[provider.name] = "error"
+            elif result is not None:
+                signals.append(result)
+        return Assessment(signals, self.weighting.combine(signals), skipped, latency_ms)
+
+
+BATCH_PROVIDERS = [CdscoSignal(), DatabaseSignal(), BatchHeuristicsSignal(), ScanHistorySignal()]
+
+batch_engine = VerificationEngine(BATCH_PROVIDERS)
+image_engine = VerificationEngine(BATCH_PROVIDERS + [ImageSignal()])
+medicine_name_engine = VerificationEngine([
+    BrandSignal(),
+    # A registered manufacturer is the core of a name-only check
+    CdscoSignal(miss_penalty=-20, match_floor=50, miss_flag="MANUFACTURER_NOT_IN_CDSCO"),
+    BatchRecordSignal(),
+    ScanHistorySignal()
+], WeightingStage(baseline=("brand", "cdsco"), baseline_bounds=(10.0, 90.0)))
+
+# Staff scans (/scan): the supply record and its supply chain, the batch
+# number's pattern and its recent scans, with their own deadline rather
+# than the public verification one
+scan_engine = VerificationEngine(
+    [DatabaseSignal(), SupplyChainSignal(), BatchPatternSignal(), ScanHistorySignal()],
+    deadline_setting="scan_deadline_ms",
+    budgets_setting="scan_signal_budgets_ms"
+)
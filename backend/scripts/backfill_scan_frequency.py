@@ -0,0 +1,27 @@
+"""
+Scan frequency bucket backfill
+
+Rebuilds the hourly scan frequency buckets from public_scan_logs, for
+deployments whose scan logs predate the counters. Run once after
+upgrading, when traffic is low:
+    python scripts/backfill_scan_frequency.py [--hours 48]
+"""
+import argparse
+import asyncio
+import sys
+sys.path.insert(0, '.')
+
+from app.services.scan_frequency_service import backfill_from_scan_logs
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=int, default=None)
+    args = parser.parse_args()
+
+    result = await backfill_from_scan_logs(args.hours)
+    print(f"Rebuilt {result['buckets']} buckets since {result['since']} "
+          f"(replaced {result['replaced']})")
+
+
+asyncio.run(main())
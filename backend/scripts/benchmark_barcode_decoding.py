@@ -0,0 +1,181 @@
+"""
+Barcode decode latency benchmark
+
+Compares the legacy full-resolution strategy (gray, Otsu, adaptive on the
+whole photo) with the multi-resolution strategy in barcode_service on a
+synthetic corpus of phone-sized photos containing QR codes and EAN-13
+barcodes.
+
+Usage (from backend/):
+    python scripts/benchmark_barcode_decoding.py [--images 40] [--json out.json]
+
+Requires the zbar shared library (pyzbar).
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+sys.path.insert(0, '.')
+
+import cv2
+import numpy as np
+
+from app.services.barcode_service import decode_multiresolution, pyzbar
+
+# EAN-13 digit encodings (L, G, R) and first-digit parity patterns
+EAN_L = ["0001101", "0011001", "0010011", "0111101", "0100011",
+         "0110001", "0101111", "0111011", "0110111", "0001011"]
+EAN_G = ["0100111", "0110011", "0011011", "0100001", "0011101",
+         "0111001", "0000101", "0010001", "0001001", "0010111"]
+EAN_R = ["1110010", "1100110", "1101100", "1000010", "1011100",
+         "1001110", "1010000", "1000100", "1001000", "1110100"]
+EAN_PARITY = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+              "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+PHOTO_SIZES = [(3024, 4032), (3000, 4000), (2268, 4032), (1536, 2048)]
+
+
+def ean13_checksum(digits: str) -> str:
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return str((10 - total % 10) % 10)
+
+
+def render_ean13(digits12: str, module_px: int = 4, height: int = 240) -> np.ndarray:
+    """Render an EAN-13 barcode with a quiet zone as a grayscale image"""
+    digits = digits12 + ean13_checksum(digits12)
+    parity = EAN_PARITY[int(digits[0])]
+
+    bits = "101"
+    for i, d in enumerate(digits[1:7]):
+        bits += (EAN_L if parity[i] == "L" else EAN_G)[int(d)]
+    bits += "01010"
+    for d in digits[7:]:
+        bits += EAN_R[int(d)]
+    bits += "101"
+
+    quiet = 11
+    row = np.full(len(bits) + 2 * quiet, 255, dtype=np.uint8)
+    for i, bit in enumerate(bits):
+        if bit == "1":
+            row[quiet + i] = 0
+    row = np.repeat(row, module_px)
+    return np.tile(row, (height, 1))
+
+
+def render_qr(text: str, module_px: int = 8) -> np.ndarray:
+    """Render a QR code with a quiet zone as a grayscale image"""
+    qr = cv2.QRCodeEncoder.create().encode(text)
+    qr = cv2.resize(qr, None, fx=module_px, fy=module_px, interpolation=cv2.INTER_NEAREST)
+    return cv2.copyMakeBorder(qr, 4 * module_px, 4 * module_px, 4 * module_px, 4 * module_px,
+                              cv2.BORDER_CONSTANT, value=255)
+
+
+def make_photo(rng: random.Random, symbol: np.ndarray) -> np.ndarray:
+    """Place a symbol on a noisy phone-sized background"""
+    height, width = rng.choice(PHOTO_SIZES)
+    background = rng.randint(90, 200)
+    photo = np.random.default_rng(rng.randint(0, 2 ** 31)).normal(
+        background, 18, (height, width)
+    ).clip(0, 255).astype(np.uint8)
+
+    # Distracting printed text and boxes like real packaging
+    for _ in range(rng.randint(4, 12)):
+        x, y = rng.randint(0, width - 400), rng.randint(0, height - 100)
+        cv2.putText(photo, "MEDGUARD 500mg TABLETS", (x, y + 60), cv2.FONT_HERSHEY_SIMPLEX,
+                    rng.uniform(1.0, 2.5), rng.randint(0, 60), rng.randint(2, 5))
+
+    sh, sw = symbol.shape
+    x, y = rng.randint(0, width - sw), rng.randint(0, height - sh)
+    photo[y:y + sh, x:x + sw] = symbol
+
+    if rng.random() < 0.5:
+        photo = cv2.GaussianBlur(photo, (5, 5), 1.2)
+    return photo
+
+
+def build_corpus(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        if i % 2 == 0:
+            payload = f"BATCH{rng.randint(1000, 99999)}|Cipla Limited|P{rng.randint(100, 999)}"
+            symbol = render_qr(payload, module_px=rng.randint(6, 14))
+        else:
+            digits = "".join(str(rng.randint(0, 9)) for _ in range(12))
+            payload = digits + ean13_checksum(digits)
+            symbol = render_ean13(digits, module_px=rng.randint(3, 7), height=rng.randint(180, 360))
+        photo = make_photo(rng, symbol)
+        corpus.append((payload, cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()))
+    return corpus
+
+
+def decode_legacy(gray) -> tuple:
+    """Previous strategy: every variant at full resolution"""
+    variants = [
+        ("gray", gray),
+        ("otsu", cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]),
+        ("adaptive", cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)),
+    ]
+    for variant, processed in variants:
+        decoded = pyzbar.decode(processed)
+        if decoded:
+            return decoded, f"full:{variant}"
+    return [], None
+
+
+def run_strategy(name: str, decode, corpus: list) -> dict:
+    latencies = []
+    stages = {}
+    correct = 0
+
+    for payload, image_bytes in corpus:
+        started = time.perf_counter()
+        img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        decoded, stage = decode(gray)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        stages[stage or "failed"] = stages.get(stage or "failed", 0) + 1
+        if decoded and decoded[0].data.decode("utf-8") == payload:
+            correct += 1
+
+    latencies.sort()
+    return {
+        "strategy": name,
+        "images": len(corpus),
+        "decoded_correctly": correct,
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "stages": stages
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    print(f"Building corpus of {args.images} synthetic photos...")
+    corpus = build_corpus(args.images)
+
+    results = [
+        run_strategy("legacy_full_resolution", decode_legacy, corpus),
+        run_strategy("multiresolution", decode_multiresolution, corpus),
+    ]
+
+    print(f"\n{'strategy':<26}{'ok':>6}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}  stages")
+    for r in results:
+        print(f"{r['strategy']:<26}{r['decoded_correctly']:>6}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['mean_ms']:>10}  {r['stages']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+CPU microbenchmarks for the pure-Python verification stages
+
+Times the stages that need neither MongoDB nor images, over fixed
+corpora of realistic and adversarial inputs:
+
+- BatchIntelligenceEngine.analyze_batch
+- barcode_service.parse_barcode_intelligently / validate_batch_format
+- the regex checks of batch_pattern_service.analyze_batch_pattern
+- cdsco_verification_service.verify_manufacturer (cached) and the
+  registry match behind it (uncached)
+- brand_mapping_service.find_manufacturer_by_brand
+
+Each benchmark runs its whole corpus per iteration and reports the best
+of --repeat samples, in microseconds per call. The cached
+verify_manufacturer benchmarks start every sample from a match cache
+holding exactly their corpus, whatever ran before them. Raw times
+depend on the machine, so every run also times a fixed pure-Python
+calibration loop and benchmarks are compared with
+scripts/cpu_benchmark_baseline.json as multiples of it. A benchmark
+that got slower than its baseline by more than the threshold in two
+measurements, or that raises on its corpus, is a regression. --update-baseline records the
+median of --baseline-runs fresh processes.
+
+Usage (from backend/):
+    python scripts/benchmark_cpu_engines.py [--repeat 15] [--only cdsco] [--threshold 0.3]
+    python scripts/benchmark_cpu_engines.py --update-baseline [--baseline-runs 5]
+
+Exits non-zero on a regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+sys.path.insert(0, '.')
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "cpu_benchmark_baseline.json")
+
+# Settings are required at import time; values are never used to connect
+DUMMY_ENV = {
+    "MONGO_URL": "mongodb://localhost:27017",
+    "DATABASE_NAME": "cpubench",
+    "JWT_SECRET": "cpubench",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+for _key, _value in DUMMY_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+DEFAULT_THRESHOLD = 0.3
+
+# ---------------------------------------------------------------------------
+# Corpora
+# ---------------------------------------------------------------------------
+
+REALISTIC_BATCHES = [
+    "BD-0111", "CPL20260101", "AMX-IND-9923", "BD-24A7781", "BATCH001", "SUN-123456",
+    "LUP2024A7781", "TOR-88213", "DL2024A", "CRO1234", "SQ-240112", "ACI-99812",
+    "INC20250317", "PCM-5521", "AB2300012345", "GSK-KX2291", "MH24B0917", "B12345",
+]
+
+ADVERSARIAL_BATCHES = [
+    "", "A", "  ", "FAKE0000", "TEST", "000000", "AAAAAAAAAAAA", "123456789",
+    "1" * 60, "x" * 5000, "A-" + "0" * 500, "ABC" * 1000, "12345678901234567890",
+    "BD-" + "9" * 2000 + "!", "ñandú-ÄÖÜ-批号", "batch with spaces", "\x00\x01\x02",
+    "-" * 100, "a" * 30 + "!", "_" * 200, "Z" * 9 + "1" * 9 + "@" * 9,
+]
+
+REALISTIC_BARCODES = [
+    "BD-0111|Beximco|P123", "CPL20260101|Cipla|AMX500", "CPL2026_Cipla_AMX500",
+    "8901234567890", "SUN-123456-SunPharma", "DL2024A", "LUP2024A7781|Lupin Limited",
+    "12345678", "AMX-IND-9923",
+]
+
+ADVERSARIAL_BARCODES = [
+    "", "|", "|" * 5000, "_".join(["x"] * 5000), "-" * 10000, "9" * 14, "9" * 7,
+    "A" * 20000, " | | ", "批号|制造商|产品", "\n\t|\r",
+]
+
+REALISTIC_MANUFACTURERS = [
+    "Sun Pharmaceutical Industries Limited", "Cipla Limited", "cipla", "Lupin",
+    "Dr. Reddy's Laboratories Limited", "Torrent Pharmaceuticals", "Abbott India",
+    "Glenmark Pharmaceuticals Limited, Mumbai", "Unknown Pharma Pvt Ltd", "Bayer",
+]
+
+ADVERSARIAL_MANUFACTURERS = [
+    "x" * 2000, "Pharma" * 300, "Limited " * 200, "ñ" * 500, "a", "ltd",
+    "Sun Pharmaceutical Industries Limited " * 20, "%$#@!" * 100,
+]
+
+REALISTIC_BRANDS = [
+    "Crocin", "Dolo", "dolo 650", "Augmentin", "Azithral", "Pantoprazole", "Metformin",
+    "Combiflam", "crocin advance", "Unknownix",
+]
+
+ADVERSARIAL_BRANDS = [
+    "", "a", "x" * 5000, "Crocin" * 500, "批号", "   ", "Paracetamol " * 100,
+]
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+
+def calibration():
+    """Fixed pure-Python workload used to normalize timings across machines"""
+    pattern = re.compile(r"^[A-Z]{2,4}-\d{4,6}$")
+    total = 0
+    for i in range(2000):
+        text = f"BD-{i:04d}"
+        if pattern.match(text):
+            total += len(text.lower())
+        total += sum(1 for c in text if c.isdigit())
+    return total
+
+
+def sync_benchmark(func, corpus):
+    def run():
+        for item in corpus:
+            func(item)
+    return run
+
+
+def async_benchmark(loop, func, corpus):
+    async def run_corpus():
+        for item in corpus:
+            await func(item)
+
+    def run():
+        loop.run_until_complete(run_corpus())
+    return run
+
+
+def warmed_cache(run):
+    """Setup that resets the CDSCO match cache and fills it with run's corpus"""
+    from app.services.cdsco_verification_service import match_cache
+
+    def setup():
+        match_cache.invalidate()
+        run()
+    return setup
+
+
+def build_benchmarks(loop) -> dict:
+    """{name: (callable running the corpus once, corpus size, setup or None)}"""
+    from app.services.batch_intelligence_engine import intelligence_engine
+    from app.services.barcode_service import parse_barcode_intelligently, validate_batch_format
+    from app.services.batch_pattern_service import _batch_pattern_signals
+    from app.services.cdsco_verification_service import verify_manufacturer, _match_manufacturer
+    from app.services.brand_mapping_service import find_manufacturer_by_brand
+
+    def match_uncached(name):
+        return _match_manufacturer(name.lower().strip())
+
+    corpora = {
+        "batch": (REALISTIC_BATCHES, ADVERSARIAL_BATCHES),
+        "barcode": (REALISTIC_BARCODES, ADVERSARIAL_BARCODES),
+        "manufacturer": (REALISTIC_MANUFACTURERS, ADVERSARIAL_MANUFACTURERS),
+        "brand": (REALISTIC_BRANDS, ADVERSARIAL_BRANDS),
+    }
+    # (name, corpus, function, is_async, needs a warm match cache)
+    targets = [
+        ("batch_intelligence.analyze_batch", "batch", intelligence_engine.analyze_batch, False, False),
+        ("barcode.parse_barcode_intelligently", "barcode", parse_barcode_intelligently, False, False),
+        ("barcode.validate_batch_format", "batch", validate_batch_format, False, False),
+        ("batch_pattern.regex_signals", "batch", _batch_pattern_signals, False, False),
+        ("cdsco.verify_manufacturer", "manufacturer", verify_manufacturer, True, True),
+        ("cdsco.match_manufacturer_uncached", "manufacturer", match_uncached, False, False),
+        ("brand_mapping.find_manufacturer_by_brand", "brand", find_manufacturer_by_brand, True, False),
+    ]
+
+    benchmarks = {}
+    for name, corpus_name, func, is_async, cached in targets:
+        for kind, corpus in zip(("realistic", "adversarial"), corpora[corpus_name]):
+            if is_async:
+                run = async_benchmark(loop, func, corpus)
+            else:
+                run = sync_benchmark(func, corpus)
+            benchmarks[f"{name}[{kind}]"] = (run, len(corpus), warmed_cache(run) if cached else None)
+    return benchmarks
+
+
+def calibrate_number(run) -> int:
+    """Calls of run() per timing sample (about 0.05 s worth)"""
+    number = 1
+    while True:
+        seconds = timeit.Timer(run).timeit(number)
+        if seconds >= 0.05:
+            return number
+        number *= 2 if seconds > 0.005 else 10
+
+
+def measure_interleaved(benchmarks: dict, repeat: int) -> tuple:
+    """
+    Best time per call of every benchmark and of the calibration loop
+
+    Samples are taken in rounds over all benchmarks rather than
+    back to back, so a slow spell of a shared machine costs each
+    benchmark one sample instead of all of its samples. A benchmark's
+    setup runs, untimed, before its calibration and each of its samples.
+    """
+    runs = {"calibration": calibration, **{name: run for name, (run, _, _) in benchmarks.items()}}
+    setups = {name: setup for name, (_, _, setup) in benchmarks.items() if setup}
+    numbers = {}
+    errors = {}
+    for name, run in runs.items():
+        try:
+            if name in setups:
+                setups[name]()
+            numbers[name] = calibrate_number(run)
+        except Exception as e:
+            errors[name] = e
+
+    best = {name: float("inf") for name in numbers}
+    for _ in range(repeat):
+        for name, number in numbers.items():
+            if name in setups:
+                setups[name]()
+            seconds = timeit.Timer(runs[name]).timeit(number) / number
+            best[name] = min(best[name], seconds)
+    return best, errors
+
+
+def measure_in_subprocesses(args) -> tuple:
+    """
+    Median calibration and per-benchmark timings over --baseline-runs fresh
+    processes. A single process can land a few microseconds off on the
+    regex-heavy benchmarks, so recording one run bakes that into the baseline.
+    """
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.baseline_runs):
+            path = os.path.join(tmp, f"run{i}.json")
+            command = [sys.executable, os.path.abspath(__file__), "--repeat", str(args.repeat), "--json", path]
+            if args.only:
+                command += ["--only", args.only]
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=False)
+            with open(path) as f:
+                runs.append(json.load(f))
+            print(f"run {i + 1}/{args.baseline_runs}: calibration {runs[-1]['calibration_us']:.1f} us")
+
+    results = {}
+    for name in runs[0]["benchmarks"]:
+        results[name] = {
+            key: round(statistics.median(run["benchmarks"][name][key] for run in runs), digits)
+            for key, digits in (("us_per_call", 3), ("relative", 5))
+        }
+        print(f"{name:<58}{results[name]['us_per_call']:>10.2f}{results[name]['relative']:>10.4f}")
+    return statistics.median(run["calibration_us"] for run in runs), results
+
+
+def write_baseline(baseline: dict, args, threshold: float, calibration_us: float, results: dict):
+    if args.only:
+        results = {**baseline.get("benchmarks", {}), **results}
+    with open(BASELINE_PATH, "w") as f:
+        json.dump({
+            "threshold": threshold,
+            "calibration_us": round(calibration_us, 3),
+            "python": platform.python_version(),
+            "benchmarks": results
+        }, f, indent=2)
+        f.write("\n")
+    print(f"\nBaseline written to {BASELINE_PATH}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--only", default=None, help="run benchmarks whose name contains this")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="allowed slowdown as a fraction (default from the baseline file)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--baseline-runs", type=int, default=5,
+                        help="fresh processes whose median is recorded by --update-baseline")
+    parser.add_argument("--json", default=None, help="write results to this file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    threshold = args.threshold if args.threshold is not None else baseline.get("threshold", DEFAULT_THRESHOLD)
+
+    if args.update_baseline and args.baseline_runs > 1:
+        calibration_us, results = measure_in_subprocesses(args)
+        write_baseline(baseline, args, threshold, calibration_us, results)
+        return
+
+    loop = asyncio.new_event_loop()
+    benchmarks = build_benchmarks(loop)
+    if args.only:
+        benchmarks = {name: b for name, b in benchmarks.items() if args.only in name}
+
+    best, errors = measure_interleaved(benchmarks, args.repeat)
+    failures = [f"{name} raised {e!r}" for name, e in errors.items()]
+    calibration_us = best["calibration"] * 1e6
+    expected = {name: b.get("relative") for name, b in baseline.get("benchmarks", {}).items()}
+    measured = {
+        name: (best[name] / size * 1e6, best[name] * 1e6 / calibration_us)
+        for name, (_, size, _) in benchmarks.items() if name in best
+    }
+
+    # A slow spell of a shared machine can push one benchmark over the
+    # threshold; measure those once more and keep the better run, so only
+    # a slowdown that reproduces fails the gate.
+    over = [
+        name for name, (_, relative) in measured.items()
+        if expected.get(name) and relative / expected[name] - 1 > threshold
+    ]
+    if over and not args.update_baseline:
+        recheck, _ = measure_interleaved({name: benchmarks[name] for name in over}, args.repeat)
+        for name in over:
+            if name not in recheck:
+                continue
+            size = benchmarks[name][1]
+            relative = recheck[name] / recheck["calibration"]
+            if relative < measured[name][1]:
+                measured[name] = (recheck[name] / size * 1e6, relative)
+    loop.close()
+
+    print(f"calibration: {calibration_us:.1f} us (baseline {baseline.get('calibration_us', 0):.1f} us)")
+    if over and not args.update_baseline:
+        print(f"re-measured: {', '.join(over)}")
+    print(f"\n{'benchmark':<58}{'us/call':>10}{'relative':>10}{'baseline':>10}{'change':>9}")
+
+    results = {}
+    for name, (per_call_us, relative) in measured.items():
+        results[name] = {"us_per_call": round(per_call_us, 3), "relative": round(relative, 5)}
+
+        if expected.get(name):
+            change = relative / expected[name] - 1
+            marker = " !" if change > threshold else ""
+            print(f"{name:<58}{per_call_us:>10.2f}{relative:>10.4f}{expected[name]:>10.4f}{change:>+8.0%}{marker}")
+            if change > threshold:
+                failures.append(f"{name} is {change:+.0%} vs baseline")
+        else:
+            print(f"{name:<58}{per_call_us:>10.2f}{relative:>10.4f}{'-':>10}{'-':>9}")
+    for failure in failures:
+        if " raised " in failure:
+            print(f"ERROR: {failure}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"calibration_us": round(calibration_us, 3), "benchmarks": results}, f, indent=2)
+
+    if args.update_baseline:
+        write_baseline(baseline, args, threshold, calibration_us, results)
+        return
+
+    if failures:
+        print("\nREGRESSION: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Cold-import regression benchmark
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters
+and compares the result with scripts/import_time_budget.json:
+
+- none of the deferred heavy modules (cv2, pyzbar, PIL, sklearn, ...)
+  may be imported by app.main
+- the median cumulative import time of app.main must stay under the
+  budget (machine dependent; override with --budget-ms)
+
+Usage (from backend/):
+    python scripts/benchmark_import_time.py [--runs 5] [--top 15] [--budget-ms 1500]
+
+Exits non-zero on a regression.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "import_time_budget.json")
+
+# Settings are required at import time; values are never used to connect
+DUMMY_ENV = {
+    "MONGO_URL": "mongodb://localhost:27017",
+    "DATABASE_NAME": "importtime",
+    "JWT_SECRET": "importtime",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+
+
+def run_importtime() -> dict:
+    """Cumulative import time in microseconds per module for one cold import"""
+    env = {**DUMMY_ENV, **os.environ}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import app.main failed:\n{proc.stderr[-2000:]}")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    with open(BUDGET_PATH) as f:
+        budget = json.load(f)
+    budget_ms = args.budget_ms or budget["app_main_ms"]
+
+    runs = [run_importtime() for _ in range(args.runs)]
+    totals = [r["app.main"] / 1000 for r in runs]
+    median_ms = statistics.median(totals)
+
+    last = runs[-1]
+    print(f"app.main cold import: median {median_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}); budget {budget_ms:.0f} ms")
+    print(f"\nSlowest top-level imports (cumulative ms, last run):")
+    top_level = {name: us for name, us in last.items() if "." not in name and name != "app"}
+    for name, us in sorted(top_level.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:8.1f}  {name}")
+
+    failures = []
+    loaded = [m for m in budget["deferred_modules"] if m in last]
+    if loaded:
+        failures.append(f"deferred modules imported at startup: {', '.join(loaded)}")
+    if median_ms > budget_ms:
+        failures.append(f"app.main import {median_ms:.0f} ms exceeds budget {budget_ms:.0f} ms")
+
+    if failures:
+        print("\nREGRESSION: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+/public/verify/medicine throughput benchmark
+
+Drives the app in-process through httpx's ASGI transport with a fixed
+number of concurrent clients, so the measurement covers routing,
+middleware, the verification engine and logging but not the network.
+Log output goes wherever stdout points; redirect it to a file or a pipe
+to match production rather than a terminal.
+
+Usage (from backend/, with MongoDB configured in .env):
+    python scripts/benchmark_verify_throughput.py [--requests 2000] [--concurrency 32]
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+sys.path.insert(0, '.')
+
+import httpx
+
+MEDICINES = ["Crocin", "Dolo 650", "Augmentin", "Azithral", "Pan 40", "Unknownix"]
+BATCHES = [None, "CRO1234", "DL2024A", None, "FAKE0000"]
+
+
+async def run(app, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in counter:
+                params = {"medicine_name": MEDICINES[i % len(MEDICINES)]}
+                batch = BATCHES[i % len(BATCHES)]
+                if batch:
+                    params["batch_number"] = batch
+                started = time.perf_counter()
+                response = await client.post("/public/verify/medicine", params=params)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "statuses": statuses
+    }
+
+
+def main(app=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    if app is None:
+        from app.main import app
+    # The ASGI transport does not run the lifespan
+    from app.core.log import setup_logging, shutdown_logging
+    setup_logging()
+    try:
+        result = asyncio.run(run(app, args.requests, args.concurrency))
+    finally:
+        shutdown_logging()
+
+    print(json.dumps(result), file=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
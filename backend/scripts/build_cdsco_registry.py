@@ -0,0 +1,21 @@
+"""
+Build the binary CDSCO registry from a JSON dump
+
+    python scripts/build_cdsco_registry.py [input.json] [output.bin]
+
+Defaults to app/data/cdsco_manufacturers.json -> app/data/cdsco_registry.bin.
+The output is replaced atomically, so running workers with
+CDSCO_REGISTRY_PATH pointing at it pick the new registry up on their next
+file check without a restart.
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.services.cdsco_registry import load_registry, write_registry
+
+source = sys.argv[1] if len(sys.argv) > 1 else "app/data/cdsco_manufacturers.json"
+target = sys.argv[2] if len(sys.argv) > 2 else "app/data/cdsco_registry.bin"
+
+registry = load_registry(source)
+size = write_registry(list(registry), target)
+print(f"Wrote {len(registry)} manufacturers to {target} ({size / 1024:.1f} KB)")
@@ -0,0 +1,319 @@
+"""
+Synthetic data for load tests
+
+Generates suppliers, medicines, supplies, public scan logs and alerts
+with the same document shapes the app writes. Everything is derived from
+the index of a document and a seed, so ids and batch numbers can be
+recomputed without reading the database: scripts/load_test.py uses that
+to build requests for data that exists (or deliberately does not).
+
+Usage (from backend/):
+    python scripts/generate_load_data.py --supplies 2000000 --drop
+    python scripts/generate_load_data.py --mongomock --supplies 100000   # time generation only
+
+The default target is settings.mongo_url / settings.database_name; pass
+--mongo-url / --database to point elsewhere. --mongomock generates into
+an in-memory mongomock-motor client, which only lives as long as the
+process, so it is mostly useful through load_test.py --mongomock.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+sys.path.insert(0, '.')
+
+from bson import ObjectId
+
+from app.services.predictive_service import priority_fields
+
+BRAND_DATA_PATH = Path(__file__).resolve().parent.parent / "app" / "data" / "medicine_brand_mapping.json"
+
+# Fixed reference time, so repeated runs produce identical documents
+EPOCH = datetime(2025, 1, 1)
+
+CITIES = [
+    ("Mumbai", 19.0760, 72.8777), ("Delhi", 28.7041, 77.1025), ("Bangalore", 12.9716, 77.5946),
+    ("Hyderabad", 17.3850, 78.4867), ("Chennai", 13.0827, 80.2707), ("Kolkata", 22.5726, 88.3639),
+    ("Pune", 18.5204, 73.8567), ("Ahmedabad", 23.0225, 72.5714), ("Jaipur", 26.9124, 75.7873),
+    ("Lucknow", 26.8467, 80.9462), ("Patna", 25.5941, 85.1376), ("Guwahati", 26.1445, 91.7362),
+]
+VERDICTS = ["SAFE", "LIKELY_AUTHENTIC", "UNKNOWN", "SUSPICIOUS", "HIGH_RISK_FAKE"]
+# intake_supply raises HIGH alerts for rejected supplies, MEDIUM otherwise
+SEVERITIES = ["MEDIUM", "HIGH"]
+# Flags raised at intake by run_compliance_check and detect_fake_medicine
+RISK_FLAGS = [
+    "EXPIRED", "BLACKLISTED_SUPPLIER", "UNVERIFIED_SUPPLIER", "TEMPERATURE_ALERT",
+    "DUPLICATE_BATCH_DIFFERENT_SUPPLIER", "MEDICINE_NOT_REGISTERED", "NEW_BATCH"
+]
+# Highest storage temperature run_compliance_check accepts
+MAX_TEMPERATURE = 8
+# Batch numbers matching the known fake patterns of the batch intelligence checks
+FAKE_BATCHES = ["FAKE0000", "TEST1234", "000000", "XXXX999", "SAMPLE01"]
+
+# Fractions of supplies that are fake-looking, soft-deleted, stored too
+# warm or reported as duplicates of another supplier's batch
+FAKE_RATE = 0.01
+DELETED_RATE = 0.02
+TEMPERATURE_ALERT_RATE = 0.08
+DUPLICATE_RATE = 0.02
+
+
+def object_id(kind: int, i: int) -> ObjectId:
+    """Deterministic ObjectId: one 4-byte kind prefix, the index in the rest"""
+    return ObjectId(f"{kind:08x}{i:016x}")
+
+
+def supplier_id(i: int) -> ObjectId:
+    return object_id(1, i)
+
+
+def medicine_id(i: int) -> ObjectId:
+    return object_id(2, i)
+
+
+def supply_id(i: int) -> ObjectId:
+    return object_id(3, i)
+
+
+def load_brands() -> list:
+    with open(BRAND_DATA_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)["medicine_brands"]
+
+
+def batch_number(i: int, seed: int = 0) -> str:
+    """Batch number of supply i: a two-letter prefix, year digits and a serial"""
+    rng = random.Random(seed * 1_000_003 + i)
+    if rng.random() < FAKE_RATE:
+        return f"{rng.choice(FAKE_BATCHES)}{i % 100:02d}"
+    prefix = chr(65 + i % 26) + chr(65 + (i // 26) % 26)
+    return f"{prefix}{20 + i % 6}{i:07d}"
+
+
+def supplier_doc(i: int, seed: int = 0) -> dict:
+    rng = random.Random(seed * 7 + i)
+    city, lat, lng = CITIES[i % len(CITIES)]
+    return {
+        "_id": supplier_id(i),
+        "name": f"{city} Pharma Distributors {i}",
+        "email": f"supplier{i}@example.com",
+        "phone": f"+91-{9000000000 + i}",
+        "address": f"{i} Industrial Area, {city}",
+        "lat": round(lat + rng.uniform(-0.3, 0.3), 4),
+        "lng": round(lng + rng.uniform(-0.3, 0.3), 4),
+        "verified": rng.random() < 0.8,
+        "blacklisted": rng.random() < 0.03,
+        "is_deleted": False,
+        "created_at": EPOCH - timedelta(days=rng.randint(30, 1000))
+    }
+
+
+def medicine_doc(i: int, brands: list, seed: int = 0) -> dict:
+    rng = random.Random(seed * 11 + i)
+    brand = brands[i % len(brands)]
+    strength = (i // len(brands)) * 50 + 100
+    return {
+        "_id": medicine_id(i),
+        "name": brand["brand_name"] if i < len(brands) else f"{brand['brand_name']} {strength}",
+        "manufacturer": rng.choice(brand["manufacturers"]),
+        "category": brand["category"],
+        "description": None,
+        "is_deleted": False,
+        "created_at": EPOCH - timedelta(days=rng.randint(30, 1000))
+    }
+
+
+@lru_cache(maxsize=None)
+def supplier_standing(i: int, seed: int = 0) -> tuple:
+    """(verified, blacklisted) of supplier i, as run_compliance_check reads them"""
+    supplier = supplier_doc(i, seed)
+    return supplier["verified"], supplier["blacklisted"]
+
+
+def supply_doc(i: int, suppliers: int, medicines: int, seed: int = 0) -> dict:
+    """
+    Supply i as intake_supply stores it
+
+    Compliance status and flags follow run_compliance_check, fake status
+    and flags follow detect_fake_medicine, and the priority fields come
+    from the real scorer, all as of created_at.
+    """
+    rng = random.Random(seed * 13 + i)
+    created_at = EPOCH - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+    supplier = rng.randrange(suppliers)
+    expiry_date = created_at + timedelta(days=rng.randint(-30, 900))
+    if rng.random() < TEMPERATURE_ALERT_RATE:
+        temperature = round(rng.uniform(MAX_TEMPERATURE + 0.1, 30), 1)
+    else:
+        temperature = round(rng.uniform(2, MAX_TEMPERATURE), 1)
+
+    # run_compliance_check
+    status, flags = "ACCEPTED", []
+    if expiry_date < created_at:
+        status = "REJECTED"
+        flags.append("EXPIRED")
+    verified, blacklisted = supplier_standing(supplier, seed)
+    if blacklisted:
+        status = "REJECTED"
+        flags.append("BLACKLISTED_SUPPLIER")
+    if not verified:
+        flags.append("UNVERIFIED_SUPPLIER")
+    if temperature > MAX_TEMPERATURE:
+        flags.append("TEMPERATURE_ALERT")
+
+    # detect_fake_medicine
+    batch = batch_number(i, seed)
+    if batch.startswith(tuple(FAKE_BATCHES)):
+        fake_status = "FAKE"
+        flags.append("MEDICINE_NOT_REGISTERED")
+    elif rng.random() < DUPLICATE_RATE:
+        fake_status = "SUSPICIOUS"
+        flags.append("DUPLICATE_BATCH_DIFFERENT_SUPPLIER")
+    else:
+        fake_status = "AUTHENTIC"
+        flags.append("NEW_BATCH")
+
+    supply = {
+        "_id": supply_id(i),
+        "medicine_id": medicine_id(rng.randrange(medicines)),
+        "supplier_id": supplier_id(supplier),
+        "batch_number": batch,
+        "expiry_date": expiry_date,
+        "quantity": rng.randint(10, 5000),
+        "temperature": temperature,
+        "compliance_status": status,
+        "risk_flags": flags,
+        "fake_status": fake_status,
+        "is_deleted": rng.random() < DELETED_RATE,
+        "created_at": created_at
+    }
+    supply.update(priority_fields(supply, created_at))
+    return supply
+
+
+def scan_log_doc(i: int, supplies: int, seed: int = 0) -> dict:
+    rng = random.Random(seed * 17 + i)
+    supply = rng.randrange(supplies)
+    timestamp = EPOCH - timedelta(seconds=rng.randint(0, 90 * 24 * 3600))
+    return {
+        "input_type": rng.choice(["batch", "batch", "medicine_name", "barcode"]),
+        "batch_number": batch_number(supply, seed),
+        "verdict": rng.choice(VERDICTS),
+        "confidence": round(rng.uniform(0, 100), 1),
+        "risk_flags": [],
+        "device_id": f"device-{rng.randrange(50000)}",
+        "ip_address": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+        "timestamp": timestamp,
+        "created_at": timestamp
+    }
+
+
+def alert_doc(i: int, supplies: int, seed: int = 0) -> dict:
+    rng = random.Random(seed * 19 + i)
+    return {
+        "supply_id": str(supply_id(rng.randrange(supplies))),
+        "message": rng.choice(RISK_FLAGS),
+        "severity": rng.choice(SEVERITIES),
+        "created_at": EPOCH - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+    }
+
+
+async def insert_generated(collection, count: int, make, chunk_size: int) -> float:
+    """insert_many make(i) for i in range(count) in chunks; returns seconds"""
+    started = time.perf_counter()
+    for start in range(0, count, chunk_size):
+        docs = [make(i) for i in range(start, min(count, start + chunk_size))]
+        await collection.insert_many(docs, ordered=False)
+    return time.perf_counter() - started
+
+
+async def generate(database, suppliers: int = 200, medicines: int = 500, supplies: int = 100_000,
+                   scan_logs: int = 50_000, alerts: int = 10_000, seed: int = 0,
+                   chunk_size: int = 5000, drop: bool = False) -> dict:
+    """Fill database (a Motor or mongomock-motor database) with synthetic documents"""
+    brands = load_brands()
+    plan = [
+        ("suppliers", suppliers, lambda i: supplier_doc(i, seed)),
+        ("medicines", medicines, lambda i: medicine_doc(i, brands, seed)),
+        ("supplies", supplies, lambda i: supply_doc(i, suppliers, medicines, seed)),
+        ("public_scan_logs", scan_logs, lambda i: scan_log_doc(i, supplies, seed)),
+        ("alerts", alerts, lambda i: alert_doc(i, supplies, seed)),
+    ]
+    report = {}
+    for name, count, make in plan:
+        if drop:
+            await database[name].drop()
+        seconds = await insert_generated(database[name], count, make, chunk_size)
+        report[name] = {"documents": count, "seconds": round(seconds, 2)}
+        print(f"  {name}: {count} documents in {seconds:.1f}s", file=sys.stderr)
+    return report
+
+
+def use_mongomock():
+    """Point app.db.mongodb at an in-memory mongomock-motor client"""
+    from mongomock_motor import AsyncMongoMockClient
+    from app.db import mongodb
+    mongodb._client = AsyncMongoMockClient()
+    return mongodb._client
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--suppliers", type=int, default=200)
+    parser.add_argument("--medicines", type=int, default=500)
+    parser.add_argument("--supplies", type=int, default=100_000)
+    parser.add_argument("--scan-logs", type=int, default=50_000)
+    parser.add_argument("--alerts", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def scale_from_args(args) -> dict:
+    return {
+        "suppliers": args.suppliers,
+        "medicines": args.medicines,
+        "supplies": args.supplies,
+        "scan_logs": args.scan_logs,
+        "alerts": args.alerts,
+        "seed": args.seed
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--mongo-url", default=None)
+    parser.add_argument("--database", default=None)
+    parser.add_argument("--mongomock", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--drop", action="store_true", help="drop the collections first")
+    parser.add_argument("--indexes", action="store_true", help="create the registered indexes afterwards")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    if args.mongo_url:
+        settings.mongo_url = args.mongo_url
+    if args.database:
+        settings.database_name = args.database
+    if args.mongomock:
+        use_mongomock()
+    from app.db.mongodb import db, close
+
+    target = "mongomock" if args.mongomock else f"{settings.mongo_url}/{settings.database_name}"
+    print(f"Generating into {target}", file=sys.stderr)
+    report = await generate(db, chunk_size=args.chunk_size, drop=args.drop, **scale_from_args(args))
+
+    if args.indexes:
+        from app.db.indexes import ensure_indexes
+        started = time.perf_counter()
+        result = await ensure_indexes()
+        report["indexes"] = {"seconds": round(time.perf_counter() - started, 2), "errors": result["errors"]}
+
+    close()
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
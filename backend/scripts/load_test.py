@@ -0,0 +1,281 @@
+"""
+Fixed-rate load test of the public verification API
+
+An open-loop driver: requests are started on a fixed schedule (--rps)
+whether or not earlier ones have finished, and latency is measured from
+the scheduled start, so a server that falls behind shows up as growing
+latency instead of a politely slower client. The request mix covers
+/public/verify/batch, /public/verify/medicine, /analytics/dashboard,
+/map/national and /supply/intake, built from the deterministic data of
+scripts/generate_load_data.py (same --seed and scale arguments).
+
+Results go to a JSON file per run (throughput, p50/p95/p99 per scenario
+and overall, the git commit) that --compare diffs against an earlier run.
+
+Usage (from backend/):
+    # against a running server, data generated beforehand
+    python scripts/generate_load_data.py --supplies 2000000 --drop --indexes
+    python scripts/load_test.py --url http://localhost:8000 --supplies 2000000 --rps 200 --duration 60 --out run.json
+
+    # in-process against mongomock-motor (no mongod needed)
+    python scripts/load_test.py --mongomock --supplies 20000 --rps 50 --duration 20 --out run.json
+
+    # compare two runs
+    python scripts/load_test.py --compare before.json after.json
+
+mongomock does not implement every aggregation operator the app uses
+(e.g. $convert in the batch lookup), so absolute numbers and some
+statuses only mean something against a real mongod.
+
+Requires httpx (and mongomock-motor for --mongomock).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+sys.path.insert(0, 'scripts')
+
+import httpx
+
+import generate_load_data as data
+
+DEFAULT_MIX = "verify_batch=50,verify_medicine=30,intake=10,dashboard=5,map=5"
+
+# Share of verify requests for batches that were never generated, and
+# share drawn from the hot set of recently scanned batches
+UNKNOWN_BATCH_RATE = 0.1
+HOT_BATCH_RATE = 0.5
+HOT_BATCHES = 1000
+
+
+class RequestFactory:
+    """Builds (scenario, method, path, kwargs) for request i, reproducibly"""
+
+    def __init__(self, mix: dict, scale: dict, run_tag: str):
+        self.scenarios = list(mix)
+        self.weights = list(mix.values())
+        self.scale = scale
+        self.run_tag = run_tag
+        self.brands = [b["brand_name"] for b in data.load_brands()]
+        self.rng = random.Random(scale["seed"])
+
+    def _existing_batch(self) -> str:
+        supplies = self.scale["supplies"]
+        if self.rng.random() < HOT_BATCH_RATE:
+            i = self.rng.randrange(min(HOT_BATCHES, supplies))
+        else:
+            i = self.rng.randrange(supplies)
+        return data.batch_number(i, self.scale["seed"])
+
+    def _batch(self) -> str:
+        if self.rng.random() < UNKNOWN_BATCH_RATE:
+            return f"ZZ{self.rng.randrange(10**8):08d}"
+        return self._existing_batch()
+
+    def build(self, i: int):
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        if scenario == "verify_batch":
+            return scenario, "POST", "/public/verify/batch", {"params": {"batch_number": self._batch()}}
+        if scenario == "verify_medicine":
+            params = {"medicine_name": self.rng.choice(self.brands)}
+            if self.rng.random() < 0.5:
+                params["batch_number"] = self._batch()
+            return scenario, "POST", "/public/verify/medicine", {"params": params}
+        if scenario == "dashboard":
+            return scenario, "GET", "/analytics/dashboard", {}
+        if scenario == "map":
+            return scenario, "GET", "/map/national", {}
+        if scenario == "intake":
+            payload = {
+                "medicine_id": str(data.medicine_id(self.rng.randrange(self.scale["medicines"]))),
+                "supplier_id": str(data.supplier_id(self.rng.randrange(self.scale["suppliers"]))),
+                "batch_number": f"LT{self.run_tag}{i:07d}",
+                "expiry_date": (datetime.utcnow() + timedelta(days=self.rng.randint(-10, 700))).isoformat(),
+                "quantity": self.rng.randint(10, 5000),
+                "temperature": round(self.rng.uniform(2, 30), 1)
+            }
+            return scenario, "POST", "/supply/intake", {"json": payload}
+        raise ValueError(f"Unknown scenario {scenario}")
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: list, seconds: float) -> dict:
+    """samples: (latency_ms, status) pairs"""
+    latencies = sorted(ms for ms, _ in samples)
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(n for status, n in statuses.items() if not status.isdigit() or int(status) >= 500)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "statuses": statuses
+    }
+
+
+async def drive(client: httpx.AsyncClient, factory: RequestFactory, rps: float, duration: float,
+                warmup: float, max_in_flight: int) -> dict:
+    """Fire requests on a fixed schedule; returns the per-scenario summary"""
+    loop = asyncio.get_running_loop()
+    samples = {}
+    in_flight = set()
+    dropped = 0
+    total = int(rps * (warmup + duration))
+    started = loop.time()
+    measure_from = started + warmup
+
+    async def fire(scheduled: float, scenario: str, method: str, path: str, kwargs: dict):
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if scheduled >= measure_from:
+            samples.setdefault(scenario, []).append(((loop.time() - scheduled) * 1000, status))
+
+    for i in range(total):
+        scheduled = started + i / rps
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        request = factory.build(i)
+        if len(in_flight) >= max_in_flight:
+            # The client would only queue more work behind the server
+            dropped += 1
+            continue
+        task = asyncio.create_task(fire(scheduled, *request))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.wait(in_flight)
+    seconds = loop.time() - measure_from
+
+    every = [sample for scenario_samples in samples.values() for sample in scenario_samples]
+    return {
+        "overall": {**summarize(every, seconds), "dropped": dropped},
+        "scenarios": {name: summarize(s, seconds) for name, s in sorted(samples.items())}
+    }
+
+
+def git_commit() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+async def run(args) -> dict:
+    scale = data.scale_from_args(args)
+    factory = RequestFactory(parse_mix(args.mix), scale, run_tag=f"{int(time.time()) % 100000:05d}")
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.max_in_flight)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            return await drive(client, factory, args.rps, args.duration, args.warmup, args.max_in_flight)
+
+    if args.mongomock:
+        data.use_mongomock()
+    from app.main import app
+    from app.db.mongodb import db
+    if args.mongomock:
+        print("Generating data into mongomock", file=sys.stderr)
+        await data.generate(db, **scale)
+
+    # The ASGI transport does not run the lifespan; run it around the test
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            return await drive(client, factory, args.rps, args.duration, args.warmup, args.max_in_flight)
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"{before['meta']['commit'] or before_path} -> {after['meta']['commit'] or after_path}")
+    print(f"{'scenario':<18}{'metric':<16}{'before':>12}{'after':>12}{'change':>10}")
+    rows = [("overall", before["overall"], after["overall"])]
+    rows += [(name, before["scenarios"].get(name), s) for name, s in after["scenarios"].items()]
+    for name, old, new in rows:
+        if old is None:
+            continue
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors"):
+            change = f"{(new[metric] - old[metric]) / old[metric] * 100:+.1f}%" if old[metric] else "-"
+            print(f"{name:<18}{metric:<16}{old[metric]:>12}{new[metric]:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=None, help="server base URL; in-process when omitted")
+    parser.add_argument("--mongomock", action="store_true", help="in-process, with generated data in mongomock-motor")
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds excluded from the results")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--out", default=None, help="JSON results file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two results files")
+    data.add_scale_arguments(parser)
+    parser.set_defaults(supplies=20_000, scan_logs=10_000, alerts=2_000)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = asyncio.run(run(args))
+    results["meta"] = {
+        **git_commit(),
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "target": args.url or ("in-process/mongomock" if args.mongomock else "in-process"),
+        "rps": args.rps,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "mix": parse_mix(args.mix),
+        "scale": data.scale_from_args(args),
+        "python": platform.python_version()
+    }
+
+    print(json.dumps(results["overall"]), file=sys.stderr)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+CDSCO registry memory measurement
+
+Builds a synthetic national-scale registry and reports the resident and
+proportional set size (RSS / PSS, from /proc/self/smaps_rollup) added by
+each representation:
+
+    list     - the former list of JSON dicts
+    columnar - CdscoRegistry built in memory
+    mmap     - CdscoRegistry memory-mapped from the binary file; PSS
+               shows the per-worker share once several workers map it
+
+Usage (from backend/, Linux):
+    python scripts/measure_cdsco_memory.py [--entries 200000] [--workers 4]
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+STATES = ["Maharashtra", "Gujarat", "Telangana", "Karnataka", "Uttar Pradesh", "Tamil Nadu",
+          "Himachal Pradesh", "West Bengal", "Andhra Pradesh", "Madhya Pradesh", "Punjab", "Sikkim"]
+WORDS = ["Sun", "Life", "Care", "Bio", "Pharma", "Health", "Remedies", "Labs", "Medi", "Gen",
+         "Cure", "Vita", "Nova", "Zen", "Herbal", "Organics", "Formulations", "Sciences"]
+SUFFIXES = ["Limited", "Pvt. Ltd.", "Private Limited", "Industries", "LLP"]
+
+
+def synthetic_registry(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "manufacturer_name": f"{' '.join(rng.sample(WORDS, 3))} {i} {rng.choice(SUFFIXES)}",
+            "country": "India",
+            "status": "Approved" if rng.random() < 0.86 else "Provisional",
+            "category": rng.choice(["Allopathic", "Ayurvedic", "Homeopathic"]),
+            "state": rng.choice(STATES),
+        }
+        for i in range(count)
+    ]
+
+
+def memory_kb() -> dict:
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1].lower()] = int(parts[1])
+    return values
+
+
+def measure(build) -> dict:
+    gc.collect()
+    before = memory_kb()
+    obj = build()
+    # Touch every page the lookups would
+    for _ in obj:
+        pass
+    gc.collect()
+    after = memory_kb()
+    result = {k: round((after[k] - before[k]) / 1024, 1) for k in before}
+    del obj
+    return result
+
+
+def _worker(path, ready, done):
+    from app.services.cdsco_registry import CdscoRegistry
+    registry = CdscoRegistry.open(path)
+    for _ in registry:
+        pass
+    ready.set()
+    done.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from app.services.cdsco_registry import CdscoRegistry, write_registry
+
+    entries = synthetic_registry(args.entries)
+    raw = json.dumps(entries)
+    path = os.path.join(tempfile.mkdtemp(), "cdsco_registry.bin")
+    file_size = write_registry(entries, path)
+    del entries
+
+    print(f"{args.entries} manufacturers, binary file {file_size / 1048576:.1f} MB")
+    print(f"list of dicts : {measure(lambda: json.loads(raw))} MB")
+    print(f"columnar      : {measure(lambda: CdscoRegistry.from_entries(json.loads(raw)))} MB "
+          "(includes the transient JSON parse)")
+    print(f"mmap          : {measure(lambda: CdscoRegistry.open(path))} MB")
+
+    # Several workers mapping the same file share its pages
+    ready = [multiprocessing.Event() for _ in range(args.workers)]
+    done = multiprocessing.Event()
+    procs = [multiprocessing.Process(target=_worker, args=(path, r, done)) for r in ready]
+    for p in procs:
+        p.start()
+    for r in ready:
+        r.wait()
+    pss = []
+    for p in procs:
+        with open(f"/proc/{p.pid}/smaps_rollup") as f:
+            pss.append(next(int(l.split()[1]) for l in f if l.startswith("Pss:")))
+    done.set()
+    for p in procs:
+        p.join()
+    print(f"{args.workers} workers mapping the file: PSS per worker "
+          f"{[round(v / 1024, 1) for v in pss]} MB (whole process, file pages split between workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Soft-delete flag migration
+
+Sets is_deleted: False on supplies stored before intake set the flag.
+The usage-priority listing reads the active_* partial indexes, which
+only cover documents with an explicit False. Run once after upgrading:
+    python scripts/normalize_soft_delete_flags.py
+"""
+import asyncio
+import sys
+sys.path.insert(0, '.')
+
+from app.db.indexes import normalize_soft_delete_flags
+
+
+async def main():
+    updated = await normalize_soft_delete_flags()
+    for name, count in updated.items():
+        print(f"Set is_deleted: False on {count} {name}")
+
+
+asyncio.run(main())
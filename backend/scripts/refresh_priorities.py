@@ -0,0 +1,32 @@
+"""
+Daily usage-priority refresh
+
+Run once a day (e.g. a Render cron job):
+    python scripts/refresh_priorities.py
+
+Stored priorities only change when a supply is written or when this job
+runs. Without the cron, supplies that move closer to expiry keep their
+old score and recommendation in the usage-priority listing.
+
+Once after deploying stored priorities, score the existing supplies
+(the listing skips supplies without a priority_score):
+    python scripts/refresh_priorities.py --backfill
+"""
+import asyncio
+import sys
+sys.path.insert(0, '.')
+
+from app.services.predictive_service import backfill_priorities, refresh_expiry_crossings
+
+
+async def main():
+    if "--backfill" in sys.argv:
+        result = await backfill_priorities()
+        print(f"Backfilled priority for {result['updated']} supplies")
+
+    result = await refresh_expiry_crossings()
+    print(f"Refreshed {result['updated']} supplies crossing an expiry boundary "
+          f"between {result['since']} and {result['until']}")
+
+
+asyncio.run(main())
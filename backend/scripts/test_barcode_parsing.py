@@ -0,0 +1,43 @@
+"""
+Test: barcode payload parsing used by /scan/medicine and /public/verify/barcode
+"""
+import sys
+sys.path.insert(0, 'backend')
+
+from app.services.barcode_service import parse_barcode_intelligently
+
+
+def test_pipe_only_keeps_whole_batch():
+    """/scan/medicine splits on '|' only; dashed and numeric batches stay whole"""
+    cases = {
+        "HML-2024-01": ("HML-2024-01", None, None),
+        "HML_2024_01": ("HML_2024_01", None, None),
+        "89012345": ("89012345", None, None),
+        "8901234567890": ("8901234567890", None, None),
+        "BATCH001": ("BATCH001", None, None),
+        "HML-2024-01|Cipla Limited|P42": ("HML-2024-01", "Cipla Limited", "P42"),
+        "12345678|Sun Pharma": ("12345678", "Sun Pharma", None),
+    }
+    for payload, expected in cases.items():
+        parsed = parse_barcode_intelligently(payload, pipe_only=True)
+        got = (parsed["batch_number"], parsed["manufacturer"], parsed["product_code"])
+        assert got == expected, f"{payload!r}: expected {expected}, got {got}"
+
+    print(f"✅ {len(cases)} payloads parsed with pipe-only semantics")
+
+
+def test_intelligent_formats():
+    """The public barcode flow still recognises separator and EAN/UPC formats"""
+    parsed = parse_barcode_intelligently("HML-2024-01")
+    assert (parsed["batch_number"], parsed["format"]) == ("HML", "dash_separated"), parsed
+
+    parsed = parse_barcode_intelligently("8901234567890")
+    assert parsed["batch_number"] is None and parsed["product_code"] == "8901234567890", parsed
+    assert parsed["format"] == "ean_upc", parsed
+
+    print("✅ Separator and EAN/UPC formats parsed by the intelligent parser")
+
+
+if __name__ == "__main__":
+    test_pipe_only_keeps_whole_batch()
+    test_intelligent_formats()
@@ -0,0 +1,77 @@
+"""
+Test: hourly scan frequency buckets and the scan history signal
+
+Needs the MongoDB of the .env settings; the buckets go to a throwaway
+collection that is dropped afterwards. Scan history is off by default
+(verification_signal_weights["scan_history"] = 0), so both the default
+and the enabled path are exercised.
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime
+sys.path.insert(0, 'backend')
+
+from app.core.config import settings
+from app.db.mongodb import get_collection
+from app.services import scan_frequency_service
+from app.services.public_verification_engine_v2 import _count_scans
+from app.services.verification_context import NO_SUPPLY, VerificationContext
+from app.services.verification_engine import batch_engine
+
+BATCH = "SCANFREQ2026A1"
+NO_CDSCO = {"cdsco_match": False, "confidence_modifier": 0}
+NOW = datetime.utcnow()
+
+
+def scan_logs(n: int, suspicious: int) -> list:
+    return [
+        {"batch_number": BATCH, "verdict": "SUSPICIOUS" if i < suspicious else "SAFE", "timestamp": NOW}
+        for i in range(n)
+    ]
+
+
+async def assess():
+    ctx = VerificationContext(BATCH, supply_context=NO_SUPPLY, cdsco=NO_CDSCO)
+    return await batch_engine.assess(ctx)
+
+
+async def test_disabled_by_default():
+    """Weighted 0, scans are not counted and the signal does not run"""
+    settings.verification_signal_weights = {"scan_history": 0.0}
+    await _count_scans(scan_logs(30, 12))
+    assert await scan_frequency_service.bucket_collection.count_documents({}) == 0
+    assessment = await assess()
+    assert "scan_history" not in assessment.signals, assessment.scores()
+    print("✅ Scan history off: no buckets written, signal not run")
+
+
+async def test_enabled():
+    """Weighted above 0, logged scans feed the 24 hour window and the signal"""
+    settings.verification_signal_weights = {"scan_history": 1.0}
+    await _count_scans(scan_logs(30, 12))
+    await _count_scans(scan_logs(2, 0))
+
+    count, verdicts = await scan_frequency_service.scan_window(BATCH, 24)
+    assert count == 32 and verdicts == {"SUSPICIOUS": 12, "SAFE": 20}, (count, verdicts)
+    assert await scan_frequency_service.bucket_collection.count_documents({}) == 1
+
+    signal = (await assess()).signals["scan_history"]
+    assert signal.score == -20.0, signal.score
+    assert signal.risk_flags == ["HIGH_SCAN_FREQUENCY", "FREQUENT_NEGATIVE_VERDICTS"], signal.risk_flags
+    print("✅ Scan history on: 32 scans counted in one bucket, signal flags the batch")
+
+
+async def main():
+    original = (scan_frequency_service.bucket_collection, settings.verification_signal_weights)
+    scan_frequency_service.bucket_collection = get_collection(f"test_scan_frequency_{os.getpid()}")
+    try:
+        await test_disabled_by_default()
+        await test_enabled()
+    finally:
+        await scan_frequency_service.bucket_collection.drop()
+        scan_frequency_service.bucket_collection, settings.verification_signal_weights = original
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
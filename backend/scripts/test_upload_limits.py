@@ -0,0 +1,80 @@
+"""
+Test: size caps of the multi-image barcode upload
+
+Each image is capped at max_bytes, and all images of one request
+together at max_total_bytes, whether sent as files or inside a zip.
+"""
+import asyncio
+import io
+import sys
+import zipfile
+sys.path.insert(0, 'backend')
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, UploadFile
+
+from app.api.uploads import read_image_uploads
+
+KB = 1024
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png(size: int) -> bytes:
+    return PNG_SIGNATURE + b"\x00" * (size - len(PNG_SIGNATURE))
+
+
+def upload(name: str, data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(
+        io.BytesIO(data),
+        size=len(data),
+        filename=name,
+        headers=Headers({"content-type": content_type})
+    )
+
+
+def zipped(*images: bytes) -> UploadFile:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for i, data in enumerate(images):
+            archive.writestr(f"box{i}.png", data)
+    return upload("boxes.zip", buffer.getvalue(), "application/zip")
+
+
+def read(files: list):
+    return asyncio.run(read_image_uploads(files, max_bytes=40 * KB, max_total_bytes=100 * KB))
+
+
+def rejected(files: list) -> bool:
+    try:
+        read(files)
+    except HTTPException as e:
+        assert e.status_code == 413, e.status_code
+        assert "per request" in e.detail, e.detail
+        return True
+    return False
+
+
+def test_within_total():
+    """Images under both caps are read; an oversized one is a per-image error"""
+    images = read([upload("a.png", png(30 * KB)), upload("b.png", png(50 * KB)), zipped(png(30 * KB))])
+    assert [("data" in image) for image in images] == [True, False, True], images
+    print("✅ 60KB of images under a 100KB request cap, 50KB image rejected on its own")
+
+
+def test_total_cap_files():
+    """Files that together pass the request cap fail the whole request"""
+    assert rejected([upload(f"{i}.png", png(30 * KB)) for i in range(4)])
+    print("✅ 4 x 30KB files rejected with 413 past the 100KB request cap")
+
+
+def test_total_cap_zip():
+    """The request cap also covers images extracted from zips"""
+    assert rejected([zipped(*[png(30 * KB)] * 4)])
+    assert rejected([upload("a.png", png(35 * KB)), upload("b.png", png(35 * KB)), zipped(png(35 * KB))])
+    print("✅ Zipped images count toward the 100KB request cap")
+
+
+if __name__ == "__main__":
+    test_within_total()
+    test_total_cap_files()
+    test_total_cap_zip()
@@ -0,0 +1,59 @@
+"""
+Regression test: medicine-name verdicts match the pre-engine scoring
+
+The brand + CDSCO score is clamped to 10-90 before the batch record
+bonus is added, as the original verify_by_medicine_name did.
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, 'backend')
+
+from app.services.verification_context import VerificationContext
+from app.services.verification_engine import medicine_name_engine
+
+CDSCO_MISS = {"cdsco_match": False, "confidence_modifier": -30}
+CDSCO_MATCH = {"cdsco_match": True, "confidence_modifier": 35, "details": {"status": "Approved"}}
+SUPPLY = {"batch_number": "CPL2026A1", "expiry_date": datetime.now() + timedelta(days=400)}
+
+
+def assess(brand_confidence: float, cdsco: dict, supply=None, batch_number="CPL2026A1"):
+    ctx = VerificationContext(
+        batch_number,
+        medicine_name="Crocin",
+        brand={"found": True, "confidence": brand_confidence},
+        manufacturer="Cipla Limited",
+        cdsco=cdsco,
+        supply_context=(supply, None, None)
+    )
+    return asyncio.run(medicine_name_engine.assess(ctx))
+
+
+def test_baseline_floor_before_batch_bonus():
+    """Partial brand match + CDSCO miss + batch found: 34 - 30 -> 10, + 15 = 25"""
+    assessment = assess(85.0, CDSCO_MISS, SUPPLY)
+    assert round(assessment.confidence, 1) == 25.0, assessment.confidence
+    assert assessment.verdict == "SUSPICIOUS", assessment.verdict
+    print("✅ Partial brand match, CDSCO miss, batch found -> 25 SUSPICIOUS")
+
+
+def test_baseline_cases():
+    """Other inputs keep the scores of the original scoring"""
+    cases = [
+        # (brand confidence, cdsco, supply, batch number, confidence, verdict)
+        (85.0, CDSCO_MISS, None, "CPL2026A1", 10.0, "HIGH_RISK_FAKE"),
+        (85.0, CDSCO_MISS, None, None, 10.0, "HIGH_RISK_FAKE"),
+        (100.0, CDSCO_MATCH, None, None, 90.0, "SAFE"),
+        (100.0, CDSCO_MATCH, SUPPLY, "CPL2026A1", 100.0, "SAFE"),
+        (50.0, CDSCO_MISS, SUPPLY, "CPL2026A1", 25.0, "SUSPICIOUS"),
+    ]
+    for brand_confidence, cdsco, supply, batch_number, confidence, verdict in cases:
+        assessment = assess(brand_confidence, cdsco, supply, batch_number)
+        got = (round(assessment.confidence, 1), assessment.verdict)
+        assert got == (confidence, verdict), f"brand {brand_confidence}, batch {batch_number}: {got}"
+    print(f"✅ {len(cases)} medicine-name cases keep their original confidence")
+
+
+if __name__ == "__main__":
+    test_baseline_floor_before_batch_bonus()
+    test_baseline_cases()